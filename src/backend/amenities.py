@@ -0,0 +1,113 @@
+"""
+AMENITY BITMASKS
+Compact integer encoding of Hotel.amenities for indexed filtering and facets
+
+A B-tree cannot answer "has all of these bits", so the filter is written as
+an array containment test: amenity_bits(), the int[] of the set bits of
+amenity_mask, @> the requested bits. idx_hotel_amenity_bits is a GIN index
+on that exact expression; Postgres combines it with idx_hotel_destination
+in a BitmapAnd.
+"""
+
+from backend.app import db
+from backend.models import Hotel
+from sqlalchemy import event, func, case, literal_column, Index, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, array
+
+# Bit positions are stored in the database: only ever append to this list
+AMENITY_NAMES = (
+    'wifi', 'pool', 'gym', 'spa', 'restaurant', 'parking', 'ac',
+    'bar', 'room_service', 'breakfast', 'airport_shuttle', 'laundry',
+    'business_center', 'pet_friendly', 'beach_access', 'kids_club', 'ev_charging',
+)
+
+AMENITY_BITS = {name: 1 << position for position, name in enumerate(AMENITY_NAMES)}
+
+# Every bit an Integer column holds, so the indexed expression stays the
+# same as AMENITY_NAMES grows
+MASK_BITS = 31
+
+def amenity_mask(amenities):
+    """Bitmask of the amenities flagged true in a Hotel.amenities JSON dict"""
+    mask = 0
+    for name, enabled in (amenities or {}).items():
+        if enabled is True and name in AMENITY_BITS:
+            mask |= AMENITY_BITS[name]
+    return mask
+
+def split_amenity_filter(names):
+    """(mask of known amenities, [names without a bit]) for a search filter"""
+    mask = 0
+    unknown = []
+    for name in names:
+        if name in AMENITY_BITS:
+            mask |= AMENITY_BITS[name]
+        else:
+            unknown.append(name)
+    return mask, unknown
+
+def amenity_bits():
+    """SQL int[] of the bits set in Hotel.amenity_mask (the indexed expression)"""
+    # Inline constants: with bound ones a server-side prepared statement
+    # would no longer match the index expression
+    bits = array([Hotel.amenity_mask.op('&')(literal_column(str(1 << position)))
+                  for position in range(MASK_BITS)])
+    return func.array_remove(bits, literal_column('0'), type_=ARRAY(Integer))
+
+Index('idx_hotel_amenity_bits', amenity_bits(), postgresql_using='gin')
+
+def has_amenities(mask):
+    """SQL predicate: hotel has every amenity in mask (served by idx_hotel_amenity_bits)"""
+    bits = [1 << position for position in range(MASK_BITS) if mask & (1 << position)]
+    return amenity_bits().contains(array(bits, type_=Integer))
+
+def facet_columns(window=False):
+    """
+    Per-amenity SUM expressions counting matching hotels that offer it.
+    With window=True they are computed OVER () the whole filtered set,
+    so they can ride along on the page query itself.
+    """
+    columns = []
+    for name, bit in AMENITY_BITS.items():
+        total = func.sum(case((Hotel.amenity_mask.op('&')(bit) != 0, 1), else_=0))
+        columns.append((total.over() if window else total).label(f'facet_{name}'))
+    return columns
+
+def facet_counts(row):
+    """{amenity: count} from a row carrying facet_columns()"""
+    return {name: int(getattr(row, f'facet_{name}') or 0) for name in AMENITY_NAMES}
+
+@event.listens_for(Hotel, 'before_insert')
+@event.listens_for(Hotel, 'before_update')
+def _sync_amenity_mask(mapper, connection, hotel):
+    mask = amenity_mask(hotel.amenities)
+    if hotel.amenity_mask != mask:
+        hotel.amenity_mask = mask
+
+def backfill_amenity_masks(batch_size=5000):
+    """Recompute amenity_mask from the amenities JSON for every hotel"""
+    updated = 0
+    last_id = 0
+    hotels = Hotel.__table__
+    while True:
+        rows = db.session.query(Hotel.id, Hotel.amenities, Hotel.amenity_mask)\
+            .filter(Hotel.id > last_id)\
+            .order_by(Hotel.id)\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changed = [
+            {'hotel_id': row.id, 'amenity_mask': amenity_mask(row.amenities)}
+            for row in rows if row.amenity_mask != amenity_mask(row.amenities)
+        ]
+        if changed:
+            db.session.execute(
+                hotels.update().where(hotels.c.id == db.bindparam('hotel_id')),
+                changed
+            )
+            db.session.commit()
+            updated += len(changed)
+    return updated
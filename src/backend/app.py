@@ -12,11 +12,12 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_caching import Cache
 from redis import Redis
+from backend.db_routing import RoutingSession
 import os
 from datetime import timedelta
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cache = Cache()
@@ -35,14 +36,95 @@ def create_app(config_name='development'):
         'postgresql://localhost/smart_tourism'
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Connection pool per worker process; pre-ping and recycle drop
+    # connections the server or a proxy closed while they sat idle
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800))
+    }
+    
+    # Read replica (see backend/db_routing.py): GET handlers and read-only
+    # blueprints read from it, except for callers that wrote in the last
+    # DATABASE_REPLICA_STICKY seconds
+    if os.getenv('DATABASE_REPLICA_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {'replica': os.getenv('DATABASE_REPLICA_URL')}
+    app.config['DATABASE_REPLICA_BLUEPRINTS'] = os.getenv(
+        'DATABASE_REPLICA_BLUEPRINTS', 'destinations,hotels,search').split(',')
+    app.config['DATABASE_REPLICA_STICKY'] = int(os.getenv('DATABASE_REPLICA_STICKY', 5))
+    
+    # ASGI entry point (see backend/asgi.py): threads running the WSGI app
+    # for routes without an async handler; 0 disables the async handlers
+    app.config['ASGI_WSGI_THREADS'] = int(os.getenv('ASGI_WSGI_THREADS', 16))
+    app.config['ASGI_ASYNC_ROUTES'] = os.getenv('ASGI_ASYNC_ROUTES', '1') == '1'
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+
+    # Fail loudly when a view exceeds its SQL query budget (N+1 guard)
+    app.config['QUERY_BUDGETS_ENFORCED'] = config_name in ('development', 'testing')
+
+    # Build the autocomplete index during cache warm-up instead of on the first keystroke
+    app.config['AUTOCOMPLETE_PRELOAD'] = config_name != 'testing'
+
+    # Principal cache for token_required: per-worker LRU (entries may lag a
+    # write made on another worker by up to the TTL) in front of Redis
+    app.config['PRINCIPAL_CACHE_SIZE'] = int(os.getenv('PRINCIPAL_CACHE_SIZE', 10000))
+    app.config['PRINCIPAL_CACHE_TTL'] = int(os.getenv('PRINCIPAL_CACHE_TTL', 30))
+    app.config['PRINCIPAL_CACHE_SHARED'] = os.getenv('PRINCIPAL_CACHE_SHARED', '1') == '1'
+    app.config['PRINCIPAL_CACHE_SHARED_TTL'] = int(os.getenv('PRINCIPAL_CACHE_SHARED_TTL', 600))
+    
+    # Password hashing pool (see backend/passwords.py)
+    app.config['BCRYPT_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # Web worker processes on this host (gunicorn and uvicorn read the same variable);
+    # each worker's pool gets its share of the cores
+    app.config['WEB_CONCURRENCY'] = max(int(os.getenv('WEB_CONCURRENCY', 1)), 1)
+    app.config['PASSWORD_POOL_WORKERS'] = int(os.getenv(
+        'PASSWORD_POOL_WORKERS', max((os.cpu_count() or 1) // app.config['WEB_CONCURRENCY'], 1)))
+    app.config['PASSWORD_QUEUE_SIZE'] = int(os.getenv('PASSWORD_QUEUE_SIZE', 4 * app.config['PASSWORD_POOL_WORKERS']))
+    app.config['PASSWORD_QUEUE_TIMEOUT'] = float(os.getenv('PASSWORD_QUEUE_TIMEOUT', 0.05))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5.0))
+    
+    # Audit pipeline: security-critical actions commit with the request,
+    # the rest are batched by a background writer
+    app.config['AUDIT_SYNC_ACTIONS'] = os.getenv('AUDIT_SYNC_ACTIONS', 'register,role_change,password_change').split(',')
+    app.config['AUDIT_BATCH_SIZE'] = int(os.getenv('AUDIT_BATCH_SIZE', 500))
+    app.config['AUDIT_FLUSH_INTERVAL'] = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+    app.config['AUDIT_QUEUE_SIZE'] = int(os.getenv('AUDIT_QUEUE_SIZE', 10000))
+    
+    # Per-route request metrics on /api/metrics (share of requests sampled)
+    app.config['METRICS_SAMPLE_RATE'] = float(os.getenv('METRICS_SAMPLE_RATE', 1.0))
+    
+    # Stats and metrics endpoints need an admin's token, or this static
+    # bearer token (for scrapers such as Prometheus); unset: admins only
+    app.config['OPS_TOKEN'] = os.getenv('OPS_TOKEN')
+    
+    # Cache warm-up (see backend/warmup.py), started by a worker's first
+    # request: /api/health reports ready once it finishes or WARMUP_BUDGET
+    # seconds have passed. Off for tests and benchmarks, which control what
+    # is cached themselves
+    warmup_default = '0' if config_name in ('testing', 'benchmark') else '1'
+    app.config['WARMUP_ENABLED'] = os.getenv('WARMUP_ENABLED', warmup_default) == '1'
+    app.config['WARMUP_HOTELS'] = int(os.getenv('WARMUP_HOTELS', 100))
+    app.config['WARMUP_DESTINATIONS'] = int(os.getenv('WARMUP_DESTINATIONS', 10))
+    app.config['WARMUP_SEARCH_SORTS'] = os.getenv('WARMUP_SEARCH_SORTS', 'popularity,price_low').split(',')
+    app.config['WARMUP_BUDGET'] = float(os.getenv('WARMUP_BUDGET', 30))
     
-    # Redis configuration
-    app.config['CACHE_TYPE'] = 'redis'
+    # Redis configuration: two-tier cache (per-worker LRU in front of Redis,
+    # see backend/tiered_cache.py); tests run it over an in-memory stand-in
+    app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'backend.tiered_cache.TieredCache')
+    app.config['CACHE_TIERED_REMOTE'] = os.getenv(
+        'CACHE_TIERED_REMOTE', 'SimpleCache' if config_name == 'testing' else 'RedisCache')
     app.config['CACHE_REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    app.config['CACHE_LOCAL_SIZE'] = int(os.getenv('CACHE_LOCAL_SIZE', 10000))
+    app.config['CACHE_LOCAL_TTL'] = float(os.getenv('CACHE_LOCAL_TTL', 5))
+    app.config['CACHE_STALE_TTL'] = int(os.getenv('CACHE_STALE_TTL', 60))
+    app.config['CACHE_LOCK_TIMEOUT'] = int(os.getenv('CACHE_LOCK_TIMEOUT', 10))
+    app.config['CACHE_LOCK_WAIT'] = float(os.getenv('CACHE_LOCK_WAIT', 1.0))
     
     # Initialize extensions
     CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -52,9 +134,12 @@ def create_app(config_name='development'):
     cache.init_app(app)
     limiter.init_app(app)
     
+    from backend.audit import audit_writer
+    audit_writer.init_app(app)
+    
     # Register blueprints
     from backend.routes import auth, destinations, hotels, bookings, itineraries, \
-        social, rides, emergency, providers, admin, chatbot, analytics
+        social, rides, emergency, providers, admin, chatbot, analytics, search
     
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(destinations.bp, url_prefix='/api/destinations')
@@ -68,26 +153,70 @@ def create_app(config_name='development'):
     app.register_blueprint(admin.bp, url_prefix='/api/admin')
     app.register_blueprint(chatbot.bp, url_prefix='/api/chatbot')
     app.register_blueprint(analytics.bp, url_prefix='/api/analytics')
+    app.register_blueprint(search.bp, url_prefix='/api/search')
+    
+    # Request metrics (Prometheus text format on /api/metrics)
+    from backend.instrumentation import register_metrics
+    register_metrics(app, cache)
+    
+    # Read replica routing (no-op without DATABASE_REPLICA_URL)
+    from backend.db_routing import register_replica_routing
+    register_replica_routing(app, cache)
+    
+    # Maintenance commands
+    from backend.cli import register_commands
+    register_commands(app)
+    
+    # Health check: 503 while this worker is still warming its caches
+    from backend.warmup import cache_warmup
     
-    # Health check
     @app.route('/api/health')
     def health():
+        if not cache_warmup.ready():
+            response = jsonify({'status': 'warming', 'warmup': cache_warmup.snapshot()})
+            response.headers['Retry-After'] = '1'
+            return response, 503
         return jsonify({
             'status': 'healthy',
             'version': '1.0.0',
             'environment': config_name
         })
     
+    # Per-worker two-tier cache counters
+    from backend.routes.auth import admin_required
+    
+    @app.route('/api/cache/stats')
+    @admin_required
+    def cache_statistics():
+        from backend.tiered_cache import cache_stats
+        return jsonify(cache_stats(cache) or {'tiered': False})
+    
     # Error handlers
+    from backend.serialization import InvalidFields
+    from backend.passwords import HashingPoolSaturated
+    
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({'error': 'Resource not found'}), 404
     
+    @app.errorhandler(InvalidFields)
+    def invalid_fields(error):
+        return jsonify({'error': str(error)}), 400
+    
+    @app.errorhandler(HashingPoolSaturated)
+    def hashing_saturated(error):
+        response = jsonify({'error': str(error)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
     
+    # Warm-up starts on this worker's first request (never for seeders or CLI commands)
+    cache_warmup.init_app(app)
+    
     return app
 
 if __name__ == '__main__':
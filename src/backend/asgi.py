@@ -0,0 +1,441 @@
+"""
+ASGI ENTRY POINT
+Async handlers for the read-heavy hotel, destination and review routes; the Flask app on a thread pool for the rest
+
+Usage: uvicorn backend.asgi:create_asgi_app --factory --workers 4
+
+These GET routes are served by coroutines on an async SQLAlchemy engine
+(asyncpg) and redis.asyncio:
+  - /api/destinations/
+  - /api/hotels/<id>
+  - /api/hotels/<id>/ratings
+  - /api/hotels/<id>/reviews
+A request waiting on Postgres or Redis holds no thread. Each handler builds
+its response from the same statements, payload builders and cache entries
+as the Flask view, inside a Flask request context. The app's
+before/after-request hooks and error handlers run as for WSGI, and replica
+routing applies, with pins looked up without blocking.
+
+Every other request goes to the WSGI app on ASGI_WSGI_THREADS threads.
+ASGI_ASYNC_ROUTES=0 sends all of them there (the thread-per-request
+baseline of benchmarks/bench_asgi.py).
+
+Needs asyncpg and the two-tier cache over Redis (CACHE_TIERED_REMOTE=RedisCache).
+"""
+
+from flask import g, request, abort
+from backend.app import create_app, cache
+from backend.catalog import VERSION_KEY, BODY_KEY, BODY_TIMEOUT, catalog_etag, catalog_query, catalog_payload
+from backend.db_routing import ROUTING_ENVIRON_KEY, replica_configured, pin_keys, is_pinned
+from backend.hotel_fragments import FRAGMENTS, FRAGMENT_BUILDERS, FRAGMENT_TIMEOUT, INFO, ROOMS, REVIEWS, \
+    fragment_key, generation_key, new_generation, review_listing
+from backend.models import Review, HotelRatingAggregate
+from backend.pagination import encode_cursor, decode_cursor, explain_row_estimate, page_size, InvalidCursor, \
+    InvalidPageSize, TOTAL_MODES, TOTAL_EXACT, TOTAL_ESTIMATE, TOTAL_NONE
+from backend.ratings import summarize_aggregate
+from backend.routes.destinations import catalog_response
+from backend.schemas import HOTEL_DETAIL, REVIEW
+from backend.serialization import json_response, project
+from backend.tiered_cache import AsyncTieredCache
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+import asyncio
+import io
+import math
+import sys
+import uuid
+
+aggregates = HotelRatingAggregate.__table__
+
+ASYNC_VIEWS = {}
+
+def async_view(endpoint):
+    """Serve a Flask endpoint with a coroutine(reader, cache, **view_args)"""
+    def register(view):
+        ASYNC_VIEWS[endpoint] = view
+        return view
+    return register
+
+# ============================================================
+# DATABASE
+# ============================================================
+
+def async_engine(uri, options):
+    """Async engine (asyncpg) for a postgresql:// URI, with the sync engine's pool options"""
+    return create_async_engine(make_url(uri).set(drivername='postgresql+asyncpg'), **options)
+
+class Reader:
+    """
+    One request's database access: a connection taken from the pool on first
+    use. primary() is a Reader on the primary engine, for reads that fill a
+    cache (the request's own engine may be a lagging replica).
+    """
+
+    def __init__(self, engine, primary_engine=None):
+        self.engine = engine
+        self.primary_engine = primary_engine or engine
+        self.connection = None
+        self._primary = None
+
+    def primary(self):
+        if self.primary_engine is self.engine:
+            return self
+        if self._primary is None:
+            self._primary = Reader(self.primary_engine)
+        return self._primary
+
+    async def _connection(self):
+        if self.connection is None:
+            self.connection = await self.engine.connect()
+        return self.connection
+
+    async def all(self, statement):
+        return (await (await self._connection()).execute(statement)).all()
+
+    async def scalar(self, statement):
+        return (await (await self._connection()).execute(statement)).scalar()
+
+    async def run_sync(self, fn, *args):
+        """fn(sync_connection, *args), for code written against a sync Connection"""
+        return await (await self._connection()).run_sync(fn, *args)
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+        if self._primary is not None:
+            await self._primary.close()
+
+# ============================================================
+# HANDLERS
+# ============================================================
+
+async def catalog_version(cache):
+    """backend.catalog.catalog_version on the async cache"""
+    version = await cache.get(VERSION_KEY)
+    if version is None:
+        await cache.add(VERSION_KEY, uuid.uuid4().hex[:12], timeout=0)
+        version = await cache.get(VERSION_KEY)
+    return version
+
+@async_view('destinations.get_destinations')
+async def get_destinations(reader, cache):
+    encoding = 'gzip' if request.accept_encodings['gzip'] else None
+    version = await catalog_version(cache)
+    etag = catalog_etag(version, encoding)
+
+    if request.if_none_match.contains_weak(etag):
+        return catalog_response(etag, encoding, None)
+
+    async def build():
+        # May run after the request is done (stale refresh): own connection
+        async with reader.primary_engine.connect() as connection:
+            return catalog_payload((await connection.execute(catalog_query())).all())
+
+    bodies = await cache.get_or_compute(BODY_KEY.format(version), build, timeout=BODY_TIMEOUT)
+    return catalog_response(etag, encoding, bodies[encoding or 'identity'])
+
+async def fragment_generations(cache, hotel_id):
+    """backend.hotel_fragments.fragment_generations on the async cache"""
+    keys = [generation_key(hotel_id, name) for name in FRAGMENTS]
+    generations = dict(zip(FRAGMENTS, await cache.get_many(*keys)))
+    for name, key in zip(FRAGMENTS, keys):
+        if generations[name] is None:
+            await cache.add(key, new_generation(), timeout=FRAGMENT_TIMEOUT)
+            generations[name] = await cache.get(key)
+    return generations
+
+@async_view('hotels.get_hotel_details')
+async def get_hotel_details(reader, cache, hotel_id):
+    only = HOTEL_DETAIL.fields_param()
+    generations = await fragment_generations(cache, hotel_id)
+    keys = [fragment_key(hotel_id, name, generations[name]) for name in FRAGMENTS]
+    fragments = dict(zip(FRAGMENTS, await cache.get_many(*keys)))
+
+    for name, key in zip(FRAGMENTS, keys):
+        if fragments[name] is None:
+            query, payload = FRAGMENT_BUILDERS[name]
+            fragments[name] = payload(await reader.primary().all(query(hotel_id)))
+            if fragments[name] is None:
+                abort(404)
+            await cache.set(key, fragments[name], timeout=FRAGMENT_TIMEOUT)
+
+    hotel = {**fragments[INFO], 'rooms': fragments[ROOMS]}
+    return json_response({
+        'hotel': project([hotel], only)[0],
+        'reviews': fragments[REVIEWS]
+    }), 200
+
+@async_view('hotels.get_hotel_ratings')
+async def get_hotel_ratings(reader, cache, hotel_id):
+    rows = await reader.all(select(aggregates).where(aggregates.c.hotel_id == hotel_id))
+    return json_response({'hotel_id': hotel_id, 'ratings': summarize_aggregate(rows[0] if rows else None)}), 200
+
+@async_view('hotels.get_hotel_reviews')
+async def get_hotel_reviews(reader, cache, hotel_id):
+    """Same modes, parameters and errors as routes/hotels.py get_hotel_reviews"""
+    try:
+        per_page = page_size(request.args)
+    except InvalidPageSize as e:
+        return json_response({'error': str(e)}), 400
+    cursor = request.args.get('cursor')
+    only = REVIEW.fields_param()
+
+    listing = review_listing(hotel_id)
+
+    if cursor or request.args.get('mode') == 'cursor':
+        include_total = request.args.get('total', TOTAL_NONE)
+        if include_total not in TOTAL_MODES:
+            return json_response({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+
+        cursor_scope = f'reviews:{hotel_id}'
+        try:
+            after = decode_cursor(cursor, cursor_scope) if cursor else None
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}), 400
+
+        page_query = listing
+        if after:
+            page_query = page_query.where(tuple_(Review.created_at, Review.id) < tuple_(*after))
+        items = await reader.all(page_query.order_by(Review.created_at.desc(), Review.id.desc()).limit(per_page + 1))
+        has_more = len(items) > per_page
+        items = items[:per_page]
+
+        pagination = {
+            'mode': 'cursor',
+            'per_page': per_page,
+            'next_cursor': encode_cursor(cursor_scope, items[-1].created_at, items[-1].id) if has_more else None,
+            'has_more': has_more
+        }
+        if include_total == TOTAL_EXACT:
+            pagination['total'] = await reader.scalar(select(func.count()).select_from(listing.subquery()))
+        elif include_total == TOTAL_ESTIMATE:
+            pagination['total'] = await reader.run_sync(explain_row_estimate, listing)
+        if include_total != TOTAL_NONE:
+            pagination['total_is_estimate'] = include_total == TOTAL_ESTIMATE
+    else:
+        page = request.args.get('page', 1, type=int)
+        # Flask-SQLAlchemy's paginate(error_out=False) falls back to this
+        offset_page = max(page, 1)
+        items = await reader.all(listing.order_by(Review.created_at.desc())
+                                 .limit(per_page).offset((offset_page - 1) * per_page))
+        total = await reader.scalar(select(func.count()).select_from(listing.subquery()))
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': math.ceil(total / per_page) if total else 0
+        }
+
+    return json_response({
+        'reviews': REVIEW.dump_many(items, only),
+        'pagination': pagination
+    }), 200
+
+# ============================================================
+# ASGI <-> WSGI
+# ============================================================
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope (PEP 3333 string handling)"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,  # read in full, chunked or not
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+async def _send_start(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+
+# ============================================================
+# APPLICATION
+# ============================================================
+
+class AsgiApp:
+    """ASGI callable around a Flask app created by create_app"""
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(app.config['ASGI_WSGI_THREADS'], thread_name_prefix='wsgi')
+        self.views = ASYNC_VIEWS if app.config['ASGI_ASYNC_ROUTES'] else {}
+        self.route_replica = replica_configured(app)
+        self.sticky = app.config['DATABASE_REPLICA_STICKY']
+        self.engine = None
+        self.replica_engine = None
+        self.cache = None
+        self._opening = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise NotImplementedError(f"Unsupported ASGI scope type {scope['type']}")
+
+        environ = _environ(scope, await _read_body(receive))
+        view = self._match(environ)
+        if view is None:
+            await self._call_wsgi(environ, send)
+        else:
+            await self._call_async(view, environ, send)
+
+    def _match(self, environ):
+        if not self.views:
+            return None
+        try:
+            rule, _ = self.app.url_map.bind_to_environ(environ).match(return_rule=True)
+        except Exception:
+            return None  # 404s, 405s and redirects are left to Flask
+        return self.views.get(rule.endpoint)
+
+    # ===== LIFESPAN =====
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.open()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def open(self):
+        """Create the async engines and cache client (once; servers without lifespan open lazily)"""
+        if self._opening is None:
+            self._opening = asyncio.ensure_future(self._open())
+        await self._opening
+
+    async def _open(self):
+        config = self.app.config
+        options = config['SQLALCHEMY_ENGINE_OPTIONS']
+        self.engine = async_engine(config['SQLALCHEMY_DATABASE_URI'], options)
+        if self.route_replica:
+            self.replica_engine = async_engine(config['SQLALCHEMY_BINDS']['replica'], options)
+        with self.app.app_context():
+            self.cache = AsyncTieredCache.from_cache(cache.cache, config['CACHE_REDIS_URL'])
+
+    async def close(self):
+        if self.cache is not None:
+            await self.cache.close()
+        for engine in (self.engine, self.replica_engine):
+            if engine is not None:
+                await engine.dispose()
+        self.executor.shutdown(wait=False)
+
+    # ===== ASYNC ROUTES =====
+
+    async def _reads_replica(self, environ):
+        # Async routes are all GETs; only the caller's own recent writes keep them on the primary
+        if not self.sticky:
+            return True
+        keys = pin_keys(environ.get('HTTP_AUTHORIZATION'), environ.get('REMOTE_ADDR'))
+        return not is_pinned(await self.cache.get_many(*keys))
+
+    async def _call_async(self, view, environ, send):
+        """Flask.wsgi_app / full_dispatch_request, awaiting the view"""
+        await self.open()
+        if self.route_replica:
+            environ[ROUTING_ENVIRON_KEY] = await self._reads_replica(environ)
+
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        reader = None
+        try:
+            ctx.push()
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        reader = Reader(self.replica_engine if g.get('db_replica') else self.engine, self.engine)
+                        rv = await view(reader, self.cache, **request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                finally:
+                    if reader is not None:
+                        await reader.close()
+                response = app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            body, status, headers = response.get_wsgi_response(environ)
+            body = b''.join(body)
+        finally:
+            ctx.pop(error)
+
+        await _send_start(send, status, headers)
+        await send({'type': 'http.response.body', 'body': body})
+
+    # ===== WSGI FALLBACK =====
+
+    async def _call_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+            return lambda data: None  # the write() callable is unused by Flask
+
+        chunks = await loop.run_in_executor(self.executor, self.app, environ, start_response)
+        try:
+            await _send_start(send, *started)
+            iterator = iter(chunks)
+            while True:
+                # Streamed responses produce their chunks on the worker thread
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(chunks, 'close'):
+                await loop.run_in_executor(self.executor, chunks.close)
+        await send({'type': 'http.response.body', 'body': b''})
+
+def create_asgi_app(config_name='development'):
+    """ASGI application factory (create_app's counterpart)"""
+    return AsgiApp(create_app(config_name))
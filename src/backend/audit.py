@@ -0,0 +1,181 @@
+"""
+AUDIT PIPELINE
+Audit events written with the caller's transaction (sync) or batched off the request path (async)
+"""
+
+from flask import request, has_request_context
+from backend.app import db
+from backend.models import AuditLog
+from backend.cache_events import on_commit
+from datetime import datetime
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SYNC = 'sync'
+ASYNC = 'async'
+
+audit_logs = AuditLog.__table__
+
+# ============================================================
+# WRITER
+# ============================================================
+
+class AuditWriter:
+    """
+    In-memory queue drained by one background thread per process, which
+    writes multi-row INSERTs of up to AUDIT_BATCH_SIZE rows at least every
+    AUDIT_FLUSH_INTERVAL seconds. A full queue degrades to writing inline,
+    and the queue is drained on interpreter shutdown.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self.engine = None
+        self.sync_actions = frozenset()
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.queue_size = 10000
+        self.written = 0
+        self.failed = 0
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+        self.sync_actions = frozenset(app.config['AUDIT_SYNC_ACTIONS'])
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self.queue_size = app.config['AUDIT_QUEUE_SIZE']
+
+    def _ensure_started(self):
+        # Threads do not survive fork: every worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def enqueue(self, row):
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=0.1)
+        except queue.Full:
+            self._write([row])
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            batch = []
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 or self._stopping.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+                except queue.Empty:
+                    continue
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows):
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(audit_logs.insert(), rows)
+            self.incr('written', len(rows))
+        except Exception:
+            # Audit loss is logged, never raised into a request
+            self.incr('failed', len(rows))
+            logger.exception('Failed to write %d audit events', len(rows))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def stop(self):
+        """Stop the thread and flush what is left (runs at interpreter exit)"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def incr(self, name, amount=1):
+        # Inline writes (full queue) run on request threads, beside the writer thread
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'written': self.written,
+                'failed': self.failed
+            }
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.stop)
+
+# ============================================================
+# API
+# ============================================================
+
+def record_audit(action_type, user_id=None, entity_type=None, entity_id=None,
+                 old_values=None, new_values=None, durability=None):
+    """
+    Record an audit event. Actions in AUDIT_SYNC_ACTIONS (or durability=SYNC)
+    are added to the current session and commit with the caller's transaction;
+    everything else is queued for the batched writer and never adds a commit.
+    Queued events also follow the caller's transaction: recorded inside one,
+    they are queued when it commits and dropped if it rolls back.
+    """
+    row = {
+        'user_id': user_id,
+        'action_type': action_type,
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'ip_address': request.remote_addr if has_request_context() else None,
+        'user_agent': request.headers.get('User-Agent') if has_request_context() else None,
+        'old_values': old_values,
+        'new_values': new_values,
+        'created_at': datetime.utcnow()
+    }
+
+    if durability is None:
+        durability = SYNC if action_type in audit_writer.sync_actions else ASYNC
+    if durability == SYNC or audit_writer.engine is None:
+        db.session.add(AuditLog(**row))
+    else:
+        session = db.session()
+        if session.in_transaction():
+            on_commit(session, ('audit', id(row)), lambda: audit_writer.enqueue(row))
+        else:
+            audit_writer.enqueue(row)
@@ -0,0 +1,354 @@
+"""
+AUTOCOMPLETE INDEX
+Sorted-array prefix indexes with popularity-weighted top-k, kept in sync through a shared change log
+"""
+
+from backend.app import db, cache
+from backend.models import Destination, Hotel, Activity
+from backend.cache_events import on_commit
+from backend.db_routing import primary_reads
+from sqlalchemy import event, inspect
+from bisect import bisect_left, insort
+from collections import namedtuple
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+
+MAX_SUGGESTIONS = 20
+MAX_QUERY_LENGTH = 100
+
+# Prefix ranges larger than this get their top-k memoized instead of scanned
+HEAVY_RANGE = 256
+
+DESTINATION = 'destination'
+HOTEL = 'hotel'
+BRAND = 'brand'
+ACTIVITY = 'activity'
+KINDS = (DESTINATION, HOTEL, BRAND, ACTIVITY)
+
+Suggestion = namedtuple('Suggestion', 'key kind ident label weight destination_id')
+
+_SEPARATORS = re.compile(r'[^0-9a-z]+')
+
+def normalize(text):
+    """Lookup form of a name: accents folded, lowercased, punctuation collapsed"""
+    folded = unicodedata.normalize('NFKD', text or '')
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch)).casefold()
+    return _SEPARATORS.sub(' ', folded).strip()
+
+# ============================================================
+# PREFIX INDEX
+# ============================================================
+
+class PrefixIndex:
+    """
+    Entries sorted by normalized key; a prefix maps to one contiguous slice.
+    Small slices are scanned, large ones serve a memoized top list that
+    writes patch in place (or drop, when a member is removed).
+    """
+
+    def __init__(self, entries=()):
+        entries = sorted(entries, key=lambda entry: (entry.key, entry.ident))
+        self.keys = [entry.key for entry in entries]
+        self.entries = entries
+        self._top = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _range(self, prefix):
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + '\uffff')
+
+    def top(self, prefix, k):
+        """Up to k entries whose key starts with prefix, heaviest first"""
+        lo, hi = self._range(prefix)
+        if hi - lo <= HEAVY_RANGE:
+            return heapq.nlargest(k, self.entries[lo:hi], key=lambda entry: entry.weight)
+
+        top = self._top.get(prefix)
+        if top is None:
+            top = heapq.nlargest(MAX_SUGGESTIONS, self.entries[lo:hi], key=lambda entry: entry.weight)
+            self._top[prefix] = top
+        return top[:k]
+
+    def _memoized_prefixes(self, key):
+        return [key[:length] for length in range(len(key) + 1) if key[:length] in self._top]
+
+    def add(self, entry):
+        position = bisect_left(self.keys, entry.key)
+        while position < len(self.keys) and self.keys[position] == entry.key \
+                and self.entries[position].ident < entry.ident:
+            position += 1
+        self.keys.insert(position, entry.key)
+        self.entries.insert(position, entry)
+
+        for prefix in self._memoized_prefixes(entry.key):
+            top = self._top[prefix]
+            if len(top) < MAX_SUGGESTIONS or entry.weight > top[-1].weight:
+                insort(top, entry, key=lambda item: -item.weight)
+                del top[MAX_SUGGESTIONS:]
+
+    def remove(self, entry):
+        lo, hi = bisect_left(self.keys, entry.key), bisect_left(self.keys, entry.key + '\x00')
+        for position in range(lo, hi):
+            if self.entries[position].ident == entry.ident:
+                del self.keys[position]
+                del self.entries[position]
+                break
+
+        for prefix in self._memoized_prefixes(entry.key):
+            if any(item.ident == entry.ident for item in self._top[prefix]):
+                del self._top[prefix]
+
+def suggest_from(indexes, prefix, limit, kinds=KINDS):
+    """Merge the per-kind top-k lists of {kind: PrefixIndex}"""
+    key = normalize(prefix)
+    if not key:
+        return []
+    candidates = [entry for kind in kinds for entry in indexes[kind].top(key, limit)]
+    return heapq.nlargest(limit, candidates, key=lambda entry: entry.weight)
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def _hotel_weight(total_bookings, overall_rating):
+    return math.log1p(total_bookings or 0) + (overall_rating or 0.0)
+
+def _hotel_payload(hotel):
+    return {
+        'name': hotel.name,
+        'brand': hotel.brand,
+        'destination_id': hotel.destination_id,
+        'weight': _hotel_weight(hotel.total_bookings, hotel.overall_rating)
+    }
+
+def _destination_entry(ident, name, popularity):
+    return Suggestion(normalize(name), DESTINATION, ident, name, popularity or 0.0, ident)
+
+def _activity_entry(ident, name, popularity, destination_id):
+    return Suggestion(normalize(name), ACTIVITY, ident, name, popularity or 0.0, destination_id)
+
+def _hotel_entry(ident, payload):
+    return Suggestion(normalize(payload['name']), HOTEL, ident, payload['name'],
+                      payload['weight'], payload['destination_id'])
+
+def _brand_entry(key, hotels):
+    """One suggestion per brand, as heavy as its most popular hotel ({hotel_id: (label, weight)})"""
+    label, weight = max(hotels.values(), key=lambda item: item[1])
+    return Suggestion(key, BRAND, key, label, weight, None)
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+class AutocompleteRegistry:
+    """
+    Per-worker indexes built from the database on first use. Writes append
+    to a shared change log (sequence counter + one cache entry per change);
+    each worker replays what it has not seen, at most once per SYNC_INTERVAL,
+    and rebuilds only when the log has expired under it.
+
+    Lookups and replays take a short in-memory lock. Cache round trips and
+    rebuilds run outside it, on one thread at a time, while the other
+    threads keep answering from the indexes they have.
+    """
+
+    SEQ_KEY = 'suggest:seq'
+    CHANGE_KEY = 'suggest:change:{}'
+    CHANGE_TIMEOUT = 3600
+    MAX_REPLAY = 1000
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._next_sync = 0.0
+        self._seq = None
+        self._indexes = None
+        self._entries = {}
+        self._brands = {}
+        self._hotel_brands = {}
+
+    # -- building --------------------------------------------------
+
+    def _load(self):
+        """(indexes, entries, brands, hotel_brands) built from the database"""
+        entries = []
+        by_key = {}
+        brands = {}
+        hotel_brands = {}
+
+        for row in db.session.query(Destination.id, Destination.name, Destination.popularity_score):
+            entries.append(_destination_entry(row.id, row.name, row.popularity_score))
+
+        for row in db.session.query(Activity.id, Activity.name, Activity.popularity_score,
+                                    Activity.destination_id):
+            entries.append(_activity_entry(row.id, row.name, row.popularity_score, row.destination_id))
+
+        for row in db.session.query(Hotel.id, Hotel.name, Hotel.brand, Hotel.destination_id,
+                                    Hotel.total_bookings, Hotel.overall_rating):
+            payload = _hotel_payload(row)
+            entries.append(_hotel_entry(row.id, payload))
+            brand_key = normalize(row.brand)
+            if brand_key:
+                brands.setdefault(brand_key, {})[row.id] = (row.brand, payload['weight'])
+                hotel_brands[row.id] = brand_key
+
+        entries.extend(_brand_entry(key, brands[key]) for key in brands)
+
+        by_kind = {kind: [] for kind in KINDS}
+        for entry in entries:
+            by_kind[entry.kind].append(entry)
+            by_key[entry.kind, entry.ident] = entry
+        indexes = {kind: PrefixIndex(by_kind[kind]) for kind in KINDS}
+        return indexes, by_key, brands, hotel_brands
+
+    # -- incremental updates ---------------------------------------
+
+    def _replace(self, kind, ident, entry):
+        old = self._entries.pop((kind, ident), None)
+        if old is not None:
+            self._indexes[kind].remove(old)
+        if entry is not None:
+            self._indexes[kind].add(entry)
+            self._entries[kind, ident] = entry
+
+    def _set_brand(self, key, hotel_id, value):
+        hotels = self._brands.setdefault(key, {})
+        if value is None:
+            hotels.pop(hotel_id, None)
+            self._hotel_brands.pop(hotel_id, None)
+        else:
+            hotels[hotel_id] = value
+            self._hotel_brands[hotel_id] = key
+        if not hotels:
+            del self._brands[key]
+        self._replace(BRAND, key, _brand_entry(key, hotels) if hotels else None)
+
+    def _apply(self, change):
+        kind, ident, payload = change
+        if kind == DESTINATION:
+            self._replace(kind, ident, payload and _destination_entry(ident, payload['name'], payload['weight']))
+        elif kind == ACTIVITY:
+            self._replace(kind, ident, payload and _activity_entry(
+                ident, payload['name'], payload['weight'], payload['destination_id']))
+        elif kind == HOTEL:
+            self._replace(kind, ident, payload and _hotel_entry(ident, payload))
+            if ident in self._hotel_brands:
+                self._set_brand(self._hotel_brands[ident], ident, None)
+            if payload and normalize(payload['brand']):
+                self._set_brand(normalize(payload['brand']), ident, (payload['brand'], payload['weight']))
+
+    # -- syncing ---------------------------------------------------
+
+    def _sync(self):
+        """Catch up with the shared log, at most once per SYNC_INTERVAL"""
+        if self._indexes is not None and time.monotonic() < self._next_sync:
+            return
+        # One thread syncs; the rest answer from the current indexes
+        # (before the first build there are none, so they wait for it)
+        if not self._sync_lock.acquire(blocking=self._indexes is None):
+            return
+        try:
+            if self._indexes is not None and time.monotonic() < self._next_sync:
+                return
+            self._catch_up()
+            self._next_sync = time.monotonic() + self.SYNC_INTERVAL
+        finally:
+            self._sync_lock.release()
+
+    def _catch_up(self):
+        shared = int(cache.get(self.SEQ_KEY) or 0)
+        if self._indexes is not None and shared == self._seq:
+            return
+
+        if self._indexes is not None and self._seq < shared <= self._seq + self.MAX_REPLAY:
+            keys = [self.CHANGE_KEY.format(seq) for seq in range(self._seq + 1, shared + 1)]
+            changes = cache.get_many(*keys)
+            if all(change is not None for change in changes):
+                with self._lock:
+                    for change in changes:
+                        self._apply(change)
+                    self._seq = shared
+                return
+
+        # First use, log expired, or the cache was flushed. Changes committed
+        # while loading are replayed next time; replaying them is idempotent.
+        with primary_reads():
+            loaded = self._load()
+        with self._lock:
+            self._indexes, self._entries, self._brands, self._hotel_brands = loaded
+            self._seq = shared
+
+    def suggest(self, prefix, limit=10, kinds=KINDS):
+        """Top suggestions across kinds for a typed prefix, heaviest first"""
+        self._sync()
+        with self._lock:
+            return suggest_from(self._indexes, prefix, limit, kinds)
+
+    def warm(self):
+        self._sync()
+        with self._lock:
+            return sum(len(index) for index in self._indexes.values())
+
+    # -- publishing ------------------------------------------------
+
+    def publish(self, change):
+        # Claim the next free slot by writing the change into it (add is
+        # atomic), then bump the sequence. Slots fill in order, so readers
+        # never see a sequence number whose change is not written yet.
+        seq = int(cache.get(self.SEQ_KEY) or 0) + 1
+        while not cache.add(self.CHANGE_KEY.format(seq), change, timeout=self.CHANGE_TIMEOUT):
+            seq += 1
+        # inc is atomic on Redis (INCR); Flask-Caching only exposes it on the backend
+        cache.cache.inc(self.SEQ_KEY)
+
+suggestion_index = AutocompleteRegistry()
+
+# ============================================================
+# WRITE EVENTS
+# ============================================================
+
+_WATCHED = {
+    Destination: ('name', 'popularity_score'),
+    Activity: ('name', 'popularity_score', 'destination_id'),
+    Hotel: ('name', 'brand', 'destination_id', 'total_bookings', 'overall_rating'),
+}
+
+def _change(target, deleted=False):
+    if isinstance(target, Hotel):
+        return (HOTEL, target.id, None if deleted else _hotel_payload(target))
+    kind = DESTINATION if isinstance(target, Destination) else ACTIVITY
+    payload = None if deleted else {
+        'name': target.name,
+        'weight': target.popularity_score,
+        'destination_id': getattr(target, 'destination_id', target.id)
+    }
+    return (kind, target.id, payload)
+
+def publish_hotel(row):
+    """Publish a hotel row written without the ORM (id, name, brand, destination_id, total_bookings, overall_rating)"""
+    suggestion_index.publish((HOTEL, row.id, _hotel_payload(row)))
+
+def _publish_on_commit(target, change):
+    on_commit(target, ('suggest', change[0], change[1]), lambda: suggestion_index.publish(change))
+
+def _written(mapper, connection, target):
+    _publish_on_commit(target, _change(target))
+
+def _updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in _WATCHED[type(target)]):
+        _publish_on_commit(target, _change(target))
+
+def _deleted(mapper, connection, target):
+    _publish_on_commit(target, _change(target, deleted=True))
+
+for _model in _WATCHED:
+    event.listen(_model, 'after_insert', _written)
+    event.listen(_model, 'after_update', _updated)
+    event.listen(_model, 'after_delete', _deleted)
@@ -0,0 +1,308 @@
+"""
+ASGI LOAD COMPARISON
+Concurrent-connection capacity of one worker: async handlers against the thread-per-request baseline
+
+Usage: python -m backend.benchmarks.bench_asgi [--concurrency 16,64,256,1024] [--duration 10]
+                                               [--threads 16] [--delay-ms 5] [--slo-ms 500]
+
+Serves backend.asgi twice with one uvicorn worker and ASGI_WSGI_THREADS
+threads. The first run sets ASGI_ASYNC_ROUTES=0, so every request holds a
+thread (the WSGI baseline). The second run serves the async handlers.
+
+At each concurrency level, that many keep-alive connections send requests
+back to back for --duration seconds. The requests are hotel details,
+reviews (offset and cursor pages), ratings and the destination catalog,
+with the same Zipf-skewed hotels and ETag revalidation as
+bench_endpoints. A worker's capacity is the highest level at which p99
+latency stays under --slo-ms and fewer than 1% of requests fail.
+
+Postgres and Redis are reached through local proxies that add --delay-ms
+to every round trip, standing in for the network between app servers and
+data stores. With both on localhost, waiting on I/O would otherwise cost
+next to nothing and the comparison would show little.
+
+Needs a seeded DATABASE_URL (see bench_endpoints), Redis on REDIS_URL, and
+uvicorn and asyncpg installed. The load generator shares the machine, so
+compare the two modes with each other rather than with production numbers.
+"""
+
+from backend.app import create_app, db, limiter
+from backend.benchmarks.bench_endpoints import Mix
+from datetime import date
+from sqlalchemy.engine import make_url
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUEST_POOL = 5000
+WARMUP_SECONDS = 2
+ERROR_BUDGET = 0.01
+
+def benchmark_app():
+    """uvicorn --factory target: the ASGI app with rate limits off (one client address)"""
+    from backend.asgi import create_asgi_app
+    app = create_asgi_app('benchmark')
+    limiter.enabled = False
+    return app
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# ============================================================
+# LATENCY PROXY
+# ============================================================
+
+async def _pipe(reader, writer, delay):
+    """Copy reader to writer, each chunk arriving delay seconds after it was read"""
+    in_flight = asyncio.Queue()
+
+    async def forward():
+        while True:
+            due, data = await in_flight.get()
+            if data is None:
+                break
+            await asyncio.sleep(due - time.monotonic())
+            writer.write(data)
+            await writer.drain()
+
+    forwarding = asyncio.create_task(forward())
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            in_flight.put_nowait((time.monotonic() + delay, data))
+        in_flight.put_nowait((0, None))
+        await forwarding
+    except ConnectionError:
+        forwarding.cancel()
+    finally:
+        writer.close()
+
+def _serve_proxy(port, upstream, delay):
+    """Forward 127.0.0.1:port to upstream ((host, port) or a unix socket path), delay seconds each way"""
+    async def handle(client_reader, client_writer):
+        if isinstance(upstream, str):
+            server_reader, server_writer = await asyncio.open_unix_connection(upstream)
+        else:
+            server_reader, server_writer = await asyncio.open_connection(*upstream)
+        await asyncio.gather(_pipe(client_reader, server_writer, delay), _pipe(server_reader, client_writer, delay))
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+def start_proxy(upstream, round_trip):
+    port = _free_port()
+    process = multiprocessing.Process(target=_serve_proxy, args=(port, upstream, round_trip / 2), daemon=True)
+    process.start()
+    return port, process
+
+def proxied_urls(database_url, redis_url, round_trip):
+    """DATABASE_URL and REDIS_URL routed through latency proxies, and the proxy processes"""
+    database = make_url(database_url)
+    socket_dir = database.query.get('host')
+    if socket_dir:
+        upstream = os.path.join(socket_dir, f'.s.PGSQL.{database.port or 5432}')
+    else:
+        upstream = (database.host or 'localhost', database.port or 5432)
+    db_port, db_proxy = start_proxy(upstream, round_trip)
+    database = database.difference_update_query(['host']).set(host='127.0.0.1', port=db_port)
+
+    redis = make_url(redis_url)
+    redis_port, redis_proxy = start_proxy((redis.host or 'localhost', redis.port or 6379), round_trip)
+    redis = redis.set(host='127.0.0.1', port=redis_port)
+
+    return database.render_as_string(hide_password=False), redis.render_as_string(hide_password=False), \
+        [db_proxy, redis_proxy]
+
+# ============================================================
+# SERVER
+# ============================================================
+
+def start_server(env, threads, async_routes):
+    port = _free_port()
+    env = dict(env, ASGI_WSGI_THREADS=str(threads), ASGI_ASYNC_ROUTES='1' if async_routes else '0',
+               PYTHONPATH=SRC_DIR)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', '--factory', 'backend.benchmarks.bench_asgi:benchmark_app',
+         '--host', '127.0.0.1', '--port', str(port), '--workers', '1',
+         '--backlog', '4096', '--log-level', 'warning', '--no-access-log'],
+        cwd=SRC_DIR, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('uvicorn exited during startup')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1).read()
+            return port, process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('uvicorn did not start within 60s')
+
+# ============================================================
+# LOAD GENERATOR
+# ============================================================
+
+def sample_mix(seed):
+    app = create_app('benchmark')
+    with app.app_context():
+        mix = Mix(random.Random(seed), date.today())
+        db.session.remove()
+    return mix
+
+def request_pool(mix, port):
+    """(path, headers) to cycle through, sampled like bench_endpoints"""
+    # Returning visitors hold the catalog ETag this server hands out
+    catalog = urllib.request.Request(f'http://127.0.0.1:{port}/api/destinations/', headers={'Accept-Encoding': 'gzip'})
+    with urllib.request.urlopen(catalog) as response:
+        mix.remember('get_destinations', response)
+
+    kinds = (Mix.details, Mix.reviews, Mix.destinations, lambda mix: ('GET', f'/api/hotels/{mix.hotel()}/ratings', {}))
+    pool = []
+    for _ in range(REQUEST_POOL):
+        _, url, options = mix.rng.choice(kinds)(mix)
+        pool.append((url, options.get('headers', {})))
+    return pool
+
+async def _read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length, chunked = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.partition(b':')
+        name = name.strip().lower()
+        if name == b'content-length':
+            length = int(value)
+        elif name == b'transfer-encoding' and b'chunked' in value.lower():
+            chunked = True
+    if not chunked:
+        await reader.readexactly(length)
+        return status
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        await reader.readexactly(size + 2)
+        if size == 0:
+            return status
+
+class Load:
+    def __init__(self):
+        self.latencies = []
+        self.requests = 0
+        self.errors = 0
+
+async def _connection(port, pool, offset, measure_from, deadline, timeout, load):
+    connection = None
+    index = offset
+    while time.monotonic() < deadline:
+        path, headers = pool[index % len(pool)]
+        index += 1
+        head = ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+        started = time.monotonic()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            reader, writer = connection
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\nAccept-Encoding: gzip\r\n{head}\r\n'.encode())
+            status = await asyncio.wait_for(_read_response(reader), timeout)
+            failed = status >= 400
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            failed = True
+        if started < measure_from:
+            continue
+        load.requests += 1
+        load.errors += failed
+        if not failed:
+            load.latencies.append(time.monotonic() - started)
+    if connection is not None:
+        connection[1].close()
+
+async def _drive(port, pool, concurrency, duration, timeout):
+    load = Load()
+    measure_from = time.monotonic() + WARMUP_SECONDS
+    deadline = measure_from + duration
+    await asyncio.gather(*(
+        _connection(port, pool, offset * 97, measure_from, deadline, timeout, load)
+        for offset in range(concurrency)
+    ))
+    latencies = np.array(load.latencies or [0.0]) * 1000
+    p50, p99 = np.percentile(latencies, (50, 99))
+    return {
+        'concurrency': concurrency,
+        'throughput_rps': round(len(load.latencies) / duration, 1),
+        'p50_ms': round(float(p50), 2),
+        'p99_ms': round(float(p99), 2),
+        'error_rate': round(load.errors / load.requests, 4) if load.requests else 1.0
+    }
+
+def capacity(results, slo_ms):
+    """Highest concurrency meeting the latency SLO and the error budget"""
+    passing = [r['concurrency'] for r in results if r['p99_ms'] <= slo_ms and r['error_rate'] < ERROR_BUDGET]
+    return max(passing, default=0)
+
+def run_mode(env, mix, async_routes, args):
+    port, server = start_server(env, args.threads, async_routes)
+    try:
+        pool = request_pool(mix, port)
+        return [asyncio.run(_drive(port, pool, concurrency, args.duration, args.timeout))
+                for concurrency in args.concurrency]
+    finally:
+        server.terminate()
+        server.wait()
+
+def print_results(label, results, slo_ms):
+    print(f'\n{label}')
+    print(f"{'connections':>11s} {'req/s':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'errors':>8s}")
+    for r in results:
+        print(f"{r['concurrency']:11d} {r['throughput_rps']:9.1f} {r['p50_ms']:9.2f} {r['p99_ms']:9.2f} {r['error_rate']:8.2%}")
+    print(f'capacity: {capacity(results, slo_ms)} concurrent connections per worker (p99 <= {slo_ms:g} ms)')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='16,64,256,1024',
+                        type=lambda value: [int(level) for level in value.split(',')])
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per level')
+    parser.add_argument('--threads', type=int, default=16, help='ASGI_WSGI_THREADS of the worker')
+    parser.add_argument('--delay-ms', type=float, default=5, help='round-trip delay added to Postgres and Redis')
+    parser.add_argument('--slo-ms', type=float, default=500, help='p99 latency target defining capacity')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds before a request counts as failed')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    mix = sample_mix(args.seed)
+    database_url, redis_url, proxies = proxied_urls(
+        os.getenv('DATABASE_URL', 'postgresql://localhost/smart_tourism'),
+        os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+        args.delay_ms / 1000)
+    env = dict(os.environ, DATABASE_URL=database_url, REDIS_URL=redis_url)
+
+    try:
+        threaded = run_mode(env, mix, False, args)
+        print_results(f'Thread per request ({args.threads} threads)', threaded, args.slo_ms)
+        asynchronous = run_mode(env, mix, True, args)
+        print_results(f'Async handlers ({args.threads} threads for the other routes)', asynchronous, args.slo_ms)
+    finally:
+        for proxy in proxies:
+            proxy.terminate()
@@ -0,0 +1,72 @@
+"""
+AUTOCOMPLETE MICROBENCHMARK
+Suggestion latency of the prefix indexes at catalog scale
+
+Usage: python -m backend.benchmarks.bench_autocomplete [--entries 100000] [--queries 20000]
+"""
+
+from backend.autocomplete import PrefixIndex, Suggestion, KINDS, HOTEL, suggest_from, normalize
+import argparse
+import random
+import time
+
+SYLLABLES = ['ka', 'ra', 'ma', 'la', 'go', 'del', 'hi', 'pur', 'ban', 'ga', 'lore', 'jai',
+             'sa', 'gar', 'tan', 'va', 'ni', 'sh', 'kot', 'ta', 'am', 'ri', 'tsar', 'ud']
+WORDS = ['Palace', 'Resort', 'Inn', 'Residency', 'Heritage', 'Fort', 'Lake', 'Beach',
+         'Temple', 'Market', 'Suites', 'Grand', 'Royal', 'View', 'Garden']
+
+def make_name(rng):
+    word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f'{word} {rng.choice(WORDS)}' if rng.random() < 0.7 else word
+
+def make_indexes(count, seed=42):
+    """Synthetic catalog split across kinds, with Zipf-like popularity"""
+    rng = random.Random(seed)
+    by_kind = {kind: [] for kind in KINDS}
+    for ident in range(count):
+        kind = HOTEL if rng.random() < 0.6 else rng.choice(KINDS)
+        name = make_name(rng)
+        weight = 1.0 / (1 + rng.paretovariate(1.2))
+        by_kind[kind].append(Suggestion(normalize(name), kind, ident, name, weight, None))
+    return {kind: PrefixIndex(entries) for kind, entries in by_kind.items()}
+
+def run(entries, queries, limit, seed=7):
+    started = time.perf_counter()
+    indexes = make_indexes(entries)
+    build = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    keys = [entry.key for index in indexes.values() for entry in index.entries]
+    # Keystroke-shaped workload: short prefixes dominate
+    prefixes = []
+    for _ in range(queries):
+        key = rng.choice(keys)
+        prefixes.append(key[:min(len(key), rng.choice([1, 1, 2, 2, 3, 3, 4, 5, 6, 8]))])
+
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        suggest_from(indexes, prefix, limit)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    def pct(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+
+    print(f"{entries} entries, {queries} queries, top {limit}")
+    print(f"  build: {build * 1000:8.1f} ms")
+    print(f"  p50:   {pct(0.50):8.3f} ms")
+    print(f"  p99:   {pct(0.99):8.3f} ms")
+    print(f"  max:   {timings[-1] * 1000:8.3f} ms")
+    return pct(0.99)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--target-ms', type=float, default=5.0, help='p99 budget')
+    args = parser.parse_args()
+
+    p99 = run(args.entries, args.queries, args.limit)
+    raise SystemExit(0 if p99 <= args.target_ms else 1)
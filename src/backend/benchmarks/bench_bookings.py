@@ -0,0 +1,280 @@
+"""
+BOOKING CONTENTION BENCHMARK
+Many concurrent clients booking the last rooms of one room type, against the same load spread over many
+
+Usage: python -m backend.benchmarks.bench_bookings [--clients 48] [--rounds 5] [--rooms-left 3]
+                                                  [--nights 3] [--retry-share 0.25] [--start-days 400]
+
+Each round runs two scenarios with --clients threads, one per user. The
+threads wait on a barrier and then POST /api/bookings/ all at once.
+
+  last rooms  Every client books the same stay of one room type, with only
+              --rooms-left rooms still free (the rest are booked through the
+              API first). This is a flash sale: clients queue on the same
+              ledger rows, and all but --rooms-left get 409.
+  spread      Every client books a different room type, so no rows are
+              shared. This is the same load without contention.
+
+A --retry-share of the clients send their request a second time with the
+same Idempotency-Key, as soon as the first returns, as a client would after
+losing a response.
+
+After the run the ledger is checked against the bookings:
+  - no night over total_rooms
+  - per-night ledger counts match the confirmed bookings
+  - no idempotency key holding two bookings
+  - exactly --rooms-left bookings in every last-rooms round
+Any violation exits 1.
+
+Stays start --start-days ahead, past the generated workload's future
+window, and those dates must be free. Everything the benchmark books is
+deleted at the end.
+
+Needs a seeded DATABASE_URL (see bench_endpoints), with max_connections
+above --clients. Each client thread holds its own pooled connection
+(DB_POOL_SIZE is raised to --clients). Requests go through the Flask test
+client, so the numbers cover the application and the database but not
+the network.
+"""
+
+from backend.app import create_app, db, limiter
+from backend.audit import audit_writer
+from backend.models import User
+from datetime import date, timedelta
+from sqlalchemy import text
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import numpy as np
+
+SCENARIOS = ('last rooms', 'spread')
+
+# ============================================================
+# CLIENTS
+# ============================================================
+
+class Outcomes:
+    """Responses of one scenario run, appended to from the client threads"""
+
+    def __init__(self):
+        self.results = []  # (status, replayed, seconds)
+        self.booking_ids = []
+        self.seconds = 0.0
+
+    def count(self, status, replayed=False):
+        return sum(1 for s, r, _ in self.results if s == status and r == replayed)
+
+def _client(app, token, body, retry, barrier, outcomes):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': uuid.uuid4().hex}
+    barrier.wait()
+    for _ in range(2 if retry else 1):
+        started = time.perf_counter()
+        response = client.post('/api/bookings/', json=body, headers=headers)
+        replayed = response.headers.get('Idempotent-Replayed') == 'true'
+        outcomes.results.append((response.status_code, replayed, time.perf_counter() - started))
+        if response.status_code == 201:
+            outcomes.booking_ids.append(response.get_json()['booking']['id'])
+
+def run_clients(app, tokens, bodies, retry_share, rng):
+    """POST one body per client, all released at once; returns Outcomes"""
+    outcomes = Outcomes()
+    barrier = threading.Barrier(len(bodies) + 1)
+    threads = [
+        threading.Thread(target=_client, args=(app, token, body, rng.random() < retry_share, barrier, outcomes))
+        for token, body in zip(tokens, bodies)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    outcomes.seconds = time.perf_counter() - started
+    return outcomes
+
+def _stay(room_type_id, check_in, nights):
+    return {
+        'room_type_id': room_type_id,
+        'check_in': check_in.isoformat(),
+        'check_out': (check_in + timedelta(days=nights)).isoformat(),
+        'guests': 1
+    }
+
+def prebook(app, token, body, count):
+    """Book `count` rooms of a stay one after another; returns their ids"""
+    client = app.test_client()
+    ids = []
+    for _ in range(count):
+        response = client.post('/api/bookings/', json=body,
+                               headers={'Authorization': f'Bearer {token}', 'Idempotency-Key': uuid.uuid4().hex})
+        if response.status_code != 201:
+            raise SystemExit(f'Pre-booking failed with {response.status_code}: {response.get_data(as_text=True)}')
+        ids.append(response.get_json()['booking']['id'])
+    return ids
+
+# ============================================================
+# CHECKS
+# ============================================================
+
+def integrity_violations(room_type_ids, first, last):
+    """Descriptions of overbooked nights, ledger drift and duplicate keys in [first, last)"""
+    params = {'room_types': list(room_type_ids), 'first': first, 'last': last}
+    violations = []
+
+    overbooked = db.session.execute(text(
+        'SELECT i.room_type_id, i.stay_date, i.booked_rooms, r.total_rooms '
+        'FROM room_night_inventory i JOIN room_types r ON r.id = i.room_type_id '
+        'WHERE i.room_type_id = ANY(:room_types) AND i.stay_date >= :first AND i.stay_date < :last '
+        'AND i.booked_rooms > r.total_rooms'), params).all()
+    violations += [f'room type {r[0]} overbooked on {r[1]}: {r[2]} of {r[3]}' for r in overbooked]
+
+    drift = db.session.execute(text(
+        "SELECT coalesce(b.room_type_id, i.room_type_id), coalesce(b.night, i.stay_date), "
+        "coalesce(b.booked, 0), coalesce(i.booked_rooms, 0) "
+        "FROM (SELECT room_type_id, n::date AS night, count(*) AS booked "
+        "      FROM bookings, generate_series(check_in_date, check_out_date - 1, interval '1 day') n "
+        "      WHERE booking_status = 'confirmed' AND room_type_id = ANY(:room_types) "
+        "      AND check_in_date >= :first AND check_in_date < :last GROUP BY 1, 2) b "
+        "FULL JOIN (SELECT room_type_id, stay_date, booked_rooms FROM room_night_inventory "
+        "           WHERE room_type_id = ANY(:room_types) AND stay_date >= :first AND stay_date < :last) i "
+        "ON i.room_type_id = b.room_type_id AND i.stay_date = b.night "
+        "WHERE coalesce(b.booked, 0) <> coalesce(i.booked_rooms, 0)"), params).all()
+    violations += [f'room type {r[0]} on {r[1]}: {r[2]} bookings, ledger says {r[3]}' for r in drift]
+
+    duplicates = db.session.execute(text(
+        'SELECT user_id, idempotency_key, count(*) FROM bookings '
+        'WHERE idempotency_key IS NOT NULL AND room_type_id = ANY(:room_types) '
+        'AND check_in_date >= :first AND check_in_date < :last '
+        'GROUP BY 1, 2 HAVING count(*) > 1'), params).all()
+    violations += [f'user {r[0]} key {r[1]} holds {r[2]} bookings' for r in duplicates]
+    return violations
+
+def window_is_free(room_type_ids, first, last):
+    params = {'room_types': list(room_type_ids), 'first': first, 'last': last}
+    inventory = db.session.execute(text(
+        'SELECT count(*) FROM room_night_inventory WHERE room_type_id = ANY(:room_types) '
+        'AND stay_date >= :first AND stay_date < :last'), params).scalar()
+    bookings = db.session.execute(text(
+        'SELECT count(*) FROM bookings WHERE room_type_id = ANY(:room_types) '
+        'AND check_out_date > :first AND check_in_date < :last'), params).scalar()
+    return not inventory and not bookings
+
+def clean_up(booking_ids, room_type_ids, first, last):
+    # Stopping waits for the batch the writer thread may be holding
+    audit_writer.stop()
+    db.session.execute(text('DELETE FROM bookings WHERE id = ANY(:ids)'), {'ids': booking_ids})
+    db.session.execute(text(
+        "DELETE FROM audit_logs WHERE action_type = 'booking_create' AND entity_id = ANY(:ids)"),
+        {'ids': booking_ids})
+    # The stays were free before the run, so these rows are all ours
+    db.session.execute(text(
+        'DELETE FROM room_night_inventory WHERE room_type_id = ANY(:room_types) '
+        'AND stay_date >= :first AND stay_date < :last'),
+        {'room_types': list(room_type_ids), 'first': first, 'last': last})
+    db.session.commit()
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+def summarize(runs):
+    results = [result for outcomes in runs for result in outcomes.results]
+    latencies = np.array([seconds for _, _, seconds in results] or [0.0]) * 1000
+    p50, p99 = np.percentile(latencies, (50, 99))
+    return {
+        'throughput_rps': round(len(results) / sum(outcomes.seconds for outcomes in runs), 1),
+        'p50_ms': round(float(p50), 2),
+        'p99_ms': round(float(p99), 2),
+        'booked': sum(outcomes.count(201) for outcomes in runs),
+        'replayed': sum(outcomes.count(200, True) for outcomes in runs),
+        'sold_out': sum(outcomes.count(409) for outcomes in runs),
+        'errors': sum(1 for status, _, _ in results if status not in (200, 201, 409))
+    }
+
+def run(args):
+    app = create_app('benchmark')
+    limiter.enabled = False  # every request comes from the same address
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        tokens = [user.generate_token() for user in User.query.order_by(User.id).limit(args.clients + 1)]
+        room_types = db.session.execute(text(
+            'SELECT id, total_rooms FROM room_types WHERE total_rooms >= :rooms ORDER BY id LIMIT :count'),
+            {'rooms': args.rooms_left, 'count': args.clients + 1}).all()
+        if len(tokens) <= args.clients or len(room_types) <= args.clients:
+            raise SystemExit(f'Need {args.clients + 1} users and room types; seed the database first')
+
+        hot, spread = room_types[0], [row.id for row in room_types[1:]]
+        room_type_ids = [row.id for row in room_types]
+        first = date.today() + timedelta(days=args.start_days)
+        last = first + timedelta(days=args.rounds * (args.nights + 1))
+        if not window_is_free(room_type_ids, first, last):
+            raise SystemExit(f'Stays from {first} to {last} are already booked; pick another --start-days')
+        db.session.remove()
+
+    runs = {name: [] for name in SCENARIOS}
+    booking_ids = []
+    try:
+        for round_index in range(args.rounds):
+            check_in = first + timedelta(days=round_index * (args.nights + 1))
+
+            # Leave only --rooms-left rooms of the hot room type, booked like any other
+            hot_stay = _stay(hot.id, check_in, args.nights)
+            booking_ids += prebook(app, tokens[-1], hot_stay, hot.total_rooms - args.rooms_left)
+
+            for name, bodies in (
+                ('last rooms', [hot_stay] * args.clients),
+                ('spread', [_stay(room_type_id, check_in, args.nights) for room_type_id in spread])
+            ):
+                outcomes = run_clients(app, tokens[:args.clients], bodies, args.retry_share, rng)
+                booking_ids += outcomes.booking_ids
+                runs[name].append(outcomes)
+
+        with app.app_context():
+            violations = integrity_violations(room_type_ids, first, last)
+            violations += [
+                f'last-rooms round {index + 1} booked {outcomes.count(201)} of {args.rooms_left} free rooms'
+                for index, outcomes in enumerate(runs['last rooms'])
+                if outcomes.count(201) != min(args.rooms_left, args.clients)
+            ]
+            db.session.remove()
+    finally:
+        with app.app_context():
+            clean_up(booking_ids, room_type_ids, first, last)
+
+    return {name: summarize(scenario_runs) for name, scenario_runs in runs.items()}, violations
+
+def print_results(results, violations, args):
+    print(f'{args.clients} clients, {args.rounds} rounds, {args.nights}-night stays, '
+          f'{args.rooms_left} rooms left, {args.retry_share:.0%} retried')
+    print(f"{'scenario':12s} {'req/s':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'booked':>7s} "
+          f"{'replayed':>9s} {'sold out':>9s} {'errors':>7s}")
+    for name, m in results.items():
+        print(f"{name:12s} {m['throughput_rps']:9.1f} {m['p50_ms']:9.2f} {m['p99_ms']:9.2f} {m['booked']:7d} "
+              f"{m['replayed']:9d} {m['sold_out']:9d} {m['errors']:7d}")
+    for line in violations:
+        print(f'VIOLATION {line}')
+    print(f'{len(violations)} integrity violation(s)' if violations else 'No overbooking, drift or duplicate bookings')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=48, help='concurrent clients (one user each)')
+    parser.add_argument('--rounds', type=int, default=5, help='flash sales, each on a new stay')
+    parser.add_argument('--rooms-left', type=int, default=3, help='free rooms of the hot room type per round')
+    parser.add_argument('--nights', type=int, default=3)
+    parser.add_argument('--retry-share', type=float, default=0.25,
+                        help='share of clients repeating their request with the same Idempotency-Key')
+    parser.add_argument('--start-days', type=int, default=400, help='days ahead of the first stay')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # One pooled connection per client thread (read by create_app)
+    os.environ.setdefault('DB_POOL_SIZE', str(args.clients))
+    results, violations = run(args)
+    print_results(results, violations, args)
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,269 @@
+"""
+ENDPOINT BENCHMARK SUITE
+Throughput, latency percentiles and SQL query counts per API endpoint, checked against a stored baseline
+
+Usage: python -m backend.benchmarks.bench_endpoints [--reseed --scale 10] [--requests 300]
+                                                   [--save-baseline | --baseline PATH] [--threshold 0.2]
+
+Boots create_app against DATABASE_URL, which must be seeded
+(backend.seed_data, then backend.seed_workload). --reseed reseeds it first
+at --scale. Requests go through the Flask test client, so the numbers cover
+the application and the database but not the network.
+
+Parameter mixes follow the generated workload:
+  - Zipf-skewed hotels, popular first.
+  - Lead times from a few days to a few months.
+  - Sorts and filters weighted like real search traffic.
+  - Repeat visitors revalidating the destinations ETag.
+
+--save-baseline stores the run. Later runs fail (exit 1) when an endpoint's
+p50/p95/p99 latency grows, or its throughput drops, by more than --threshold.
+They also fail when its SQL query count grows at all. Baselines are
+per-machine and per-scale, so they are not checked in.
+"""
+
+from backend.app import create_app, db, cache, limiter
+from backend.instrumentation import QueryCounter
+from datetime import date, timedelta
+from sqlalchemy import text
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'endpoints.json')
+
+ZIPF_EXPONENT = 1.1
+WARMUP_REQUESTS = 20
+LOGIN_SHARE = 0.1  # bcrypt-bound; a tenth of the other endpoints' request count
+
+SEARCH_SORTS = (('popularity', 0.5), ('price_low', 0.25), ('rating', 0.15), ('price_high', 0.1))
+SEARCH_AMENITIES = ('wifi', 'pool', 'gym', 'spa', 'parking')
+
+# ============================================================
+# PARAMETER MIXES
+# ============================================================
+
+class Mix:
+    """Request parameters sampled from what the seeded database actually holds"""
+
+    def __init__(self, rng, today):
+        self.rng = rng
+        self.today = today
+        self.destination_ids = [row[0] for row in db.session.execute(
+            text('SELECT id FROM destinations ORDER BY popularity_score DESC, id'))]
+        # Most-booked hotels first, so Zipf ranks follow real demand
+        self.hotel_ids = [row[0] for row in db.session.execute(text(
+            'SELECT h.id FROM hotels h LEFT JOIN bookings b ON b.hotel_id = h.id '
+            'GROUP BY h.id ORDER BY count(b.id) DESC, h.total_bookings DESC, h.id'))]
+        self.user_count = db.session.execute(
+            text("SELECT count(*) FROM users WHERE email LIKE 'user%@example.com'")).scalar()
+        db.session.rollback()
+        if not self.hotel_ids or not self.user_count:
+            raise SystemExit('Seed the database first (or pass --reseed)')
+
+        weights = 1.0 / np.arange(1, len(self.hotel_ids) + 1) ** ZIPF_EXPONENT
+        self._hotel_cdf = np.cumsum(weights) / weights.sum()
+        self._destination_etag = None
+
+    def hotel(self):
+        position = int(np.searchsorted(self._hotel_cdf, self.rng.random()))
+        return self.hotel_ids[min(position, len(self.hotel_ids) - 1)]
+
+    def stay(self):
+        check_in = self.today + timedelta(days=min(int(self.rng.expovariate(1 / 21)) + 1, 180))
+        check_out = check_in + timedelta(days=self.rng.choice((1, 1, 2, 2, 3, 4, 7)))
+        return check_in.isoformat(), check_out.isoformat()
+
+    def search(self):
+        check_in, check_out = self.stay()
+        sorts, weights = zip(*SEARCH_SORTS)
+        body = {
+            'destination_id': self.rng.choice(self.destination_ids[:max(3, len(self.destination_ids) // 2)])
+                if self.rng.random() < 0.7 else self.rng.choice(self.destination_ids),
+            'check_in': check_in,
+            'check_out': check_out,
+            'guests': self.rng.choice((1, 2, 2, 2, 3, 4)),
+            'sort_by': self.rng.choices(sorts, weights)[0],
+            'page': 1 if self.rng.random() < 0.8 else self.rng.randint(2, 4),
+            'per_page': 20
+        }
+        if self.rng.random() < 0.3:
+            body['star_rating'] = self.rng.choice(([3, 4, 5], [4, 5], [5]))
+        if self.rng.random() < 0.2:
+            body['amenities'] = self.rng.sample(SEARCH_AMENITIES, self.rng.randint(1, 2))
+        return 'POST', '/api/hotels/search', {'json': body}
+
+    def availability(self):
+        check_in, check_out = self.stay()
+        return 'POST', f'/api/hotels/{self.hotel()}/availability', \
+            {'json': {'check_in': check_in, 'check_out': check_out}}
+
+    def details(self):
+        return 'GET', f'/api/hotels/{self.hotel()}', {}
+
+    def reviews(self):
+        hotel_id = self.hotel()
+        if self.rng.random() < 0.3:
+            return 'GET', f'/api/hotels/{hotel_id}/reviews?mode=cursor', {}
+        return 'GET', f'/api/hotels/{hotel_id}/reviews?page={1 if self.rng.random() < 0.7 else self.rng.randint(2, 5)}', {}
+
+    def destinations(self):
+        # Returning visitors revalidate the catalog they already hold
+        if self._destination_etag and self.rng.random() < 0.7:
+            return 'GET', '/api/destinations/', {'headers': {'If-None-Match': self._destination_etag}}
+        return 'GET', '/api/destinations/', {}
+
+    def remember(self, name, response):
+        if name == 'get_destinations' and response.headers.get('ETag'):
+            self._destination_etag = response.headers['ETag']
+
+    def login(self):
+        user = self.rng.randrange(self.user_count)
+        return 'POST', '/api/auth/login', {'json': {'email': f'user{user}@example.com', 'password': 'password123'}}
+
+ENDPOINTS = (
+    ('search_hotels', Mix.search, 1.0),
+    ('check_availability', Mix.availability, 1.0),
+    ('get_hotel_details', Mix.details, 1.0),
+    ('get_hotel_reviews', Mix.reviews, 1.0),
+    ('get_destinations', Mix.destinations, 1.0),
+    ('login', Mix.login, LOGIN_SHARE)
+)
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+def measure(client, mix, name, make_request, count):
+    latencies = []
+    queries = []
+    errors = 0
+    for index in range(WARMUP_REQUESTS + count):
+        method, url, options = make_request(mix)
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            response = client.open(url, method=method, **options)
+            elapsed = time.perf_counter() - started
+        mix.remember(name, response)
+        if index < WARMUP_REQUESTS:
+            continue
+        latencies.append(elapsed)
+        queries.append(counter.count)
+        if response.status_code >= 400:
+            errors += 1
+
+    latencies = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / (latencies.sum() / 1000), 1),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_queries': round(float(np.mean(queries)), 2),
+        'max_queries': int(max(queries))
+    }
+
+def run(requests, seed):
+    app = create_app('benchmark')
+    limiter.enabled = False  # every request comes from the same address
+    client = app.test_client()
+    with app.app_context():
+        cache.clear()
+        mix = Mix(random.Random(seed), date.today())
+        db.session.remove()
+
+    # No app context around the requests: each one pushes its own, so g and
+    # the session (identity map included) are torn down after every request
+    results = {}
+    for name, make_request, share in ENDPOINTS:
+        results[name] = measure(client, mix, name, make_request, max(int(requests * share), 10))
+    return results
+
+# ============================================================
+# BASELINE
+# ============================================================
+
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+def compare(current, baseline, threshold):
+    """Human-readable regressions of current against baseline (empty: none)"""
+    regressions = []
+    for name, metrics in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if metrics[metric] > before[metric] * (1 + threshold):
+                regressions.append(f'{name}: {metric} {before[metric]} -> {metrics[metric]}')
+        if metrics['throughput_rps'] < before['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {metrics['throughput_rps']} req/s")
+        if metrics['max_queries'] > before['max_queries']:
+            regressions.append(f"{name}: max queries {before['max_queries']} -> {metrics['max_queries']}")
+        if metrics['errors'] > before['errors']:
+            regressions.append(f"{name}: errors {before['errors']} -> {metrics['errors']}")
+    return regressions
+
+def print_results(results, baseline=None):
+    print(f"{'endpoint':20s} {'req/s':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'queries':>8s} {'errors':>7s}")
+    for name, m in results.items():
+        print(f"{name:20s} {m['throughput_rps']:9.1f} {m['p50_ms']:9.2f} {m['p95_ms']:9.2f} "
+              f"{m['p99_ms']:9.2f} {m['mean_queries']:8.2f} {m['errors']:7d}")
+        before = (baseline or {}).get(name)
+        if before:
+            print(f"{'  baseline':20s} {before['throughput_rps']:9.1f} {before['p50_ms']:9.2f} {before['p95_ms']:9.2f} "
+                  f"{before['p99_ms']:9.2f} {before['mean_queries']:8.2f} {before['errors']:7d}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='dataset scale (recorded with the results)')
+    parser.add_argument('--reseed', action='store_true', help='reseed catalog and workload at --scale first')
+    parser.add_argument('--requests', type=int, default=300, help='measured requests per endpoint')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative latency growth / throughput drop (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    if args.reseed:
+        from backend.seed_data import seed_database
+        from backend.seed_workload import seed_workload
+        seed_database(scale=args.scale, seed=args.seed)
+        seed_workload(scale=args.scale, seed=args.seed)
+
+    results = run(args.requests, args.seed)
+    meta = {'scale': args.scale, 'requests': args.requests, 'python': platform.python_version(),
+            'machine': platform.node(), 'recorded_at': date.today().isoformat()}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': meta, 'endpoints': results}, f, indent=2, sort_keys=True)
+        print_results(results)
+        print(f'Baseline saved to {args.baseline}')
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print_results(results)
+        print(f'No baseline at {args.baseline}; run with --save-baseline to record one')
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        stored = json.load(f)
+    print_results(results, stored['endpoints'])
+    if stored['meta'].get('scale') != args.scale:
+        print(f"Baseline was recorded at scale {stored['meta'].get('scale')}, this run is scale {args.scale}")
+        sys.exit(2)
+
+    regressions = compare(results, stored['endpoints'], args.threshold)
+    for line in regressions:
+        print(f'REGRESSION {line}')
+    print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%}' if regressions else 'No regressions')
+    sys.exit(1 if regressions else 0)
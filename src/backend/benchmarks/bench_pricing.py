@@ -0,0 +1,56 @@
+"""
+PRICING MICROBENCHMARK
+Scalar calculate_dynamic_price vs. the batch StayPricing engine
+
+Usage: python -m backend.benchmarks.bench_pricing [--rooms 400] [--nights 21]
+"""
+
+from backend.pricing import calculate_dynamic_price, StayPricing
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import argparse
+import random
+import timeit
+
+def make_rooms(count, seed=42):
+    """Room stand-ins shaped like the seeded RoomType rows"""
+    rng = random.Random(seed)
+    return [SimpleNamespace(
+        base_price=float(rng.randint(800, 8000) + rng.randint(-500, 2000)),
+        weekend_multiplier=rng.choice([1.1, 1.2, 1.25]),
+        peak_season_multiplier=rng.choice([1.3, 1.5, 1.75])
+    ) for _ in range(count)]
+
+def run(rooms_count, nights, lead_days, repeat):
+    rooms = make_rooms(rooms_count)
+    check_in = datetime.now().date() + timedelta(days=lead_days)
+    check_out = check_in + timedelta(days=nights)
+
+    scalar = [calculate_dynamic_price(room, check_in, check_out) for room in rooms]
+    batch = StayPricing(check_in, check_out).price(rooms)
+    mismatches = sum(1 for a, b in zip(scalar, batch) if a != b)
+
+    scalar_time = min(timeit.repeat(
+        lambda: [calculate_dynamic_price(room, check_in, check_out) for room in rooms],
+        number=1, repeat=repeat))
+    batch_time = min(timeit.repeat(
+        lambda: StayPricing(check_in, check_out).price(rooms),
+        number=1, repeat=repeat))
+
+    print(f"{rooms_count} rooms x {nights} nights (check-in in {lead_days} days)")
+    print(f"  scalar: {scalar_time * 1000:8.3f} ms")
+    print(f"  batch:  {batch_time * 1000:8.3f} ms  ({scalar_time / batch_time:.1f}x)")
+    print(f"  mismatches: {mismatches}")
+    return mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=400, help='room types per search page')
+    parser.add_argument('--nights', type=int, default=21, help='length of stay')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    failed = 0
+    for lead_days in (3, 30, 90):  # last-minute, standard and early-bird windows
+        failed += run(args.rooms, args.nights, lead_days, args.repeat)
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,60 @@
+"""
+SERIALIZATION MICROBENCHMARK
+Stdlib json (what jsonify uses) vs. the serialization layer's encoder on a search-sized payload
+
+Usage: python -m backend.benchmarks.bench_serialization [--hotels 50] [--rooms 4]
+"""
+
+from backend.serialization import dumps, project
+from backend.schemas import HOTEL_SEARCH, ROOM_OFFER
+from types import SimpleNamespace
+from datetime import datetime
+import argparse
+import json
+import random
+import timeit
+
+def make_payload(hotels, rooms, seed=42):
+    """Search response shaped like /api/hotels/search output"""
+    rng = random.Random(seed)
+    results = []
+    for hotel_id in range(hotels):
+        offers = [ROOM_OFFER.dump(
+            SimpleNamespace(id=hotel_id * 10 + n, name=f'Room {n}', max_occupancy=rng.randint(1, 4),
+                            amenities={'ac': True, 'tv': rng.random() < 0.5, 'minibar': False}),
+            price_per_night=round(rng.uniform(800, 9000), 2),
+            total_price=round(rng.uniform(2400, 27000), 2)
+        ) for n in range(rooms)]
+        hotel = SimpleNamespace(
+            id=hotel_id, name=f'Hotel {hotel_id}', brand=rng.choice(['Taj', 'ITC', None]),
+            property_type='hotel', star_rating=rng.randint(2, 5), overall_rating=round(rng.uniform(3, 5), 1),
+            total_reviews=rng.randint(0, 2000), address='MG Road', zone='City Center',
+            images=[f'https://img.example/{hotel_id}/{n}.jpg' for n in range(3)],
+            amenities={name: rng.random() < 0.5 for name in ('wifi', 'pool', 'gym', 'spa', 'parking')},
+            safety_rating=4.5, hygiene_rating=4.4
+        )
+        results.append(HOTEL_SEARCH.dump(hotel, available_rooms=offers,
+                                         min_price_per_night=min(o['price_per_night'] for o in offers)))
+    return {'hotels': results, 'pagination': {'page': 1, 'per_page': hotels, 'total': hotels},
+            'generated_at': datetime(2025, 1, 1, 12, 0)}
+
+def stdlib(payload):
+    return json.dumps(payload, default=str, sort_keys=True).encode('utf-8')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hotels', type=int, default=50)
+    parser.add_argument('--rooms', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    payload = make_payload(args.hotels, args.rooms)
+    sparse = {**payload, 'hotels': project(payload['hotels'], ('id', 'name', 'min_price_per_night'))}
+
+    cases = [('stdlib json', stdlib, payload), ('dumps', dumps, payload), ('dumps, ?fields=3', dumps, sparse)]
+    baseline = None
+    print(f"{args.hotels} hotels x {args.rooms} rooms")
+    for label, encode, body in cases:
+        elapsed = min(timeit.repeat(lambda: encode(body), number=10, repeat=args.repeat)) / 10
+        baseline = baseline or elapsed
+        print(f"  {label:18s} {elapsed * 1000:8.3f} ms  {len(encode(body)):7d} bytes  ({baseline / elapsed:.1f}x)")
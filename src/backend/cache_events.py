@@ -0,0 +1,37 @@
+"""
+CACHE INVALIDATION EVENTS
+Defers cache invalidations raised during a flush until the transaction commits
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PENDING = '_cache_invalidations'
+
+def on_commit(target, key, callback):
+    """
+    Run callback() once after the session owning `target` commits.
+    Callbacks are deduplicated by key and dropped on rollback, so readers
+    never see an entry invalidated for a write that did not happen.
+    """
+    session = target if isinstance(target, Session) else object_session(target)
+    if session is None:
+        callback()
+        return
+    session.info.setdefault(_PENDING, {})[key] = callback
+
+@event.listens_for(Session, 'after_commit')
+def _run_pending(session):
+    for key, callback in session.info.pop(_PENDING, {}).items():
+        try:
+            callback()
+        except Exception:
+            # A cache outage must never fail a committed write
+            logger.exception('Cache invalidation %s failed', key)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,79 @@
+"""
+DESTINATION CATALOG
+Versioned, pre-serialized and pre-compressed catalog bodies for conditional GETs
+"""
+
+from backend.app import db, cache
+from backend.models import Destination
+from backend.cache_events import on_commit
+from backend.db_routing import primary_reads
+from backend.schemas import DESTINATION_CATALOG
+from backend.serialization import dumps
+from backend.tiered_cache import remember
+from sqlalchemy import event, select
+import gzip
+import uuid
+
+VERSION_KEY = 'catalog:destinations:version'
+BODY_KEY = 'catalog:destinations:{}'
+
+# Bodies are keyed by version, so the TTL only bounds memory for dead versions
+BODY_TIMEOUT = 24 * 3600
+
+CATALOG_COLUMNS = (
+    Destination.id, Destination.name, Destination.state, Destination.category,
+    Destination.popularity_score, Destination.hero_image, Destination.description
+)
+
+# ============================================================
+# VERSION
+# ============================================================
+
+def catalog_version():
+    """Current catalog version token, created on first use"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex[:12], timeout=0)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def bump_catalog_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex[:12], timeout=0)
+
+def catalog_etag(version, encoding=None):
+    """
+    Strong ETag for one version in one content-coding; the gzip and identity
+    bodies differ byte-wise, so they must not share a strong validator
+    """
+    return f'dest-{version}-gzip' if encoding == 'gzip' else f'dest-{version}'
+
+@event.listens_for(Destination, 'after_insert')
+@event.listens_for(Destination, 'after_update')
+@event.listens_for(Destination, 'after_delete')
+def _destination_changed(mapper, connection, destination):
+    on_commit(destination, VERSION_KEY, bump_catalog_version)
+
+# ============================================================
+# BODIES
+# ============================================================
+
+def catalog_query():
+    return select(*CATALOG_COLUMNS).order_by(Destination.id)
+
+def catalog_payload(rows):
+    """{'identity': bytes, 'gzip': bytes} bodies for the catalog rows"""
+    identity = dumps({'destinations': DESTINATION_CATALOG.dump_many(rows)})
+    return {'identity': identity, 'gzip': gzip.compress(identity, compresslevel=9, mtime=0)}
+
+def catalog_bodies(version):
+    """
+    {'identity': bytes, 'gzip': bytes} for a version, built once per version.
+    A body built while a write commits may be newer than its version, never older:
+    the version is read before the query runs.
+    """
+    def build():
+        with primary_reads():
+            return catalog_payload(db.session.execute(catalog_query()).all())
+
+    # One worker builds a new version's bodies; the others wait for them
+    return remember(cache, BODY_KEY.format(version), build, timeout=BODY_TIMEOUT)
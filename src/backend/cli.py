@@ -0,0 +1,42 @@
+"""
+CLI COMMANDS
+Maintenance jobs exposed through `flask <command>`
+"""
+
+import click
+
+def register_commands(app):
+    """Attach maintenance commands to the app's CLI"""
+
+    @app.cli.command('rebuild-inventory')
+    def rebuild_inventory_command():
+        """Rebuild the room-night inventory ledger from confirmed bookings"""
+        from backend.inventory import rebuild_inventory
+        rebuild_inventory()
+        click.echo('Room-night inventory rebuilt')
+
+    @app.cli.command('backfill-amenity-masks')
+    def backfill_amenity_masks_command():
+        """Recompute Hotel.amenity_mask from the amenities JSON"""
+        from backend.amenities import backfill_amenity_masks
+        click.echo(f'Updated {backfill_amenity_masks()} amenity masks')
+
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings_command():
+        """Rebuild hotel rating aggregates and hotel ratings from reviews"""
+        from backend.ratings import rebuild_rating_aggregates
+        changed = rebuild_rating_aggregates()
+        click.echo(f'Rating aggregates rebuilt ({changed} hotel ratings changed)')
+
+    @app.cli.command('warm-cache')
+    @click.option('--hotels', type=int, default=None, help='Most-booked hotels to load (default WARMUP_HOTELS)')
+    @click.option('--destinations', type=int, default=None,
+                  help='Destinations whose first search pages to load (default WARMUP_DESTINATIONS)')
+    @click.option('--budget', type=float, default=None, help='Seconds before stopping (default WARMUP_BUDGET)')
+    def warm_cache_command(hotels, destinations, budget):
+        """Load the catalog, top hotel details and top search pages into the cache"""
+        from backend.warmup import cache_warmup
+        report = cache_warmup.run(hotels=hotels, destinations=destinations, budget=budget)
+        warmed = report['warmed']
+        click.echo(f"Warmed the catalog, {warmed['hotels']} hotels and {warmed['searches']} search pages "
+                   f"in {report['seconds']}s ({report['failed']} failed)")
@@ -0,0 +1,204 @@
+"""
+READ REPLICA ROUTING
+Session that sends read-only requests to the replica bind, with read-your-writes stickiness
+
+Reads go to the 'replica' bind (DATABASE_REPLICA_URL) when all of these hold:
+  - The request is a GET/HEAD, or its blueprint is in DATABASE_REPLICA_BLUEPRINTS.
+  - The session has not written yet in this request.
+  - The caller has not written within the last DATABASE_REPLICA_STICKY seconds.
+Everything else uses the primary: flushes, DML, SELECT ... FOR UPDATE,
+textual SQL that is not a SELECT, CLI commands and background threads.
+
+Reads whose rows are cached (fragments, catalog bodies, principals, search
+pages, in-process indexes) run under primary_reads() or read_from_primary().
+A fill from a lagging replica could land after the write's invalidation and
+serve pre-write data until the entry expires.
+
+Callers are identified by the user id in their bearer token and, for
+anonymous writes like login, by client address. Pins are stored in the
+shared cache, so a write on one worker pins reads on every worker.
+"""
+
+from flask import g, jsonify, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
+from contextlib import contextmanager
+import jwt
+import os
+import threading
+import time
+
+REPLICA = 'replica'
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+_WROTE = '_routing_wrote'
+
+# WSGI environ key carrying a routing decision made before the request was dispatched
+ROUTING_ENVIRON_KEY = 'backend.db_replica'
+
+# ============================================================
+# STATS
+# ============================================================
+
+class RoutingStats:
+    """Process-local routing counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.replica_requests = 0
+        self.primary_requests = 0
+        self.pinned_requests = 0
+        self.pins = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'replica_requests': self.replica_requests,
+                'primary_requests': self.primary_requests,
+                'pinned_requests': self.pinned_requests,
+                'pins': self.pins
+            }
+
+stats = RoutingStats()
+
+# ============================================================
+# SESSION
+# ============================================================
+
+def _is_read(clause):
+    if clause is None:
+        # session.connection() without a statement: whatever comes next may write
+        return False
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].lower() == 'select'
+    if getattr(clause, 'is_dml', False):
+        return False
+    return getattr(clause, '_for_update_arg', None) is None
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session whose reads go to the replica engine while the
+    current request allows it. The first write moves the rest of the
+    request to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or not _is_read(clause):
+                self.info[_WROTE] = True
+                g.db_replica = False
+            elif g.get('db_replica'):
+                return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def read_from_primary():
+    """Send the rest of this request's reads to the primary"""
+    if has_request_context():
+        g.db_replica = False
+
+@contextmanager
+def primary_reads():
+    """Send reads inside the block to the primary; for reads that fill a cache"""
+    if not has_request_context():
+        yield
+        return
+    replica = g.get('db_replica')
+    g.db_replica = False
+    try:
+        yield
+    finally:
+        g.db_replica = replica
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop(_WROTE, False) and has_request_context():
+        g.db_wrote = True
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop(_WROTE, None)
+
+# ============================================================
+# STICKINESS
+# ============================================================
+
+def pin_keys(authorization, remote_addr):
+    """Cache keys identifying a caller: token subject (if any) and address"""
+    keys = []
+    if authorization:
+        token = authorization[7:] if authorization.startswith('Bearer ') else authorization
+        try:
+            data = jwt.decode(token, os.getenv('JWT_SECRET_KEY', 'secret'), algorithms=['HS256'])
+            keys.append(f"db-pin:user:{data['user_id']}")
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+    keys.append(f'db-pin:addr:{remote_addr}')
+    return keys
+
+def is_pinned(values):
+    """Whether any of the cached pin deadlines for a caller is still ahead"""
+    # Pins hold their own deadline: a cache may keep an entry past its timeout
+    now = time.time()
+    return any(until is not None and until > now for until in values)
+
+def reads_from_replica(method, blueprint, blueprints):
+    return method in READ_METHODS or blueprint in blueprints
+
+def _request_pin_keys():
+    return pin_keys(request.headers.get('Authorization'), request.remote_addr)
+
+# ============================================================
+# REGISTRATION
+# ============================================================
+
+def replica_configured(app):
+    return REPLICA in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+def register_replica_routing(app, cache):
+    """Route eligible requests to the replica; no-op without a replica bind"""
+    if not replica_configured(app):
+        return
+
+    blueprints = frozenset(name for name in app.config['DATABASE_REPLICA_BLUEPRINTS'] if name)
+    sticky = app.config['DATABASE_REPLICA_STICKY']
+
+    @app.before_request
+    def _choose_bind():
+        # g outlives the request when an app context was pushed around it
+        g.db_replica = g.db_wrote = False
+        # The ASGI entry point looks pins up without blocking and leaves its decision here
+        decided = request.environ.get(ROUTING_ENVIRON_KEY)
+        if decided is not None:
+            g.db_replica = decided
+            stats.incr('replica_requests' if decided else 'pinned_requests')
+            return
+        if not reads_from_replica(request.method, request.blueprint, blueprints):
+            stats.incr('primary_requests')
+            return
+        if sticky and is_pinned(cache.get_many(*_request_pin_keys())):
+            stats.incr('pinned_requests')
+            return
+        g.db_replica = True
+        stats.incr('replica_requests')
+
+    @app.after_request
+    def _pin_writer(response):
+        if sticky and g.get('db_wrote'):
+            until = time.time() + sticky
+            for key in _request_pin_keys():
+                cache.set(key, until, timeout=sticky)
+            stats.incr('pins')
+        return response
+
+    from backend.routes.auth import admin_required
+
+    @app.route('/api/db/routing')
+    @admin_required
+    def replica_routing_stats():
+        return jsonify(stats.snapshot())
@@ -0,0 +1,170 @@
+"""
+GEOSPATIAL INDEX
+In-process KD-trees for nearest / within-radius hotel queries
+"""
+
+from backend.app import db, cache
+from backend.models import Hotel
+from backend.cache_events import on_commit
+from backend.db_routing import primary_reads
+from sqlalchemy import event, inspect
+from scipy.spatial import cKDTree
+import numpy as np
+import threading
+import time
+import uuid
+
+EARTH_RADIUS_KM = 6371.0088
+
+# ============================================================
+# GEOMETRY
+# ============================================================
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; accepts scalars or NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _unit_vectors(latitudes, longitudes):
+    """Points on the unit sphere; chord distance orders points like great-circle distance"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+def _chord_for_km(radius_km):
+    return 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+
+# ============================================================
+# KD-TREE INDEX
+# ============================================================
+
+class GeoIndex:
+    """Immutable KD-tree over (id, latitude, longitude) points"""
+
+    def __init__(self, ids, latitudes, longitudes):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.tree = cKDTree(_unit_vectors(self.latitudes, self.longitudes)) if len(self.ids) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _with_distances(self, positions, latitude, longitude):
+        positions = np.asarray(positions, dtype=np.int64)
+        distances = haversine_km(latitude, longitude, self.latitudes[positions], self.longitudes[positions])
+        order = np.argsort(distances, kind='stable')
+        return [(int(self.ids[p]), float(d)) for p, d in zip(positions[order], distances[order])]
+
+    def nearest(self, latitude, longitude, k):
+        """k closest points as [(id, distance_km)], nearest first"""
+        if self.tree is None or k <= 0:
+            return []
+        k = min(k, len(self.ids))
+        _, positions = self.tree.query(_unit_vectors([latitude], [longitude])[0], k=k)
+        return self._with_distances(np.atleast_1d(positions), latitude, longitude)
+
+    def within(self, latitude, longitude, radius_km, limit=None):
+        """Points within radius_km as [(id, distance_km)], nearest first"""
+        if self.tree is None:
+            return []
+        positions = self.tree.query_ball_point(
+            _unit_vectors([latitude], [longitude])[0], _chord_for_km(radius_km)
+        )
+        results = [
+            (point_id, distance)
+            for point_id, distance in self._with_distances(positions, latitude, longitude)
+            if distance <= radius_km
+        ]
+        return results[:limit] if limit else results
+
+class HotelGeoRegistry:
+    """
+    Per-destination hotel KD-trees plus one global tree, built lazily.
+    A shared version token (bumped on hotel location writes) tells every
+    worker when to drop its trees; workers read it at most once per
+    CHECK_INTERVAL. Trees are built outside the lock and swapped in, so a
+    rebuild never holds up lookups on the trees that are already built.
+    """
+
+    VERSION_KEY = 'geo:hotels:version'
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+        self._indexes = {}
+
+    def _current_version(self):
+        version = cache.get(self.VERSION_KEY)
+        if version is None:
+            cache.add(self.VERSION_KEY, uuid.uuid4().hex[:12], timeout=0)
+            version = cache.get(self.VERSION_KEY)
+        return version
+
+    def _check_version(self):
+        if time.monotonic() < self._next_check:
+            return
+        version = self._current_version()
+        with self._lock:
+            if version != self._version:
+                self._indexes = {}
+                self._version = version
+            self._next_check = time.monotonic() + self.CHECK_INTERVAL
+
+    def _build(self, destination_id):
+        query = db.session.query(Hotel.id, Hotel.latitude, Hotel.longitude)
+        if destination_id is not None:
+            query = query.filter(Hotel.destination_id == destination_id)
+        with primary_reads():
+            rows = query.all()
+        return GeoIndex(
+            [row.id for row in rows],
+            [row.latitude for row in rows],
+            [row.longitude for row in rows]
+        )
+
+    def get(self, destination_id=None):
+        self._check_version()
+        with self._lock:
+            version = self._version
+            index = self._indexes.get(destination_id)
+        if index is not None:
+            return index
+
+        index = self._build(destination_id)
+        with self._lock:
+            # Trees dropped during the build may predate the write that
+            # dropped them: answer this lookup but do not keep the tree
+            if self._version == version:
+                index = self._indexes.setdefault(destination_id, index)
+        return index
+
+    def invalidate(self):
+        cache.set(self.VERSION_KEY, uuid.uuid4().hex[:12], timeout=0)
+        # The writing worker sees its own change on its next lookup
+        self._next_check = 0.0
+
+hotel_geo_index = HotelGeoRegistry()
+
+# ============================================================
+# WRITE EVENTS
+# ============================================================
+
+def _location_changed(hotel):
+    state = inspect(hotel)
+    return any(state.attrs[key].history.has_changes()
+               for key in ('latitude', 'longitude', 'destination_id'))
+
+@event.listens_for(Hotel, 'after_insert')
+@event.listens_for(Hotel, 'after_delete')
+def _hotel_added_or_removed(mapper, connection, hotel):
+    on_commit(hotel, 'geo:hotels', hotel_geo_index.invalidate)
+
+@event.listens_for(Hotel, 'after_update')
+def _hotel_moved(mapper, connection, hotel):
+    if _location_changed(hotel):
+        on_commit(hotel, 'geo:hotels', hotel_geo_index.invalidate)
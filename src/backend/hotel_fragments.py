@@ -0,0 +1,215 @@
+"""
+HOTEL DETAIL FRAGMENTS
+Hotel info, room list and latest reviews cached separately, each dropped by its own writes
+
+Every (hotel, fragment) has a generation, and entries are keyed by it, as
+search_cache does per destination. Writes start a new generation instead of
+deleting the entry, so a fill that read the rows before the commit lands
+under the old generation, where no lookup reads it. Generations expire
+with their entries: a missing generation just means a rebuild, and probing
+unknown hotel ids leaves no keys behind for longer than FRAGMENT_TIMEOUT.
+"""
+
+from backend.app import db, cache
+from backend.models import Hotel, RoomType, Review, Destination, User
+from backend.cache_events import on_commit
+from backend.db_routing import primary_reads
+from backend.schemas import HOTEL, ROOM_TYPE, REVIEW_SUMMARY
+from sqlalchemy import event, select, inspect
+import uuid
+
+# Upper bound on entry (and generation) lifetime; writes start a new generation long before this
+FRAGMENT_TIMEOUT = 3600
+
+LATEST_REVIEWS = 10
+
+INFO = 'info'
+ROOMS = 'rooms'
+REVIEWS = 'reviews'
+FRAGMENTS = (INFO, ROOMS, REVIEWS)
+
+HOTEL_INFO_COLUMNS = (
+    Hotel.id, Hotel.name, Hotel.brand, Hotel.property_type, Hotel.star_rating,
+    Hotel.address, Hotel.zone, Hotel.latitude, Hotel.longitude,
+    Hotel.overall_rating, Hotel.total_reviews, Hotel.safety_rating,
+    Hotel.hygiene_rating, Hotel.sustainability_score, Hotel.amenities,
+    Hotel.images, Hotel.videos, Hotel.virtual_tour_url, Hotel.check_in_time,
+    Hotel.check_out_time, Hotel.cancellation_policy, Hotel.allows_pets,
+    Hotel.is_verified
+)
+
+ROOM_COLUMNS = (
+    RoomType.id, RoomType.name, RoomType.description, RoomType.max_occupancy,
+    RoomType.bed_type, RoomType.room_size_sqft, RoomType.base_price,
+    RoomType.amenities, RoomType.images, RoomType.total_rooms
+)
+
+# Review listings read only the author's name, never the whole User row
+REVIEW_COLUMNS = (
+    Review.id, User.full_name.label('user_name'), Review.overall_rating,
+    Review.review_title, Review.review_text, Review.cleanliness_rating,
+    Review.service_rating, Review.location_rating, Review.value_for_money_rating,
+    Review.images, Review.created_at, Review.is_verified_stay,
+    Review.helpfulness_score
+)
+
+def with_review_authors(query):
+    """Restrict a Review query to REVIEW_COLUMNS, joining the author name"""
+    return query.join(User, User.id == Review.user_id).with_entities(*REVIEW_COLUMNS)
+
+# ============================================================
+# BUILDERS
+# ============================================================
+
+# Each fragment is one statement plus a function shaping its rows, so the
+# async entry point (backend/asgi.py) builds the same payloads
+
+def _info_query(hotel_id):
+    return select(*HOTEL_INFO_COLUMNS, Destination.id.label('destination_id'),
+                  Destination.name.label('destination_name'))\
+        .outerjoin(Destination, Destination.id == Hotel.destination_id)\
+        .where(Hotel.id == hotel_id)\
+        .limit(1)
+
+def _info_payload(rows):
+    if not rows:
+        return None
+    row = rows[0]
+
+    info = HOTEL.dump(row)
+    info['destination'] = {
+        'id': row.destination_id,
+        'name': row.destination_name
+    } if row.destination_id is not None else None
+    return info
+
+def _rooms_query(hotel_id):
+    return select(*ROOM_COLUMNS)\
+        .where(RoomType.hotel_id == hotel_id)\
+        .order_by(RoomType.id)
+
+def review_listing(hotel_id):
+    """All of a hotel's reviews as REVIEW_COLUMNS rows, unordered"""
+    return select(*REVIEW_COLUMNS)\
+        .join(User, User.id == Review.user_id)\
+        .where(Review.hotel_id == hotel_id)
+
+def _reviews_query(hotel_id):
+    return review_listing(hotel_id)\
+        .order_by(Review.created_at.desc(), Review.id.desc())\
+        .limit(LATEST_REVIEWS)
+
+FRAGMENT_BUILDERS = {
+    INFO: (_info_query, _info_payload),
+    ROOMS: (_rooms_query, ROOM_TYPE.dump_many),
+    REVIEWS: (_reviews_query, REVIEW_SUMMARY.dump_many)
+}
+
+def build_fragment(name, hotel_id):
+    query, payload = FRAGMENT_BUILDERS[name]
+    # Cached: built from the primary, never a lagging replica
+    with primary_reads():
+        return payload(db.session.execute(query(hotel_id)).all())
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+def generation_key(hotel_id, name):
+    return f'hotel:gen:{hotel_id}:{name}'
+
+def fragment_key(hotel_id, name, generation):
+    return f'hotel:{hotel_id}:{name}:{generation}'
+
+def new_generation():
+    return uuid.uuid4().hex[:12]
+
+def fragment_generations(hotel_id):
+    """{fragment name: current generation} for a hotel, created on first use"""
+    keys = [generation_key(hotel_id, name) for name in FRAGMENTS]
+    generations = dict(zip(FRAGMENTS, cache.get_many(*keys)))
+    for name, key in zip(FRAGMENTS, keys):
+        if generations[name] is None:
+            cache.add(key, new_generation(), timeout=FRAGMENT_TIMEOUT)
+            generations[name] = cache.get(key)
+    return generations
+
+def hotel_fragments(hotel_id):
+    """
+    {fragment name: payload} for a hotel, building and caching only the
+    fragments that are missing. Returns None when the hotel does not exist.
+    Generations are read before any fragment is built.
+    """
+    generations = fragment_generations(hotel_id)
+    keys = [fragment_key(hotel_id, name, generations[name]) for name in FRAGMENTS]
+    fragments = dict(zip(FRAGMENTS, cache.get_many(*keys)))
+
+    for name, key in zip(FRAGMENTS, keys):
+        if fragments[name] is None:
+            fragments[name] = build_fragment(name, hotel_id)
+            if fragments[name] is None:
+                return None
+            cache.set(key, fragments[name], timeout=FRAGMENT_TIMEOUT)
+    return fragments
+
+# ============================================================
+# WRITE EVENTS
+# ============================================================
+
+def invalidate_fragments(hotel_id, *names):
+    """Start new generations for the named fragments of a hotel"""
+    cache.set_many({generation_key(hotel_id, name): new_generation() for name in names}, timeout=FRAGMENT_TIMEOUT)
+
+def invalidate_fragment_on_commit(target, hotel_id, *names):
+    """Invalidate the named fragments of a hotel once target's transaction commits"""
+    if hotel_id is None:
+        return
+    for name in names:
+        key = generation_key(hotel_id, name)
+        on_commit(target, key, lambda name=name: invalidate_fragments(hotel_id, name))
+
+def _old_value(target, key):
+    history = inspect(target).attrs[key].history
+    return history.deleted[0] if history.deleted else None
+
+@event.listens_for(Hotel, 'after_update')
+def _hotel_changed(mapper, connection, hotel):
+    invalidate_fragment_on_commit(hotel, hotel.id, INFO)
+
+@event.listens_for(Hotel, 'after_delete')
+def _hotel_removed(mapper, connection, hotel):
+    invalidate_fragment_on_commit(hotel, hotel.id, *FRAGMENTS)
+
+@event.listens_for(RoomType, 'after_insert')
+@event.listens_for(RoomType, 'after_update')
+@event.listens_for(RoomType, 'after_delete')
+def _room_type_changed(mapper, connection, room_type):
+    invalidate_fragment_on_commit(room_type, room_type.hotel_id, ROOMS)
+    invalidate_fragment_on_commit(room_type, _old_value(room_type, 'hotel_id'), ROOMS)
+
+@event.listens_for(Review, 'after_insert')
+@event.listens_for(Review, 'after_update')
+@event.listens_for(Review, 'after_delete')
+def _review_changed(mapper, connection, review):
+    invalidate_fragment_on_commit(review, review.hotel_id, REVIEWS)
+    invalidate_fragment_on_commit(review, _old_value(review, 'hotel_id'), REVIEWS)
+
+@event.listens_for(Destination, 'after_update')
+def _destination_renamed(mapper, connection, destination):
+    if not inspect(destination).attrs.name.history.has_changes():
+        return
+    hotel_ids = connection.execute(
+        select(Hotel.id).where(Hotel.destination_id == destination.id)
+    ).scalars()
+    for hotel_id in hotel_ids:
+        invalidate_fragment_on_commit(destination, hotel_id, INFO)
+
+@event.listens_for(User, 'after_update')
+def _author_renamed(mapper, connection, user):
+    if not inspect(user).attrs.full_name.history.has_changes():
+        return
+    hotel_ids = connection.execute(
+        select(Review.hotel_id).where(Review.user_id == user.id).distinct()
+    ).scalars()
+    for hotel_id in hotel_ids:
+        invalidate_fragment_on_commit(user, hotel_id, REVIEWS)
@@ -0,0 +1,300 @@
+"""
+QUERY INSTRUMENTATION
+SQL query counting, per-view query budgets and sampled per-route metrics in Prometheus format
+"""
+
+from flask import current_app, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextvars import ContextVar
+from functools import partial, wraps
+import bisect
+import random
+import threading
+import time
+
+_local = threading.local()
+
+# The sampled request in flight: per thread under WSGI, per task under ASGI
+_sample = ContextVar('request_sample', default=None)
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view issues more SQL statements than its budget allows"""
+
+class QueryCounter:
+    """
+    Counts SQL statements executed on the current thread while active.
+
+        with QueryCounter() as counter:
+            ...
+        counter.count
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __enter__(self):
+        if not hasattr(_local, 'counters'):
+            _local.counters = []
+        _local.counters.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.counters.remove(self)
+        return False
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', ()):
+        counter.count += 1
+        counter.statements.append(statement)
+    sample = _sample.get()
+    if sample is not None:
+        sample.queries += 1
+        conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    sample = _sample.get()
+    started = conn.info.pop('query_started', None)
+    if sample is not None and started is not None:
+        sample.db_seconds += time.perf_counter() - started
+
+def _check_budget(name, counter, max_queries):
+    if counter.count > max_queries:
+        raise QueryBudgetExceeded(
+            f'{name} issued {counter.count} queries (budget {max_queries}):\n'
+            + '\n'.join(counter.statements)
+        )
+
+_DONE = object()
+
+def _budgeted_stream(chunks, counter, check):
+    """
+    A streamed body that keeps counting while it is produced. The counter is
+    entered per chunk: the ASGI entry point pulls chunks on pool threads.
+    """
+    iterator = iter(chunks)
+    try:
+        while True:
+            with counter:
+                chunk = next(iterator, _DONE)
+            if chunk is _DONE:
+                break
+            yield chunk
+        check()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def query_budget(max_queries):
+    """
+    Decorator asserting a view stays within max_queries SQL statements,
+    including those a streamed response issues while it is sent.
+    Only enforced when QUERY_BUDGETS_ENFORCED is set (development/testing),
+    so N+1 regressions fail loudly before they reach production.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_app.config.get('QUERY_BUDGETS_ENFORCED'):
+                return f(*args, **kwargs)
+
+            with QueryCounter() as counter:
+                response = f(*args, **kwargs)
+
+            check = partial(_check_budget, f.__name__, counter, max_queries)
+            if isinstance(response, Response) and response.is_streamed:
+                response.response = _budgeted_stream(response.response, counter, check)
+                return response
+            check()
+            return response
+
+        return decorated
+
+    return decorator
+
+# ============================================================
+# REQUEST METRICS
+# ============================================================
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """Cumulative-bucket histogram per label value, rendered in Prometheus text format"""
+
+    def __init__(self, name, help_text, buckets, label='endpoint'):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label = label
+        self._lock = threading.Lock()
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, label_value, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_value, values in sorted(series.items()):
+            label = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {values[-1]:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+class Counter:
+    """Monotonic counter per tuple of label values"""
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            labels = ','.join(f'{name}="{value_}"' for name, value_ in zip(self.labels, label_values))
+            lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+REQUESTS = Counter('http_requests_total', 'Requests handled (all, not only sampled)', ('endpoint', 'status'))
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time in the view, excluding streamed bodies', LATENCY_BUCKETS)
+DB_QUERIES = Histogram('db_queries_per_request', 'SQL statements issued per request', QUERY_BUCKETS)
+DB_SECONDS = Histogram('db_time_seconds', 'Time waiting on the database per request', LATENCY_BUCKETS)
+SERIALIZATION_SECONDS = Histogram('serialization_seconds', 'Time encoding JSON responses per request', LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram('response_size_bytes', 'Response body size (streamed bodies excluded)', SIZE_BUCKETS)
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Shared cache keys looked up by sampled requests', ('endpoint', 'result'))
+
+METRICS = (REQUESTS, REQUEST_SECONDS, DB_QUERIES, DB_SECONDS, SERIALIZATION_SECONDS, RESPONSE_BYTES, CACHE_LOOKUPS)
+
+class RequestSample:
+    """What one sampled request spent, filled in by the engine, cache and encoder hooks"""
+
+    __slots__ = ('started', 'queries', 'db_seconds', 'serialization_seconds', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+def record_serialization(seconds):
+    sample = _sample.get()
+    if sample is not None:
+        sample.serialization_seconds += seconds
+
+def record_cache_lookups(values):
+    sample = _sample.get()
+    if sample is not None:
+        for value in values:
+            if value is None:
+                sample.cache_misses += 1
+            else:
+                sample.cache_hits += 1
+
+def _instrument_cache_backend(backend):
+    """Count hits and misses on the cache backend's get/get_many"""
+    get, get_many = backend.get, backend.get_many
+
+    def instrumented_get(key):
+        value = get(key)
+        if not getattr(_local, 'in_get_many', False):
+            record_cache_lookups((value,))
+        return value
+
+    def instrumented_get_many(*keys):
+        # Some backends implement get_many with get; count each key once
+        _local.in_get_many = True
+        try:
+            values = get_many(*keys)
+        finally:
+            _local.in_get_many = False
+        record_cache_lookups(values)
+        return values
+
+    backend.get = instrumented_get
+    backend.get_many = instrumented_get_many
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.append('# HELP metrics_sample_rate Share of requests whose histograms are recorded')
+    lines.append('# TYPE metrics_sample_rate gauge')
+    lines.append(f"metrics_sample_rate {current_app.config['METRICS_SAMPLE_RATE']}")
+    return '\n'.join(lines) + '\n'
+
+def register_metrics(app, cache):
+    """
+    Hook request lifecycle, engine and cache events for a share of requests
+    (METRICS_SAMPLE_RATE) and serve the histograms on /api/metrics. Values
+    are per worker process, like the other *-stats endpoints; unsampled
+    requests only pay for one random() call and a counter increment. With a
+    rate of 0 nothing is sampled, but the request counter and the endpoint stay.
+    """
+    sample_rate = app.config['METRICS_SAMPLE_RATE']
+    if sample_rate > 0:
+        with app.app_context():
+            _instrument_cache_backend(cache.cache)
+
+        @app.before_request
+        def start_sample():
+            if request.endpoint != 'metrics' and (sample_rate >= 1 or random.random() < sample_rate):
+                _sample.set(RequestSample())
+
+    @app.after_request
+    def finish_sample(response):
+        endpoint = request.endpoint or 'unmatched'
+        REQUESTS.inc((endpoint, response.status_code))
+        sample = _sample.get()
+        if sample is None:
+            return response
+        _sample.set(None)
+
+        REQUEST_SECONDS.observe(endpoint, time.perf_counter() - sample.started)
+        DB_QUERIES.observe(endpoint, sample.queries)
+        DB_SECONDS.observe(endpoint, sample.db_seconds)
+        SERIALIZATION_SECONDS.observe(endpoint, sample.serialization_seconds)
+        if not response.is_streamed:
+            RESPONSE_BYTES.observe(endpoint, response.calculate_content_length() or 0)
+        if sample.cache_hits:
+            CACHE_LOOKUPS.inc((endpoint, 'hit'), sample.cache_hits)
+        if sample.cache_misses:
+            CACHE_LOOKUPS.inc((endpoint, 'miss'), sample.cache_misses)
+        return response
+
+    @app.teardown_request
+    def drop_sample(exc):
+        _sample.set(None)
+
+    from backend.routes.auth import admin_required
+
+    @app.route('/api/metrics', endpoint='metrics')
+    @admin_required
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
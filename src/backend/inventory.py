@@ -0,0 +1,220 @@
+"""
+ROOM-NIGHT INVENTORY LEDGER
+Per (room_type_id, date) booked counts, maintained atomically with bookings
+"""
+
+from backend.app import db
+from backend.models import Booking, RoomType, RoomNightInventory
+from sqlalchemy import event, func, select, literal, literal_column, inspect, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import timedelta
+
+inventory = RoomNightInventory.__table__
+
+# Booking statuses that hold a room
+HOLDING_STATUSES = ('confirmed',)
+
+class InventoryUnavailable(Exception):
+    """Raised when a reservation would overbook at least one night"""
+
+    def __init__(self, room_type_id, check_in, check_out):
+        super().__init__(f'Room type {room_type_id} is sold out for part of {check_in} - {check_out}')
+        self.room_type_id = room_type_id
+        self.check_in = check_in
+        self.check_out = check_out
+
+def _nights(check_in, check_out):
+    """Postgres series of stay nights: check_in up to (not including) check_out"""
+    return func.generate_series(
+        check_in, check_out - timedelta(days=1), literal_column("interval '1 day'")
+    ).table_valued('value').render_derived(name='nights')
+
+# ============================================================
+# WRITES
+# ============================================================
+
+def reserve_rooms(connection, room_type_id, check_in, check_out, quantity=1):
+    """
+    Add `quantity` booked rooms to every night of the stay in one statement.
+    Nights already at RoomType.total_rooms are left untouched and reported
+    as InventoryUnavailable; the caller's transaction must then be rolled back.
+    Nights are locked in date order, so overlapping stays queue instead of deadlocking.
+    """
+    nights_count = (check_out - check_in).days
+    if nights_count <= 0:
+        return
+
+    nights = _nights(check_in, check_out)
+    rows = select(
+        RoomType.id,
+        func.cast(nights.c.value, Date),
+        literal(quantity)
+    ).select_from(RoomType).join(nights, literal(True))\
+        .where(RoomType.id == room_type_id, RoomType.total_rooms >= quantity)\
+        .order_by(nights.c.value)
+
+    capacity = select(RoomType.total_rooms)\
+        .where(RoomType.id == room_type_id)\
+        .scalar_subquery()
+
+    stmt = pg_insert(inventory).from_select(['room_type_id', 'stay_date', 'booked_rooms'], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[inventory.c.room_type_id, inventory.c.stay_date],
+        set_={'booked_rooms': inventory.c.booked_rooms + stmt.excluded.booked_rooms},
+        where=inventory.c.booked_rooms + stmt.excluded.booked_rooms <= capacity
+    ).returning(inventory.c.stay_date)
+
+    reserved = connection.execute(stmt).fetchall()
+    if len(reserved) < nights_count:
+        raise InventoryUnavailable(room_type_id, check_in, check_out)
+
+def release_rooms(connection, room_type_id, check_in, check_out, quantity=1):
+    """Give back `quantity` rooms on every night of the stay"""
+    connection.execute(
+        inventory.update()
+        .where(
+            inventory.c.room_type_id == room_type_id,
+            inventory.c.stay_date >= check_in,
+            inventory.c.stay_date < check_out
+        )
+        .values(booked_rooms=inventory.c.booked_rooms - quantity)
+    )
+
+def rebuild_inventory():
+    """Recompute the whole ledger from confirmed bookings"""
+    nights = func.generate_series(
+        Booking.check_in_date,
+        Booking.check_out_date - literal_column("interval '1 day'"),
+        literal_column("interval '1 day'")
+    ).table_valued('value').render_derived(name='nights')
+
+    stay_date = func.cast(nights.c.value, Date)
+    rows = select(Booking.room_type_id, stay_date, func.count())\
+        .select_from(Booking).join(nights, literal(True))\
+        .where(Booking.booking_status.in_(HOLDING_STATUSES))\
+        .group_by(Booking.room_type_id, stay_date)
+
+    db.session.execute(inventory.delete())
+    db.session.execute(
+        inventory.insert().from_select(['room_type_id', 'stay_date', 'booked_rooms'], rows)
+    )
+    db.session.commit()
+
+# ============================================================
+# READS
+# ============================================================
+
+def peak_booked_rooms(room_type_id, check_in, check_out):
+    """Scalar subquery: most rooms booked on any night of the stay (0 if none)"""
+    return select(func.coalesce(func.max(inventory.c.booked_rooms), 0))\
+        .where(
+            inventory.c.room_type_id == room_type_id,
+            inventory.c.stay_date >= check_in,
+            inventory.c.stay_date < check_out
+        )\
+        .scalar_subquery()
+
+def count_available_rooms(room_types, check_in, check_out):
+    """
+    Rooms free on every night of the stay, for many room types in one query.
+    `room_types` need `id` and `total_rooms`; returns {room_type_id: count}.
+    """
+    available = {room_type.id: room_type.total_rooms for room_type in room_types}
+    if not available or check_out <= check_in:
+        return available
+
+    peaks = db.session.query(inventory.c.room_type_id, func.max(inventory.c.booked_rooms))\
+        .filter(
+            inventory.c.room_type_id.in_(list(available)),
+            inventory.c.stay_date >= check_in,
+            inventory.c.stay_date < check_out
+        )\
+        .group_by(inventory.c.room_type_id)\
+        .all()
+
+    for room_type_id, booked in peaks:
+        available[room_type_id] = max(available[room_type_id] - booked, 0)
+
+    return available
+
+def nightly_availability(room_types, check_in, check_out):
+    """
+    Free rooms per night for each room type.
+    Returns {room_type_id: [(date, free_rooms), ...]} covering every night.
+    """
+    booked = {}
+    if room_types and check_out > check_in:
+        rows = db.session.query(inventory.c.room_type_id, inventory.c.stay_date, inventory.c.booked_rooms)\
+            .filter(
+                inventory.c.room_type_id.in_([room_type.id for room_type in room_types]),
+                inventory.c.stay_date >= check_in,
+                inventory.c.stay_date < check_out
+            )\
+            .all()
+        booked = {(room_type_id, stay_date): count for room_type_id, stay_date, count in rows}
+
+    nights = [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+    return {
+        room_type.id: [
+            (night, max(room_type.total_rooms - booked.get((room_type.id, night), 0), 0))
+            for night in nights
+        ]
+        for room_type in room_types
+    }
+
+# ============================================================
+# BOOKING HOOKS (same transaction as the booking flush)
+# ============================================================
+
+_STAY_KEYS = ('room_type_id', 'check_in_date', 'check_out_date', 'booking_status')
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+# Load the previous value on set even when the attribute was expired,
+# so after_update always knows which nights the booking used to hold
+for _key in _STAY_KEYS:
+    event.listen(getattr(Booking, _key), 'set', _keep_old_value, active_history=True)
+
+def _holding_stay(room_type_id, check_in, check_out, status):
+    if status is None:
+        status = 'confirmed'  # column default
+    if status in HOLDING_STATUSES and room_type_id and check_in and check_out:
+        return room_type_id, check_in, check_out
+    return None
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, key)
+
+@event.listens_for(Booking, 'after_insert')
+def _reserve_on_insert(mapper, connection, booking):
+    stay = _holding_stay(booking.room_type_id, booking.check_in_date,
+                         booking.check_out_date, booking.booking_status)
+    if stay:
+        reserve_rooms(connection, *stay)
+
+@event.listens_for(Booking, 'after_update')
+def _rebook_on_update(mapper, connection, booking):
+    state = inspect(booking)
+    if not any(state.attrs[key].history.has_changes() for key in _STAY_KEYS):
+        return
+
+    old_stay = _holding_stay(*(_previous(state, key) for key in _STAY_KEYS))
+    new_stay = _holding_stay(booking.room_type_id, booking.check_in_date,
+                             booking.check_out_date, booking.booking_status)
+    if old_stay == new_stay:
+        return
+    if old_stay:
+        release_rooms(connection, *old_stay)
+    if new_stay:
+        reserve_rooms(connection, *new_stay)
+
+@event.listens_for(Booking, 'after_delete')
+def _release_on_delete(mapper, connection, booking):
+    stay = _holding_stay(booking.room_type_id, booking.check_in_date,
+                         booking.check_out_date, booking.booking_status)
+    if stay:
+        release_rooms(connection, *stay)
@@ -6,8 +6,8 @@ Production-grade schema with relationships, indexes, and constraints
 from datetime import datetime
 from backend.app import db
 from sqlalchemy.dialects.postgresql import JSON, ARRAY
-from sqlalchemy import Index, CheckConstraint
-import bcrypt
+from sqlalchemy import Index, CheckConstraint, UniqueConstraint
+from backend.passwords import hash_password, verify_password, needs_rehash, stats as password_stats
 import jwt
 from datetime import timedelta
 import os
@@ -30,6 +30,7 @@ class User(db.Model):
     is_verified = db.Column(db.Boolean, default=False)
     verification_documents = db.Column(JSON)
     safety_score = db.Column(db.Float, default=5.0)
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # bump to revoke issued tokens
     
     # Profile & Preferences
     profile_image = db.Column(db.String(500))
@@ -75,7 +76,7 @@ class User(db.Model):
     travel_buddies = db.relationship('TravelBuddy', foreign_keys='TravelBuddy.user_id', backref='user', lazy='dynamic')
     rides_offered = db.relationship('Ride', foreign_keys='Ride.driver_id', backref='driver', lazy='dynamic')
     rides_requested = db.relationship('RideRequest', backref='user', lazy='dynamic')
-    sos_alerts = db.relationship('SOSAlert', backref='user', lazy='dynamic')
+    sos_alerts = db.relationship('SOSAlert', foreign_keys='SOSAlert.user_id', backref='user', lazy='dynamic')
     itineraries = db.relationship('Itinerary', backref='user', lazy='dynamic')
     
     __table_args__ = (
@@ -85,16 +86,25 @@ class User(db.Model):
     )
     
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """Verify, upgrading the stored hash when BCRYPT_ROUNDS has changed since it was made"""
+        if not verify_password(password, self.password_hash):
+            return False
+        if needs_rehash(self.password_hash):
+            # Same password at the new work factor: not a credential change, tokens stay valid
+            self.set_password(password)
+            self._password_rehashed = True
+            password_stats.incr('rehashed')
+        return True
     
     def generate_token(self):
         payload = {
             'user_id': self.id,
             'email': self.email,
             'role': self.role,
+            'ver': self.token_version or 0,
             'exp': datetime.utcnow() + timedelta(hours=24)
         }
         return jwt.encode(payload, os.getenv('JWT_SECRET_KEY', 'secret'), algorithm='HS256')
@@ -186,6 +196,7 @@ class Hotel(db.Model):
     
     # Amenities (Boolean flags for filtering)
     amenities = db.Column(JSON)  # {wifi: true, pool: true, gym: true, spa: false, ...}
+    amenity_mask = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # bit per amenity, GIN-indexed in backend/amenities.py
     
     # Policies
     check_in_time = db.Column(db.String(10), default='14:00')
@@ -376,6 +387,9 @@ class Booking(db.Model):
     # QR Code
     qr_code_url = db.Column(db.String(500))
     
+    # Client-chosen Idempotency-Key of the request that created the booking
+    idempotency_key = db.Column(db.String(64))
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -385,6 +399,19 @@ class Booking(db.Model):
         Index('idx_booking_hotel', 'hotel_id'),
         Index('idx_booking_dates', 'check_in_date', 'check_out_date'),
         Index('idx_booking_status', 'booking_status'),
+        UniqueConstraint('user_id', 'idempotency_key', name='uq_booking_idempotency'),
+    )
+
+class RoomNightInventory(db.Model):
+    """Booked-room ledger per room type and night, kept in step with confirmed bookings"""
+    __tablename__ = 'room_night_inventory'
+
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_types.id'), primary_key=True)
+    stay_date = db.Column(db.Date, primary_key=True)
+    booked_rooms = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint('booked_rooms >= 0', name='ck_inventory_booked_rooms'),
     )
 
 # ============================================================
@@ -426,8 +453,38 @@ class Review(db.Model):
     __table_args__ = (
         Index('idx_review_hotel', 'hotel_id'),
         Index('idx_review_rating', 'overall_rating'),
+        Index('idx_review_hotel_created', 'hotel_id', 'created_at', 'id'),
     )
 
+class HotelRatingAggregate(db.Model):
+    """Running review sums/counts per hotel, updated incrementally on every review write"""
+    __tablename__ = 'hotel_rating_aggregates'
+    
+    hotel_id = db.Column(db.Integer, db.ForeignKey('hotels.id'), primary_key=True)
+    
+    # Overall (every review has one)
+    review_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    overall_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    
+    # Optional dimensions: sum and count of reviews that rated them
+    cleanliness_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    cleanliness_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    service_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    service_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    location_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    location_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    value_for_money_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    value_for_money_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    amenities_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    amenities_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    # Star histogram of overall_rating rounded half-up to 1-5
+    stars_1 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    stars_2 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    stars_3 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    stars_4 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    stars_5 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
 # ============================================================
 # SOCIAL TRAVEL BUDDY SYSTEM
 # ============================================================
@@ -0,0 +1,199 @@
+"""
+PASSWORD HASHING POOL
+bcrypt runs in a bounded process pool so login bursts cannot occupy every request worker
+"""
+
+from flask import current_app, has_app_context
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as HashTimeout
+from concurrent.futures.process import BrokenProcessPool
+import atexit
+import bcrypt
+import os
+import threading
+import time
+
+DEFAULT_ROUNDS = 12
+
+class HashingPoolSaturated(RuntimeError):
+    """Every pool slot and queue slot is taken; the caller should shed the request (503)"""
+
+class HashingTimedOut(HashingPoolSaturated):
+    """An admitted job missed PASSWORD_HASH_TIMEOUT; shed like saturation (503)"""
+
+def _config(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+def default_pool_workers():
+    """This web worker's share of the cores (WEB_CONCURRENCY workers per host)"""
+    return max((os.cpu_count() or 1) // max(_config('WEB_CONCURRENCY', 1), 1), 1)
+
+# ============================================================
+# WORK (runs in pool processes)
+# ============================================================
+
+def _hash(password, rounds):
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    return hashed, time.perf_counter() - started
+
+def _verify(password, hashed):
+    started = time.perf_counter()
+    ok = bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return ok, time.perf_counter() - started
+
+def hash_rounds(hashed):
+    """Work factor recorded in a bcrypt hash ($2b$<rounds>$...)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed):
+    return hash_rounds(hashed) != _config('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+
+# ============================================================
+# STATS
+# ============================================================
+
+class HashingStats:
+    """Process-local queue depth and latency counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.pool_restarts = 0
+        self.rehashed = 0
+        self.hash_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record(self, hash_seconds, wait_seconds):
+        with self._lock:
+            self.completed += 1
+            self.hash_seconds += hash_seconds
+            self.wait_seconds += wait_seconds
+            self.max_hash_seconds = max(self.max_hash_seconds, hash_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            done = self.completed
+            return {
+                'queue_depth': self.in_flight,
+                'completed': done,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'pool_restarts': self.pool_restarts,
+                'rehashed': self.rehashed,
+                'avg_hash_ms': round(self.hash_seconds / done * 1000, 2) if done else 0.0,
+                'avg_wait_ms': round(self.wait_seconds / done * 1000, 2) if done else 0.0,
+                'max_hash_ms': round(self.max_hash_seconds * 1000, 2)
+            }
+
+stats = HashingStats()
+
+# ============================================================
+# POOL
+# ============================================================
+
+class PasswordHasher:
+    """
+    Process pool of PASSWORD_POOL_WORKERS processes (default: cores divided by
+    WEB_CONCURRENCY, so all web workers together run one per core) behind a
+    semaphore admitting at most workers + PASSWORD_QUEUE_SIZE jobs. A job that
+    has not finished after PASSWORD_HASH_TIMEOUT seconds is abandoned with
+    HashingTimedOut; its slot frees only when the process is done with it.
+    A pool whose process died (OOM kill, crash) is replaced and the job
+    retried once on the new pool.
+    PASSWORD_POOL_WORKERS=0 hashes inline (CLI, seeding, tests).
+    Created lazily so forked web workers each start their own pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _pool(self):
+        workers = _config('PASSWORD_POOL_WORKERS', None)
+        if workers is None:
+            workers = default_pool_workers()
+        if not workers:
+            return None, None
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+                self._slots = threading.BoundedSemaphore(workers + _config('PASSWORD_QUEUE_SIZE', 4 * workers))
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def _discard(self, executor):
+        """Drop a broken pool; the next _pool() call starts a new one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        stats.incr('pool_restarts')
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args):
+        for attempt in range(2):
+            executor, slots = self._pool()
+            if executor is None:
+                result, elapsed = fn(*args)
+                stats.record(elapsed, 0.0)
+                return result
+            try:
+                return self._run_pooled(executor, slots, fn, args)
+            except BrokenProcessPool:
+                self._discard(executor)
+        raise HashingPoolSaturated('Password hashing pool is restarting, retry shortly')
+
+    def _run_pooled(self, executor, slots, fn, args):
+        if not slots.acquire(timeout=_config('PASSWORD_QUEUE_TIMEOUT', 0.05)):
+            stats.incr('rejected')
+            raise HashingPoolSaturated('Password hashing is saturated, retry shortly')
+
+        stats.incr('in_flight')
+        submitted = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            _release(slots)
+            raise
+        # Released when the job ends, not when a timed-out caller gives up on it
+        future.add_done_callback(lambda _: _release(slots))
+        try:
+            result, elapsed = future.result(timeout=_config('PASSWORD_HASH_TIMEOUT', 5.0))
+        except HashTimeout:
+            future.cancel()
+            stats.incr('timed_out')
+            raise HashingTimedOut('Password hashing timed out, retry shortly') from None
+        stats.record(elapsed, max(time.perf_counter() - submitted - elapsed, 0.0))
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def _release(slots):
+    stats.incr('in_flight', -1)
+    slots.release()
+
+hasher = PasswordHasher()
+atexit.register(hasher.shutdown)
+
+def hash_password(password, rounds=None):
+    return hasher.run(_hash, password, rounds or _config('BCRYPT_ROUNDS', DEFAULT_ROUNDS))
+
+def verify_password(password, hashed):
+    return hasher.run(_verify, password, hashed)
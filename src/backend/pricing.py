@@ -0,0 +1,105 @@
+"""
+DYNAMIC PRICING ENGINE
+Scalar reference pricing plus a vectorized batch engine for search
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+
+# Peak season (Dec, Jan, Apr, May for India)
+PEAK_SEASON_MONTHS = (12, 1, 4, 5)
+
+# Booking window adjustments
+LAST_MINUTE_DAYS = 7
+LAST_MINUTE_MULTIPLIER = 1.15
+EARLY_BIRD_DAYS = 60
+EARLY_BIRD_MULTIPLIER = 0.9
+
+# GST on the room tariff
+TAX_RATE = 0.12
+
+def calculate_dynamic_price(room, check_in_date, check_out_date):
+    """
+    INTELLIGENT DYNAMIC PRICING ENGINE
+    Factors: Day of week, season, demand, events, booking window
+    """
+    base_price = room.base_price
+    total_price = 0
+
+    current_date = check_in_date
+    while current_date < check_out_date:
+        day_price = base_price
+
+        # Weekend pricing
+        if current_date.weekday() >= 5:  # Saturday or Sunday
+            day_price *= room.weekend_multiplier
+
+        # Peak season
+        if current_date.month in PEAK_SEASON_MONTHS:
+            day_price *= room.peak_season_multiplier
+
+        # Last-minute booking premium
+        days_until_checkin = (check_in_date - datetime.now().date()).days
+        if days_until_checkin < LAST_MINUTE_DAYS:
+            day_price *= LAST_MINUTE_MULTIPLIER
+        elif days_until_checkin > EARLY_BIRD_DAYS:
+            day_price *= EARLY_BIRD_MULTIPLIER  # Early bird discount
+
+        total_price += day_price
+        current_date += timedelta(days=1)
+
+    return round(total_price, 2)
+
+class StayPricing:
+    """
+    BATCH PRICING FOR ONE STAY
+    Builds the weekend, peak-season and booking-window masks once and
+    prices any number of room types against them.
+    """
+
+    def __init__(self, check_in_date, check_out_date, today=None):
+        self.check_in_date = check_in_date
+        self.check_out_date = check_out_date
+
+        days = np.arange(check_in_date, check_out_date, dtype='datetime64[D]')
+        self.nights = len(days)
+
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = (days.astype(np.int64) + 3) % 7
+        months = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        self.weekend_mask = weekdays >= 5
+        self.peak_mask = np.isin(months, PEAK_SEASON_MONTHS)
+
+        today = today or datetime.now().date()
+        days_until_checkin = (check_in_date - today).days
+        if days_until_checkin < LAST_MINUTE_DAYS:
+            self.window_multiplier = LAST_MINUTE_MULTIPLIER
+        elif days_until_checkin > EARLY_BIRD_DAYS:
+            self.window_multiplier = EARLY_BIRD_MULTIPLIER
+        else:
+            self.window_multiplier = None
+
+    def price(self, rooms):
+        """
+        Total stay price for each room, in input order.
+        Multiplies in the same order as calculate_dynamic_price and sums
+        nights left to right, so totals match the scalar engine exactly.
+        """
+        count = len(rooms)
+        if not self.nights:
+            return [0] * count
+
+        base = np.fromiter((r.base_price for r in rooms), dtype=np.float64, count=count)
+        weekend = np.fromiter((r.weekend_multiplier for r in rooms), dtype=np.float64, count=count)
+        peak = np.fromiter((r.peak_season_multiplier for r in rooms), dtype=np.float64, count=count)
+
+        # rooms x nights matrix of nightly prices
+        nightly = np.repeat(base[:, None], self.nights, axis=1)
+        nightly = np.where(self.weekend_mask, nightly * weekend[:, None], nightly)
+        nightly = np.where(self.peak_mask, nightly * peak[:, None], nightly)
+        if self.window_multiplier is not None:
+            nightly = nightly * self.window_multiplier
+
+        # cumsum accumulates sequentially, like the scalar running total
+        totals = np.cumsum(nightly, axis=1)[:, -1]
+        return [round(total, 2) for total in totals.tolist()]
@@ -0,0 +1,210 @@
+"""
+PRINCIPAL CACHE
+Slim authenticated-user records for token_required, cached in-process and optionally in Redis
+
+Shared entries are keyed by a per-user generation that every committed
+change to the user replaces, as search_cache does per destination. A fill
+that read the row before the commit lands under the old generation, where
+no lookup reads it, instead of bringing back a revoked principal.
+"""
+
+from flask import current_app
+from backend.app import db, cache
+from backend.models import User
+from backend.cache_events import on_commit
+from backend.db_routing import primary_reads
+from sqlalchemy import event, inspect
+from collections import OrderedDict, namedtuple
+import threading
+import time
+import uuid
+
+# Only what request handlers read about the caller
+Principal = namedtuple('Principal', 'id email full_name role is_verified token_version')
+
+PRINCIPAL_COLUMNS = (User.id, User.email, User.full_name, User.role, User.is_verified, User.token_version)
+
+# Changing any of these revokes every token issued before the change
+REVOKING_FIELDS = ('role', 'password_hash', 'email')
+
+def _generation_key(user_id):
+    return f'principal:gen:{user_id}'
+
+def _shared_key(user_id, generation, token_version):
+    return f'principal:{user_id}:{generation}:{token_version}'
+
+def _generation(user_id, timeout):
+    """Current shared-tier generation for a user, created on first use"""
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex[:12], timeout=timeout)
+        generation = cache.get(key)
+    return generation
+
+# ============================================================
+# STATS
+# ============================================================
+
+class PrincipalCacheStats:
+    """Process-local lookup counters per tier"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0
+            }
+
+stats = PrincipalCacheStats()
+
+# ============================================================
+# IN-PROCESS TIER
+# ============================================================
+
+class TTLCache:
+    """Thread-safe LRU map whose entries also expire ttl seconds after insertion"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Bumped by every discard; a fill that started before one is dropped
+        self.epoch = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, epoch=None):
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                stats.incr('evictions')
+
+    def discard_where(self, predicate):
+        with self._lock:
+            self.epoch += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+_local = None
+_local_lock = threading.Lock()
+
+def _local_tier():
+    """Per-process tier, sized from config on first use"""
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                _local = TTLCache(current_app.config['PRINCIPAL_CACHE_SIZE'],
+                                  current_app.config['PRINCIPAL_CACHE_TTL'])
+    return _local
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+def load_principal(user_id, token_version=0):
+    """
+    Principal for a token's (user_id, token_version), or None when the user
+    is gone or the token predates a revoking change. Local tier, then the
+    shared tier (when PRINCIPAL_CACHE_SHARED), then one narrow DB query.
+    """
+    key = (user_id, token_version)
+    local = _local_tier()
+
+    principal = local.get(key)
+    if principal is not None:
+        stats.incr('local_hits')
+        return principal
+
+    # Read before the row: an invalidation from here on voids this fill
+    epoch = local.epoch
+    shared = current_app.config['PRINCIPAL_CACHE_SHARED']
+    if shared:
+        timeout = current_app.config['PRINCIPAL_CACHE_SHARED_TTL']
+        shared_key = _shared_key(user_id, _generation(user_id, timeout), token_version)
+        cached = cache.get(shared_key)
+        if cached is not None:
+            principal = Principal(*cached)
+            local.set(key, principal, epoch)
+            stats.incr('shared_hits')
+            return principal
+
+    stats.incr('misses')
+    with primary_reads():
+        row = db.session.query(*PRINCIPAL_COLUMNS).filter(User.id == user_id).first()
+    if row is None or row.token_version != token_version:
+        return None
+
+    principal = Principal(*row)
+    local.set(key, principal, epoch)
+    if shared:
+        cache.set(shared_key, tuple(principal), timeout=timeout)
+    return principal
+
+def invalidate_principal(user_id):
+    """Drop a user's cached principal from this worker; start a new shared generation"""
+    stats.incr('invalidations')
+    if _local is not None:
+        _local.discard_where(lambda key: key[0] == user_id)
+    cache.set(_generation_key(user_id), uuid.uuid4().hex[:12],
+              timeout=current_app.config['PRINCIPAL_CACHE_SHARED_TTL'])
+
+# ============================================================
+# WRITE EVENTS
+# ============================================================
+
+@event.listens_for(User, 'before_update')
+def _revoke_tokens(mapper, connection, user):
+    state = inspect(user)
+    changed = [key for key in REVOKING_FIELDS if state.attrs[key].history.has_changes()]
+    if changed == ['password_hash'] and user.__dict__.pop('_password_rehashed', False):
+        return
+    if changed:
+        user.token_version = (user.token_version or 0) + 1
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, user):
+    # Covers update_profile, verify_account and role changes alike
+    user_id = user.id
+    on_commit(user, ('principal', user_id), lambda: invalidate_principal(user_id))
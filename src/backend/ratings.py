@@ -0,0 +1,238 @@
+"""
+HOTEL RATING AGGREGATES
+O(1) running sums, counts and star histograms maintained on review writes
+
+A review write upserts only its hotel's aggregate row, inside the review's
+transaction. Hotel.overall_rating / total_reviews are copied from the
+aggregate once the review has committed, in a one-statement transaction of
+their own (sync_hotel_rating), so the hotels row is never locked for the
+length of a review write. Hotels rows written here bypass the ORM, so the
+search cache, the info fragment and the autocomplete index are told
+explicitly.
+"""
+
+from backend.app import db
+from backend.models import Hotel, Review, HotelRatingAggregate
+from backend.cache_events import on_commit
+from backend.search_cache import invalidate_destination
+from backend.hotel_fragments import invalidate_fragments, INFO
+from backend.autocomplete import publish_hotel
+from sqlalchemy import event, func, case, select, inspect, exists, or_, Integer, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from decimal import Decimal, ROUND_HALF_UP
+import math
+
+aggregates = HotelRatingAggregate.__table__
+hotels = Hotel.__table__
+
+# What the caches need to hear about a hotel whose rating was rewritten
+SYNCED_COLUMNS = (
+    hotels.c.id, hotels.c.name, hotels.c.brand, hotels.c.destination_id,
+    hotels.c.total_bookings, hotels.c.overall_rating
+)
+
+# Optional per-dimension ratings: aggregate column prefix -> Review column
+RATING_DIMENSIONS = {
+    'cleanliness': 'cleanliness_rating',
+    'service': 'service_rating',
+    'location': 'location_rating',
+    'value_for_money': 'value_for_money_rating',
+    'amenities': 'amenities_rating',
+}
+
+STAR_BUCKETS = range(1, 6)
+
+_REVIEW_KEYS = ('hotel_id', 'overall_rating', *RATING_DIMENSIONS.values())
+
+def star_bucket(rating):
+    """Histogram bucket: rating rounded half-up, clamped to 1-5"""
+    return min(5, max(1, math.floor(rating + 0.5)))
+
+def hotel_rating(total, count):
+    """
+    Hotel.overall_rating for an aggregate: mean rounded half-up to one
+    decimal, the same way Postgres rounds in rebuild_rating_aggregates
+    """
+    if not count:
+        return 0.0
+    return float(Decimal(repr(total / count)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
+
+def _contribution(values, sign):
+    """Column deltas one review adds (sign=1) or removes (sign=-1)"""
+    delta = {
+        'review_count': sign,
+        'overall_sum': sign * values['overall_rating'],
+        f"stars_{star_bucket(values['overall_rating'])}": sign,
+    }
+    for prefix, column in RATING_DIMENSIONS.items():
+        if values[column] is not None:
+            delta[f'{prefix}_sum'] = sign * values[column]
+            delta[f'{prefix}_count'] = sign
+    return delta
+
+def _apply(connection, target, hotel_id, delta):
+    """Upsert the deltas; the hotel row follows once target's transaction commits"""
+    stmt = pg_insert(aggregates).values(hotel_id=hotel_id, **delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[aggregates.c.hotel_id],
+        set_={column: aggregates.c[column] + stmt.excluded[column] for column in delta}
+    )
+    connection.execute(stmt)
+    on_commit(target, ('rating', hotel_id), lambda: sync_hotel_rating(hotel_id))
+
+def _announce(rows):
+    """Ratings feed search sorting and filters, the info fragment and autocomplete weights"""
+    for destination_id in {row.destination_id for row in rows}:
+        invalidate_destination(destination_id)
+    for row in rows:
+        invalidate_fragments(row.id, INFO)
+        publish_hotel(row)
+
+def sync_hotel_rating(hotel_id):
+    """
+    Copy a hotel's aggregate into Hotel.overall_rating / total_reviews.
+    Locking the aggregate row orders concurrent syncs, so the last one to
+    write carries the newest aggregate.
+    """
+    with db.engine.begin() as connection:
+        aggregate = connection.execute(
+            select(aggregates.c.review_count, aggregates.c.overall_sum)
+            .where(aggregates.c.hotel_id == hotel_id)
+            .with_for_update()
+        ).first()
+        count, total = aggregate or (0, 0.0)
+        rating = hotel_rating(total, count)
+        rows = connection.execute(
+            hotels.update()
+            .where(hotels.c.id == hotel_id,
+                   or_(hotels.c.overall_rating.is_distinct_from(rating),
+                       hotels.c.total_reviews.is_distinct_from(count)))
+            .values(overall_rating=rating, total_reviews=count)
+            .returning(*SYNCED_COLUMNS)
+        ).all()
+    _announce(rows)
+
+# ============================================================
+# REVIEW HOOKS
+# ============================================================
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+# Load previous values on set, so updates can subtract what the review used to contribute
+for _key in _REVIEW_KEYS:
+    event.listen(getattr(Review, _key), 'set', _keep_old_value, active_history=True)
+
+def _current(review):
+    return {key: getattr(review, key) for key in _REVIEW_KEYS}
+
+def _previous(review):
+    state = inspect(review)
+    values = {}
+    for key in _REVIEW_KEYS:
+        history = state.attrs[key].history
+        values[key] = history.deleted[0] if history.deleted else getattr(review, key)
+    return values
+
+@event.listens_for(Review, 'after_insert')
+def _review_added(mapper, connection, review):
+    _apply(connection, review, review.hotel_id, _contribution(_current(review), 1))
+
+@event.listens_for(Review, 'after_delete')
+def _review_removed(mapper, connection, review):
+    _apply(connection, review, review.hotel_id, _contribution(_current(review), -1))
+
+@event.listens_for(Review, 'after_update')
+def _review_changed(mapper, connection, review):
+    old, new = _previous(review), _current(review)
+    if old == new:
+        return
+    _apply(connection, review, old['hotel_id'], _contribution(old, -1))
+    _apply(connection, review, new['hotel_id'], _contribution(new, 1))
+
+# ============================================================
+# READS
+# ============================================================
+
+def rating_summary(hotel_id):
+    """Averages per dimension and the star histogram for one hotel"""
+    return summarize_aggregate(db.session.get(HotelRatingAggregate, hotel_id))
+
+def summarize_aggregate(aggregate):
+    """rating_summary() payload for an aggregate row (None: no reviews yet)"""
+    if aggregate is None or not aggregate.review_count:
+        return {
+            'review_count': 0,
+            'overall': None,
+            **{prefix: None for prefix in RATING_DIMENSIONS},
+            'histogram': {str(stars): 0 for stars in STAR_BUCKETS}
+        }
+
+    def average(total, count):
+        return round(total / count, 2) if count else None
+
+    return {
+        'review_count': aggregate.review_count,
+        'overall': average(aggregate.overall_sum, aggregate.review_count),
+        **{
+            prefix: average(getattr(aggregate, f'{prefix}_sum'), getattr(aggregate, f'{prefix}_count'))
+            for prefix in RATING_DIMENSIONS
+        },
+        'histogram': {str(stars): getattr(aggregate, f'stars_{stars}') for stars in STAR_BUCKETS}
+    }
+
+# ============================================================
+# RECONCILIATION
+# ============================================================
+
+def rebuild_rating_aggregates():
+    """
+    Recompute every aggregate from Review in one set-based pass and resync
+    Hotel.overall_rating / total_reviews, resetting hotels without reviews.
+    The table lock makes concurrent review writes wait, so no delta is lost
+    or double counted. Returns the number of hotels whose rating changed.
+    """
+    bucket = func.least(5, func.greatest(1, func.floor(Review.overall_rating + 0.5))).cast(Integer)
+
+    columns = {
+        'hotel_id': Review.hotel_id,
+        'review_count': func.count(),
+        'overall_sum': func.sum(Review.overall_rating),
+    }
+    for prefix, column in RATING_DIMENSIONS.items():
+        rating = getattr(Review, column)
+        columns[f'{prefix}_sum'] = func.coalesce(func.sum(rating), 0)
+        columns[f'{prefix}_count'] = func.count(rating)
+    for stars in STAR_BUCKETS:
+        columns[f'stars_{stars}'] = func.sum(case((bucket == stars, 1), else_=0))
+
+    rows = select(*columns.values()).group_by(Review.hotel_id)
+
+    db.session.execute(text(f'LOCK TABLE {aggregates.name} IN EXCLUSIVE MODE'))
+    db.session.execute(aggregates.delete())
+    db.session.execute(aggregates.insert().from_select(list(columns), rows))
+
+    overall = func.coalesce(func.round(
+        (aggregates.c.overall_sum / func.nullif(aggregates.c.review_count, 0)).cast(db.Numeric), 1
+    ), 0.0)
+    reviewed = db.session.execute(
+        hotels.update()
+        .where(hotels.c.id == aggregates.c.hotel_id,
+               or_(hotels.c.overall_rating.is_distinct_from(overall),
+                   hotels.c.total_reviews.is_distinct_from(aggregates.c.review_count)))
+        .values(overall_rating=overall, total_reviews=aggregates.c.review_count)
+        .returning(*SYNCED_COLUMNS)
+    ).all()
+    # Same 0.0 / 0 the incremental path writes once a hotel's last review goes
+    unreviewed = db.session.execute(
+        hotels.update()
+        .where(~exists().where(aggregates.c.hotel_id == hotels.c.id),
+               or_(hotels.c.overall_rating.is_distinct_from(0.0),
+                   hotels.c.total_reviews.is_distinct_from(0)))
+        .values(overall_rating=0.0, total_reviews=0)
+        .returning(*SYNCED_COLUMNS)
+    ).all()
+    db.session.commit()
+
+    _announce(reviewed + unreviewed)
+    return len(reviewed) + len(unreviewed)
@@ -0,0 +1,167 @@
+"""
+BOOKING CREATION
+Room-night reservation with idempotent retries and references that need no database round trip
+
+A booking is written with one INSERT. The inventory hooks (backend/inventory.py)
+then reserve its nights with one conditional upsert in the same transaction,
+and the COMMIT follows straight away. The only row locks are on the ledger
+rows for that room type and those nights. They are held from the upsert to
+the commit, so a booking only waits for bookings of the same room type on
+overlapping nights, and never for the rest of the site.
+
+Idempotency keys are unique per user (uq_booking_idempotency). A retry
+inserts exactly like the first attempt. If the original is still in flight,
+the unique index makes the retry wait for it. Once the original has
+committed, the retry's insert fails and the original booking is returned.
+First attempts pay no extra lookup.
+
+Booking references are generated in the app: BK, then 9 base32 characters
+of Unix milliseconds, then 8 random ones. They are unique without a sequence
+round trip, time-ordered (so the unique index grows at its right edge) and
+not enumerable. On the off chance of a collision, the booking is retried
+with a new reference.
+"""
+
+from backend.app import db
+from backend.models import Booking, RoomType, Hotel
+from backend.inventory import InventoryUnavailable, peak_booked_rooms
+from backend.pricing import StayPricing, TAX_RATE
+from backend.schemas import BOOKING
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
+from datetime import datetime
+import secrets
+import time
+
+REFERENCE_PREFIX = 'BK'
+REFERENCE_ATTEMPTS = 3
+
+# Crockford base32: no I, L, O or U, so references survive being read out
+_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+IDEMPOTENCY_CONSTRAINT = 'uq_booking_idempotency'
+REFERENCE_INDEX = 'ix_bookings_booking_reference'
+IDEMPOTENCY_KEY_LENGTH = 64
+
+# Longest stay bookable in one request
+MAX_NIGHTS = 30
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused for a different booking request"""
+
+    def __init__(self, idempotency_key):
+        super().__init__(f'Idempotency-Key {idempotency_key!r} was already used for a different booking')
+        self.idempotency_key = idempotency_key
+
+# ============================================================
+# REFERENCES
+# ============================================================
+
+def _base32(value, length):
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(_BASE32[digit])
+    return ''.join(reversed(chars))
+
+def new_booking_reference():
+    """BK + 9 chars of Unix milliseconds + 8 chars (40 bits) of randomness"""
+    return REFERENCE_PREFIX + _base32(time.time_ns() // 1_000_000, 9) + _base32(secrets.randbits(40), 8)
+
+# ============================================================
+# BOOKING
+# ============================================================
+
+def load_room_type(room_type_id, check_in, check_out):
+    """
+    (RoomType, rooms free on every night of the stay) in one query, or None.
+    The hotel row (destination_id only) is loaded alongside, so the booking's
+    search cache invalidation needs no query inside the locked section.
+    Free rooms are read without locks: a quick "sold out" for the many
+    requests that arrive after the last room went, not a guarantee.
+    """
+    row = db.session.execute(
+        select(RoomType, peak_booked_rooms(room_type_id, check_in, check_out))
+        .join(RoomType.hotel)
+        .where(RoomType.id == room_type_id)
+        .options(contains_eager(RoomType.hotel).load_only(Hotel.destination_id))
+    ).first()
+    if row is None:
+        return None
+    room_type, booked = row
+    return room_type, max(room_type.total_rooms - booked, 0)
+
+def replayed_booking(user_id, idempotency_key, room_type_id, check_in, check_out, guests):
+    """
+    Payload of the booking an earlier request made with this idempotency key,
+    or None. Raises IdempotencyConflict when that request asked for something else.
+    """
+    booking = db.session.scalars(
+        select(Booking).where(Booking.user_id == user_id, Booking.idempotency_key == idempotency_key)
+    ).first()
+    if booking is None:
+        return None
+    if (booking.room_type_id, booking.check_in_date, booking.check_out_date, booking.number_of_guests) != \
+            (room_type_id, check_in, check_out, guests):
+        raise IdempotencyConflict(idempotency_key)
+    return BOOKING.dump(booking)
+
+def book_room(user_id, room_type, check_in, check_out, guests, idempotency_key=None,
+              guest_details=None, payment_method=None):
+    """
+    Create a confirmed booking and reserve its nights atomically.
+    Returns (booking payload, created); created is False when an earlier
+    request with the same idempotency key already made the booking.
+    Raises InventoryUnavailable when any night is sold out and
+    IdempotencyConflict when the key belongs to a different request.
+    """
+    # Rolling back expires room_type; retries must not reload it
+    room_type_id, hotel_id = room_type.id, room_type.hotel_id
+    total = StayPricing(check_in, check_out).price([room_type])[0]
+    nights = (check_out - check_in).days
+    taxes = round(total * TAX_RATE, 2)
+
+    for attempt in range(REFERENCE_ATTEMPTS):
+        booking = Booking(
+            booking_reference=new_booking_reference(),
+            user_id=user_id,
+            hotel_id=hotel_id,
+            room_type_id=room_type_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+            number_of_nights=nights,
+            number_of_guests=guests,
+            guest_details=guest_details,
+            room_price_per_night=round(total / nights, 2),
+            total_room_cost=total,
+            taxes=taxes,
+            service_charges=0.0,
+            discount=0.0,
+            final_amount=round(total + taxes, 2),
+            payment_status='pending',
+            payment_method=payment_method,
+            booking_status='confirmed',
+            idempotency_key=idempotency_key,
+            created_at=datetime.utcnow()
+        )
+        db.session.add(booking)
+        try:
+            # INSERT, then the nights' upsert (hooks); the payload is taken
+            # before COMMIT so nothing is reloaded afterwards
+            db.session.flush()
+            payload = BOOKING.dump(booking)
+            db.session.commit()
+            return payload, True
+        except InventoryUnavailable:
+            db.session.rollback()
+            raise
+        except IntegrityError as error:
+            db.session.rollback()
+            constraint = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+            if constraint == IDEMPOTENCY_CONSTRAINT and idempotency_key is not None:
+                replayed = replayed_booking(user_id, idempotency_key, room_type_id, check_in, check_out, guests)
+                if replayed is not None:
+                    return replayed, False
+            if constraint != REFERENCE_INDEX or attempt == REFERENCE_ATTEMPTS - 1:
+                raise
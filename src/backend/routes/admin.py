@@ -1,3 +1,12 @@
 """ADMIN DASHBOARD ROUTES"""
 from flask import Blueprint
+from backend.routes.auth import admin_required
+from backend.audit import audit_writer
+from backend.serialization import json_response
 bp = Blueprint('admin', __name__)
+
+@bp.route('/audit-stats', methods=['GET'])
+@admin_required
+def audit_statistics():
+    """Queue depth and written/failed event counts of the batched audit writer (this worker)"""
+    return json_response(audit_writer.snapshot()), 200
@@ -3,10 +3,16 @@ AUTHENTICATION & AUTHORIZATION
 JWT-based authentication with refresh tokens
 """
 
-from flask import Blueprint, request, jsonify
-from backend.models import User, AuditLog
+from flask import Blueprint, request, current_app
+from backend.models import User
 from backend.app import db, limiter
+from backend.principals import load_principal, stats as principal_cache_stats
+from backend.passwords import stats as password_stats
+from backend.audit import record_audit
+from backend.serialization import json_response
+from backend.schemas import USER_PROFILE, USER_SESSION, USER_BRIEF
 from functools import wraps
+import hmac
 import jwt
 import os
 from datetime import datetime
@@ -20,27 +26,49 @@ def token_required(f):
         token = request.headers.get('Authorization')
         
         if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+            return json_response({'error': 'Token is missing'}), 401
         
         try:
             if token.startswith('Bearer '):
                 token = token[7:]
             
             data = jwt.decode(token, os.getenv('JWT_SECRET_KEY', 'secret'), algorithms=['HS256'])
-            current_user = User.query.get(data['user_id'])
+            # Slim cached principal; handlers that need the full row load it themselves
+            current_user = load_principal(data['user_id'], data.get('ver', 0))
             
             if not current_user:
-                return jsonify({'error': 'Invalid token'}), 401
+                return json_response({'error': 'Invalid token'}), 401
                 
         except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
+            return json_response({'error': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
+            return json_response({'error': 'Invalid token'}), 401
         
         return f(current_user, *args, **kwargs)
     
     return decorated
 
+def admin_required(f):
+    """
+    Decorator for operations endpoints (stats, metrics): an admin's token,
+    or Bearer OPS_TOKEN for scrapers that cannot log in
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        ops_token = current_app.config.get('OPS_TOKEN')
+        header = request.headers.get('Authorization', '')
+        if ops_token and hmac.compare_digest(header.encode('utf-8'), f'Bearer {ops_token}'.encode('utf-8')):
+            return f(*args, **kwargs)
+        
+        @token_required
+        def as_admin(current_user):
+            if current_user.role != 'admin':
+                return json_response({'error': 'Admin access required'}), 403
+            return f(*args, **kwargs)
+        return as_admin()
+    
+    return decorated
+
 @bp.route('/register', methods=['POST'])
 @limiter.limit("5 per hour")
 def register():
@@ -50,14 +78,14 @@ def register():
     # Validation
     required_fields = ['email', 'password', 'full_name', 'phone']
     if not all(field in data for field in required_fields):
-        return jsonify({'error': 'Missing required fields'}), 400
+        return json_response({'error': 'Missing required fields'}), 400
     
     # Check if user exists
     if User.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'Email already registered'}), 400
+        return json_response({'error': 'Email already registered'}), 400
     
     if User.query.filter_by(phone=data['phone']).first():
-        return jsonify({'error': 'Phone number already registered'}), 400
+        return json_response({'error': 'Phone number already registered'}), 400
     
     # Create user
     user = User(
@@ -77,30 +105,18 @@ def register():
         user.interests = data['interests']
     
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()  # assigns user.id for the audit row
     
-    # Audit log
-    audit = AuditLog(
-        user_id=user.id,
-        action_type='register',
-        entity_type='user',
-        entity_id=user.id,
-        ip_address=request.remote_addr
-    )
-    db.session.add(audit)
+    # Audit log (sync: commits together with the user)
+    record_audit('register', user_id=user.id, entity_type='user', entity_id=user.id)
     db.session.commit()
     
     token = user.generate_token()
     
-    return jsonify({
+    return json_response({
         'message': 'User registered successfully',
         'token': token,
-        'user': {
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'role': user.role
-        }
+        'user': USER_BRIEF.dump(user)
     }), 201
 
 @bp.route('/login', methods=['POST'])
@@ -110,66 +126,35 @@ def login():
     data = request.get_json()
     
     if not data.get('email') or not data.get('password'):
-        return jsonify({'error': 'Email and password required'}), 400
+        return json_response({'error': 'Email and password required'}), 400
     
     user = User.query.filter_by(email=data['email']).first()
     
     if not user or not user.check_password(data['password']):
-        return jsonify({'error': 'Invalid credentials'}), 401
+        return json_response({'error': 'Invalid credentials'}), 401
     
-    # Update last login
+    # Update last login; the audit event rides along (or is batched), one commit at most
     user.last_login = datetime.utcnow()
-    db.session.commit()
-    
-    # Audit log
-    audit = AuditLog(
-        user_id=user.id,
-        action_type='login',
-        entity_type='user',
-        entity_id=user.id,
-        ip_address=request.remote_addr,
-        user_agent=request.headers.get('User-Agent')
-    )
-    db.session.add(audit)
+    record_audit('login', user_id=user.id, entity_type='user', entity_id=user.id)
     db.session.commit()
     
     token = user.generate_token()
     
-    return jsonify({
+    return json_response({
         'message': 'Login successful',
         'token': token,
-        'user': {
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'role': user.role,
-            'profile_image': user.profile_image,
-            'safety_score': user.safety_score,
-            'travel_style': user.travel_style
-        }
+        'user': USER_SESSION.dump(user)
     }), 200
 
 @bp.route('/me', methods=['GET'])
 @token_required
 def get_profile(current_user):
-    """Get current user profile"""
-    return jsonify({
-        'user': {
-            'id': current_user.id,
-            'email': current_user.email,
-            'full_name': current_user.full_name,
-            'phone': current_user.phone,
-            'role': current_user.role,
-            'profile_image': current_user.profile_image,
-            'travel_style': current_user.travel_style,
-            'pace_preference': current_user.pace_preference,
-            'food_preferences': current_user.food_preferences,
-            'interests': current_user.interests,
-            'safety_score': current_user.safety_score,
-            'total_trips': current_user.total_trips,
-            'total_bookings': current_user.total_bookings,
-            'member_since': current_user.member_since.isoformat() if current_user.member_since else None
-        }
+    """Get current user profile (?fields= for a subset)"""
+    user = User.query.with_entities(*(getattr(User, name) for name in USER_PROFILE.names))\
+        .filter_by(id=current_user.id)\
+        .first_or_404()
+    return json_response({
+        'user': USER_PROFILE.dump(user, USER_PROFILE.fields_param())
     }), 200
 
 @bp.route('/me', methods=['PUT'])
@@ -177,6 +162,7 @@ def get_profile(current_user):
 def update_profile(current_user):
     """Update user profile"""
     data = request.get_json()
+    user = User.query.get_or_404(current_user.id)
     
     # Update allowed fields
     updatable_fields = [
@@ -187,11 +173,11 @@ def update_profile(current_user):
     
     for field in updatable_fields:
         if field in data:
-            setattr(current_user, field, data[field])
+            setattr(user, field, data[field])
     
     db.session.commit()
     
-    return jsonify({'message': 'Profile updated successfully'}), 200
+    return json_response({'message': 'Profile updated successfully'}), 200
 
 @bp.route('/verify', methods=['POST'])
 @token_required
@@ -199,7 +185,20 @@ def verify_account(current_user):
     """Submit verification documents"""
     data = request.get_json()
     
-    current_user.verification_documents = data.get('documents', {})
+    user = User.query.get_or_404(current_user.id)
+    user.verification_documents = data.get('documents', {})
     db.session.commit()
     
-    return jsonify({'message': 'Verification documents submitted'}), 200
+    return json_response({'message': 'Verification documents submitted'}), 200
+
+@bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def principal_cache_statistics():
+    """Hit/miss counters for the token_required principal cache (this worker)"""
+    return json_response(principal_cache_stats.snapshot()), 200
+
+@bp.route('/hashing-stats', methods=['GET'])
+@admin_required
+def password_hashing_statistics():
+    """Queue depth and bcrypt latency of the password hashing pool (this worker)"""
+    return json_response(password_stats.snapshot()), 200
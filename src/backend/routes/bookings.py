@@ -1,3 +1,88 @@
-"""BOOKING ROUTES"""
-from flask import Blueprint
+"""
+BOOKING ROUTES
+Contention-safe booking creation with idempotent retries
+"""
+
+from flask import Blueprint, request
+from backend.routes.auth import token_required
+from backend.reservations import book_room, load_room_type, replayed_booking, IdempotencyConflict, \
+    IDEMPOTENCY_KEY_LENGTH, MAX_NIGHTS
+from backend.inventory import InventoryUnavailable
+from backend.audit import record_audit
+from backend.serialization import json_response
+from datetime import datetime, date
+
 bp = Blueprint('bookings', __name__)
+
+@bp.route('/', methods=['POST'])
+@token_required
+def create_booking(current_user):
+    """
+    BOOK A ROOM
+    Body: room_type_id, check_in, check_out, guests (optional hotel_id,
+    guest_details, payment_method). Retries carrying the same Idempotency-Key
+    header return the original booking (200, Idempotent-Replayed: true)
+    instead of booking again.
+    """
+    data = request.get_json(silent=True) or {}
+    
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_LENGTH:
+        return json_response({'error': f'Idempotency-Key must be 1-{IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+    
+    # Validation
+    required_fields = ['room_type_id', 'check_in', 'check_out']
+    if not all(field in data for field in required_fields):
+        return json_response({'error': 'Missing required fields'}), 400
+    
+    try:
+        room_type_id = int(data['room_type_id'])
+        guests = int(data.get('guests', 1))
+        hotel_id = int(data['hotel_id']) if data.get('hotel_id') is not None else None
+        check_in = datetime.strptime(data['check_in'], '%Y-%m-%d').date()
+        check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return json_response({'error': 'Invalid room type, hotel, guests or dates (YYYY-MM-DD)'}), 400
+    
+    if check_in < date.today() or not 0 < (check_out - check_in).days <= MAX_NIGHTS:
+        return json_response({'error': f'Stays start today or later and last 1-{MAX_NIGHTS} nights'}), 400
+    
+    # Room type, its hotel and free rooms in one read, before any lock is taken
+    loaded = load_room_type(room_type_id, check_in, check_out)
+    if loaded is None or hotel_id not in (None, loaded[0].hotel_id):
+        return json_response({'error': 'Room type not found'}), 404
+    room_type, free_rooms = loaded
+    
+    if not 0 < guests <= room_type.max_occupancy:
+        return json_response({'error': f'Room type sleeps 1-{room_type.max_occupancy} guests'}), 400
+    
+    try:
+        if free_rooms == 0:
+            # Sold out as of the read: skip the row locks. A retry whose
+            # original took one of the last rooms still gets its booking back
+            booking = idempotency_key and replayed_booking(
+                current_user.id, idempotency_key, room_type_id, check_in, check_out, guests)
+            if not booking:
+                raise InventoryUnavailable(room_type_id, check_in, check_out)
+            created = False
+        else:
+            booking, created = book_room(
+                current_user.id, room_type, check_in, check_out, guests,
+                idempotency_key=idempotency_key,
+                guest_details=data.get('guest_details'),
+                payment_method=data.get('payment_method')
+            )
+    except InventoryUnavailable as error:
+        return json_response({'error': str(error)}), 409
+    except IdempotencyConflict as error:
+        return json_response({'error': str(error)}), 422
+    
+    if not created:
+        response = json_response({'booking': booking})
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response, 200
+    
+    # Batched audit event, written after the booking committed
+    record_audit('booking_create', user_id=current_user.id, entity_type='booking', entity_id=booking['id'],
+                 new_values={'booking_reference': booking['booking_reference']})
+    return json_response({'booking': booking}), 201
@@ -1,16 +1,30 @@
 """DESTINATION ROUTES"""
-from flask import Blueprint, jsonify
-from backend.models import Destination
-from backend.app import cache
+from flask import Blueprint, request, Response
+from backend.catalog import catalog_version, catalog_etag, catalog_bodies
 
 bp = Blueprint('destinations', __name__)
 
 @bp.route('/', methods=['GET'])
-@cache.cached(timeout=600)
 def get_destinations():
-    destinations = Destination.query.all()
-    return jsonify({'destinations': [{
-        'id': d.id, 'name': d.name, 'state': d.state,
-        'category': d.category, 'popularity_score': d.popularity_score,
-        'hero_image': d.hero_image, 'description': d.description
-    } for d in destinations]}), 200
+    encoding = 'gzip' if request.accept_encodings['gzip'] else None
+    version = catalog_version()
+    etag = catalog_etag(version, encoding)
+
+    # Revalidation needs only the version token: no DB, no body
+    if request.if_none_match.contains_weak(etag):
+        return catalog_response(etag, encoding, None)
+    return catalog_response(etag, encoding, catalog_bodies(version)[encoding or 'identity'])
+
+def catalog_response(etag, encoding, body):
+    """Catalog response for a body in `encoding`; None: 304 Not Modified"""
+    if body is None:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.no_cache = True
+    return response
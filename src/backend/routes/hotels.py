@@ -3,75 +3,160 @@ HOTEL SEARCH & MANAGEMENT
 Advanced filtering, pagination, dynamic pricing
 """
 
-from flask import Blueprint, request, jsonify
-from backend.models import Hotel, RoomType, Review, Destination
-from backend.app import db, cache
-from sqlalchemy import and_, or_, func
+from flask import Blueprint, request, abort, Response, stream_with_context
+from backend.models import Hotel, RoomType, Review
+from backend.app import db
+from backend.pricing import StayPricing
+from backend.search import fetch_hotel_page, fetch_hotel_keyset_page, fetch_search_rooms, apply_search_sort
+from backend.pagination import encode_cursor, decode_cursor, estimate_count, page_size, InvalidCursor, \
+    InvalidPageSize, TOTAL_MODES, TOTAL_EXACT, TOTAL_ESTIMATE, TOTAL_NONE
+from backend.inventory import count_available_rooms, nightly_availability
+from backend.search_cache import canonical_search, search_cache_key, search_scope, get_cached_search, cache_search, \
+    InvalidSearch, stats as search_cache_stats
+from backend.geo import hotel_geo_index
+from backend.amenities import split_amenity_filter, has_amenities
+from backend.ratings import rating_summary
+from backend.hotel_fragments import hotel_fragments, with_review_authors, INFO, ROOMS, REVIEWS
+from backend.instrumentation import query_budget
+from backend.db_routing import read_from_primary
+from backend.routes.auth import admin_required
+from backend.serialization import json_response, project, dumps
+from backend.schemas import HOTEL_SEARCH, HOTEL_GEO, HOTEL_DETAIL, ROOM_OFFER, REVIEW
+from sqlalchemy import and_, or_, func, tuple_
 from datetime import datetime, timedelta
 import math
 
 bp = Blueprint('hotels', __name__)
 
-def calculate_dynamic_price(room, check_in_date, check_out_date):
+# Hotels priced per round trip in streaming mode
+SEARCH_STREAM_CHUNK = 25
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def _priced_hotels(hotels, guests, check_in_date, check_out_date, min_price, max_price, chunk_size):
     """
-    INTELLIGENT DYNAMIC PRICING ENGINE
-    Factors: Day of week, season, demand, events, booking window
+    Price search page rows chunk_size hotels at a time and yield the result
+    of every hotel with a bookable room in the price range. Each chunk costs
+    one rooms query plus, with dates, one inventory ledger query.
     """
-    base_price = room.base_price
-    total_price = 0
+    if check_in_date and check_out_date:
+        pricing = StayPricing(check_in_date, check_out_date)
+        nights = pricing.nights
     
-    current_date = check_in_date
-    while current_date < check_out_date:
-        day_price = base_price
-        
-        # Weekend pricing
-        if current_date.weekday() >= 5:  # Saturday or Sunday
-            day_price *= room.weekend_multiplier
+    for start in range(0, len(hotels), chunk_size):
+        chunk = hotels[start:start + chunk_size]
+        rooms_by_hotel = fetch_search_rooms([hotel.id for hotel in chunk], guests)
+        candidates = [(hotel, rooms_by_hotel[hotel.id]) for hotel in chunk]
         
-        # Peak season (Dec, Jan, Apr, May for India)
-        if current_date.month in [12, 1, 4, 5]:
-            day_price *= room.peak_season_multiplier
+        if check_in_date and check_out_date:
+            # Drop rooms sold out on any night of the stay
+            free = count_available_rooms([room for _, rooms in candidates for room in rooms], check_in_date, check_out_date)
+            candidates = [(hotel, [room for room in rooms if free[room.id] > 0]) for hotel, rooms in candidates]
+            totals = iter(pricing.price([room_type for _, rooms in candidates for room_type in rooms]))
         
-        # Last-minute booking premium
-        days_until_checkin = (check_in_date - datetime.now().date()).days
-        if days_until_checkin < 7:
-            day_price *= 1.15
-        elif days_until_checkin > 60:
-            day_price *= 0.9  # Early bird discount
-        
-        total_price += day_price
-        current_date += timedelta(days=1)
-    
-    return round(total_price, 2)
+        for hotel, rooms in candidates:
+            available_rooms = []
+            for room_type in rooms:
+                # Calculate price
+                if check_in_date and check_out_date:
+                    total_price = next(totals)
+                    price_per_night = total_price / nights if nights > 0 else room_type.base_price
+                else:
+                    total_price = room_type.base_price
+                    price_per_night = room_type.base_price
+                
+                # Check if within price range
+                if min_price <= price_per_night <= max_price:
+                    available_rooms.append(ROOM_OFFER.dump(
+                        room_type,
+                        price_per_night=round(price_per_night, 2),
+                        total_price=round(total_price, 2) if check_in_date else None
+                    ))
+            
+            if available_rooms:  # Only include hotels with available rooms
+                yield HOTEL_SEARCH.dump(
+                    hotel,
+                    available_rooms=available_rooms,
+                    min_price_per_night=min([r['price_per_night'] for r in available_rooms])
+                )
+
+def _ndjson(record):
+    return dumps(record) + b'\n'
+
+def _stream_trailer(pagination, facets):
+    trailer = {'pagination': pagination}
+    if facets is not None:
+        trailer['facets'] = facets
+    return trailer
+
+def _cached_records(cached, only):
+    for hotel in project(cached['hotels'], only):
+        yield _ndjson({'hotel': hotel})
+    yield _ndjson(_stream_trailer(cached['pagination'], cached.get('facets')))
+
+def _ndjson_response(records):
+    response = Response(stream_with_context(records), mimetype=NDJSON_MIMETYPE)
+    response.headers['X-Accel-Buffering'] = 'no'  # let proxies pass records through unbuffered
+    return response
 
 @bp.route('/search', methods=['POST'])
+@query_budget(4)
 def search_hotels():
     """
     ADVANCED HOTEL SEARCH
     Supports: Filters, sorting, pagination, availability checking
     """
     data = request.get_json()
+    try:
+        search = canonical_search(data)
+    except InvalidSearch as e:
+        return json_response({'error': str(e)}), 400
     
-    # Required parameters
-    destination_id = data.get('destination_id')
-    check_in = data.get('check_in')
-    check_out = data.get('check_out')
-    guests = data.get('guests', 1)
+    # Sparse fieldset (?fields=id,name,min_price_per_night) applies on the way out,
+    # so every field selection shares one cached result
+    only = HOTEL_SEARCH.fields_param()
     
-    # Pagination
-    page = data.get('page', 1)
-    per_page = data.get('per_page', 20)
+    # Streaming mode (body "stream": true or Accept: application/x-ndjson): one
+    # NDJSON record per hotel as soon as it is priced, pagination/facets last
+    stream = bool(data.get('stream')) or \
+        request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+    
+    # Serve repeated searches from the per-destination result cache
+    cache_key = search_cache_key(search)
+    cached = get_cached_search(cache_key)
+    if cached is not None:
+        if stream:
+            return _ndjson_response(_cached_records(cached, only))
+        return json_response({**cached, 'hotels': project(cached['hotels'], only)}), 200
+    if not stream:
+        # This page gets cached: read it from the primary, not a lagging replica
+        read_from_primary()
+    
+    # Required parameters (validated and defaulted by canonical_search)
+    destination_id = search['destination_id']
+    check_in = search['check_in']
+    check_out = search['check_out']
+    guests = search['guests']
+    
+    # Pagination: offset (default) or keyset via an opaque cursor
+    page = search['page']
+    per_page = search['per_page']
+    cursor = search['cursor']
+    cursor_mode = bool(cursor) or search['pagination'] == 'cursor'
+    include_total = search['include_total'] or TOTAL_NONE  # cursor mode: exact, estimate, none
+    if include_total not in TOTAL_MODES:
+        return json_response({'error': f"include_total must be one of {', '.join(TOTAL_MODES)}"}), 400
     
     # Filters
-    min_price = data.get('min_price', 0)
-    max_price = data.get('max_price', 1000000)
-    star_rating = data.get('star_rating')  # Array: [3, 4, 5]
-    property_types = data.get('property_types')  # Array: ['hotel', 'resort']
-    amenities = data.get('amenities', [])  # Array: ['wifi', 'pool']
-    min_rating = data.get('min_rating', 0)
+    min_price = search['min_price']
+    max_price = search['max_price']
+    star_rating = search['star_rating']  # Array: [3, 4, 5]
+    property_types = search['property_types']  # Array: ['hotel', 'resort']
+    amenities = search['amenities']  # Array: ['wifi', 'pool']
+    min_rating = search['min_rating']
     
     # Sort
-    sort_by = data.get('sort_by', 'popularity')  # popularity, price_low, price_high, rating
+    sort_by = search['sort_by']  # popularity, price_low, price_high, rating
     
     # Build query
     query = Hotel.query.filter_by(destination_id=destination_id)
@@ -86,153 +171,162 @@ def search_hotels():
     if min_rating:
         query = query.filter(Hotel.overall_rating >= min_rating)
     
-    # Amenities filter (JSON field)
-    for amenity in amenities:
+    # Amenities filter: one array containment test on the GIN-indexed mask bits
+    amenity_bits, unmapped_amenities = split_amenity_filter(amenities)
+    if amenity_bits:
+        query = query.filter(has_amenities(amenity_bits))
+    for amenity in unmapped_amenities:  # amenities without a bit yet (JSON field)
         query = query.filter(Hotel.amenities[amenity].astext == 'true')
     
     # Price range filter (will filter after calculating dynamic prices)
     
-    # Sorting
-    if sort_by == 'price_low':
-        query = query.order_by(Hotel.base_price_per_night.asc())
-    elif sort_by == 'price_high':
-        query = query.order_by(Hotel.base_price_per_night.desc())
-    elif sort_by == 'rating':
-        query = query.order_by(Hotel.overall_rating.desc())
-    else:  # popularity
-        query = query.order_by(Hotel.total_bookings.desc())
+    # Sorting (active sort key, then id)
+    query = apply_search_sort(query, sort_by)
     
-    # Execute query with pagination
-    paginated_hotels = query.paginate(page=page, per_page=per_page, error_out=False)
+    if cursor_mode:
+        # Keyset page; exact totals and facets only on the first page when asked for
+        cursor_scope = search_scope(search)
+        try:
+            after = decode_cursor(cursor, cursor_scope) if cursor else None
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}), 400
+        
+        hotels, next_after, total, facets = fetch_hotel_keyset_page(
+            query, sort_by, per_page, after=after,
+            with_summary=(include_total == TOTAL_EXACT and after is None)
+        )
+        if include_total == TOTAL_ESTIMATE:
+            total = estimate_count(query)
+    else:
+        # Execute query with pagination (page, total count and facets in one round trip)
+        hotels, total, total_pages, facets = fetch_hotel_page(query, page, per_page)
     
-    # Process results with availability and dynamic pricing
-    results = []
     check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date() if check_in else None
     check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date() if check_out else None
     
-    for hotel in paginated_hotels.items:
-        # Get available rooms
-        available_rooms = []
-        for room_type in hotel.rooms:
-            if room_type.max_occupancy >= guests:
-                # Calculate price
-                if check_in_date and check_out_date:
-                    total_price = calculate_dynamic_price(room_type, check_in_date, check_out_date)
-                    nights = (check_out_date - check_in_date).days
-                    price_per_night = total_price / nights if nights > 0 else room_type.base_price
-                else:
-                    total_price = room_type.base_price
-                    price_per_night = room_type.base_price
-                
-                # Check if within price range
-                if min_price <= price_per_night <= max_price:
-                    available_rooms.append({
-                        'id': room_type.id,
-                        'name': room_type.name,
-                        'max_occupancy': room_type.max_occupancy,
-                        'price_per_night': round(price_per_night, 2),
-                        'total_price': round(total_price, 2) if check_in_date else None,
-                        'amenities': room_type.amenities
-                    })
-        
-        if available_rooms:  # Only include hotels with available rooms
-            results.append({
-                'id': hotel.id,
-                'name': hotel.name,
-                'brand': hotel.brand,
-                'property_type': hotel.property_type,
-                'star_rating': hotel.star_rating,
-                'overall_rating': hotel.overall_rating,
-                'total_reviews': hotel.total_reviews,
-                'address': hotel.address,
-                'zone': hotel.zone,
-                'images': hotel.images[:3] if hotel.images else [],
-                'amenities': hotel.amenities,
-                'available_rooms': available_rooms,
-                'min_price_per_night': min([r['price_per_night'] for r in available_rooms]),
-                'safety_rating': hotel.safety_rating,
-                'hygiene_rating': hotel.hygiene_rating
-            })
-    
-    return jsonify({
-        'hotels': results,
-        'pagination': {
+    def pagination_for(result_count):
+        if cursor_mode:
+            pagination = {
+                'mode': 'cursor',
+                'per_page': per_page,
+                'next_cursor': encode_cursor(cursor_scope, *next_after) if next_after else None,
+                'has_more': next_after is not None
+            }
+            if total is not None:
+                pagination['total'] = total
+                pagination['total_is_estimate'] = include_total == TOTAL_ESTIMATE
+            return pagination
+        return {
             'page': page,
             'per_page': per_page,
-            'total': len(results),
-            'total_pages': paginated_hotels.pages
+            'total': result_count,
+            'total_pages': total_pages
         }
-    }), 200
+    
+    if stream:
+        # Price and emit chunk by chunk; not cached, since that would mean holding the page
+        def records():
+            count = 0
+            for hotel in _priced_hotels(hotels, guests, check_in_date, check_out_date,
+                                        min_price, max_price, SEARCH_STREAM_CHUNK):
+                count += 1
+                yield _ndjson({'hotel': project([hotel], only)[0]})
+            yield _ndjson(_stream_trailer(pagination_for(count), facets))
+        return _ndjson_response(records())
+    
+    # Rooms, availability and prices for the whole page in one pass (two round trips)
+    results = list(_priced_hotels(hotels, guests, check_in_date, check_out_date,
+                                  min_price, max_price, max(len(hotels), 1)))
+    
+    payload = {
+        'hotels': results,
+        'pagination': pagination_for(len(results))
+    }
+    if facets is not None:
+        payload['facets'] = facets
+    cache_search(cache_key, payload)
+    
+    return json_response({**payload, 'hotels': project(results, only)}), 200
+
+@bp.route('/search/cache-stats', methods=['GET'])
+@admin_required
+def search_cache_statistics():
+    """Hit/miss counters for the search result cache (this worker)"""
+    return json_response(search_cache_stats.snapshot()), 200
+
+# Geo search limits
+MAX_NEAREST = 100
+MAX_RADIUS_KM = 50
+
+def _geo_results(matches):
+    """Hotel summaries for [(hotel_id, distance_km)] in match order"""
+    if not matches:
+        return []
+    
+    rows = Hotel.query.with_entities(
+        Hotel.id, Hotel.name, Hotel.brand, Hotel.property_type, Hotel.star_rating,
+        Hotel.overall_rating, Hotel.base_price_per_night, Hotel.zone,
+        Hotel.latitude, Hotel.longitude, Hotel.destination_id
+    ).filter(Hotel.id.in_([hotel_id for hotel_id, _ in matches])).all()
+    hotels = {row.id: row for row in rows}
+    
+    only = HOTEL_GEO.fields_param()
+    return [
+        HOTEL_GEO.dump(hotel, only, distance_km=round(distance, 3))
+        for hotel_id, distance in matches if (hotel := hotels.get(hotel_id))
+    ]
+
+def _geo_point():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+@bp.route('/nearby', methods=['GET'])
+def nearby_hotels():
+    """k nearest hotels to a point (?lat=&lon=&k=&destination_id=)"""
+    point = _geo_point()
+    if point is None:
+        return json_response({'error': 'Valid lat and lon are required'}), 400
+    
+    k = min(max(request.args.get('k', 10, type=int), 1), MAX_NEAREST)
+    destination_id = request.args.get('destination_id', type=int)
+    
+    matches = hotel_geo_index.get(destination_id).nearest(point[0], point[1], k)
+    return json_response({'hotels': _geo_results(matches)}), 200
+
+@bp.route('/within', methods=['GET'])
+def hotels_within_radius():
+    """Hotels within radius_km of a point, nearest first (?lat=&lon=&radius_km=&limit=&destination_id=)"""
+    point = _geo_point()
+    if point is None:
+        return json_response({'error': 'Valid lat and lon are required'}), 400
+    
+    radius_km = request.args.get('radius_km', 2.0, type=float)
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        return json_response({'error': f'radius_km must be between 0 and {MAX_RADIUS_KM}'}), 400
+    
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_NEAREST)
+    destination_id = request.args.get('destination_id', type=int)
+    
+    matches = hotel_geo_index.get(destination_id).within(point[0], point[1], radius_km, limit=limit)
+    return json_response({'hotels': _geo_results(matches), 'radius_km': radius_km}), 200
 
 @bp.route('/<int:hotel_id>', methods=['GET'])
-@cache.cached(timeout=300, query_string=True)
 def get_hotel_details(hotel_id):
     """Get detailed hotel information"""
-    hotel = Hotel.query.get_or_404(hotel_id)
+    # Info, rooms and latest reviews are cached independently; only the
+    # fragments invalidated by recent writes are rebuilt
+    only = HOTEL_DETAIL.fields_param()
+    fragments = hotel_fragments(hotel_id)
+    if fragments is None:
+        abort(404)
     
-    # Get reviews
-    reviews = Review.query.filter_by(hotel_id=hotel_id)\
-        .order_by(Review.created_at.desc())\
-        .limit(10)\
-        .all()
-    
-    # Get destination info
-    destination = Destination.query.get(hotel.destination_id)
-    
-    return jsonify({
-        'hotel': {
-            'id': hotel.id,
-            'name': hotel.name,
-            'brand': hotel.brand,
-            'property_type': hotel.property_type,
-            'star_rating': hotel.star_rating,
-            'address': hotel.address,
-            'zone': hotel.zone,
-            'latitude': hotel.latitude,
-            'longitude': hotel.longitude,
-            'overall_rating': hotel.overall_rating,
-            'total_reviews': hotel.total_reviews,
-            'safety_rating': hotel.safety_rating,
-            'hygiene_rating': hotel.hygiene_rating,
-            'sustainability_score': hotel.sustainability_score,
-            'amenities': hotel.amenities,
-            'images': hotel.images,
-            'videos': hotel.videos,
-            'virtual_tour_url': hotel.virtual_tour_url,
-            'check_in_time': hotel.check_in_time,
-            'check_out_time': hotel.check_out_time,
-            'cancellation_policy': hotel.cancellation_policy,
-            'allows_pets': hotel.allows_pets,
-            'is_verified': hotel.is_verified,
-            'rooms': [{
-                'id': room.id,
-                'name': room.name,
-                'description': room.description,
-                'max_occupancy': room.max_occupancy,
-                'bed_type': room.bed_type,
-                'room_size_sqft': room.room_size_sqft,
-                'base_price': room.base_price,
-                'amenities': room.amenities,
-                'images': room.images,
-                'total_rooms': room.total_rooms
-            } for room in hotel.rooms],
-            'destination': {
-                'id': destination.id,
-                'name': destination.name
-            } if destination else None
-        },
-        'reviews': [{
-            'id': review.id,
-            'user_name': review.user.full_name,
-            'overall_rating': review.overall_rating,
-            'review_title': review.review_title,
-            'review_text': review.review_text,
-            'cleanliness_rating': review.cleanliness_rating,
-            'service_rating': review.service_rating,
-            'location_rating': review.location_rating,
-            'created_at': review.created_at.isoformat(),
-            'is_verified_stay': review.is_verified_stay
-        } for review in reviews]
+    hotel = {**fragments[INFO], 'rooms': fragments[ROOMS]}
+    return json_response({
+        'hotel': project([hotel], only)[0],
+        'reviews': fragments[REVIEWS]
     }), 200
 
 @bp.route('/<int:hotel_id>/availability', methods=['POST'])
@@ -243,69 +337,98 @@ def check_availability(hotel_id):
     check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
     
     hotel = Hotel.query.get_or_404(hotel_id)
+    room_types = hotel.rooms.order_by(RoomType.id).all()
     
-    available_rooms = []
-    for room_type in hotel.rooms:
-        # Count existing bookings for this room type
-        from backend.models import Booking
-        booked_rooms = db.session.query(func.count(Booking.id))\
-            .filter(
-                Booking.room_type_id == room_type.id,
-                Booking.booking_status == 'confirmed',
-                or_(
-                    and_(Booking.check_in_date <= check_in, Booking.check_out_date > check_in),
-                    and_(Booking.check_in_date < check_out, Booking.check_out_date >= check_out),
-                    and_(Booking.check_in_date >= check_in, Booking.check_out_date <= check_out)
-                )
-            ).scalar()
-        
-        available_count = room_type.total_rooms - booked_rooms
+    # Free rooms per night from the inventory ledger, one query for all room types
+    by_night = nightly_availability(room_types, check_in, check_out)
+    
+    pricing = StayPricing(check_in, check_out)
+    totals = pricing.price(room_types)
+    nights = pricing.nights
+    
+    results = []
+    for room_type, total_price in zip(room_types, totals):
+        available_count = min((free for _, free in by_night[room_type.id]), default=room_type.total_rooms)
         
         if available_count > 0:
-            total_price = calculate_dynamic_price(room_type, check_in, check_out)
-            nights = (check_out - check_in).days
-            
-            available_rooms.append({
+            results.append({
                 'room_type_id': room_type.id,
                 'name': room_type.name,
                 'available_count': available_count,
+                'available_by_night': {night.isoformat(): free for night, free in by_night[room_type.id]},
                 'total_price': total_price,
                 'price_per_night': round(total_price / nights, 2),
                 'nights': nights
             })
     
-    return jsonify({'available_rooms': available_rooms}), 200
+    return json_response({'available_rooms': results}), 200
+
+@bp.route('/<int:hotel_id>/ratings', methods=['GET'])
+def get_hotel_ratings(hotel_id):
+    """Per-dimension rating averages and 1-5 star histogram"""
+    return json_response({'hotel_id': hotel_id, 'ratings': rating_summary(hotel_id)}), 200
 
 @bp.route('/<int:hotel_id>/reviews', methods=['GET'])
 def get_hotel_reviews(hotel_id):
-    """Get paginated reviews for a hotel"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    
-    reviews = Review.query.filter_by(hotel_id=hotel_id)\
-        .order_by(Review.created_at.desc())\
-        .paginate(page=page, per_page=per_page, error_out=False)
-    
-    return jsonify({
-        'reviews': [{
-            'id': review.id,
-            'user_name': review.user.full_name,
-            'overall_rating': review.overall_rating,
-            'review_title': review.review_title,
-            'review_text': review.review_text,
-            'cleanliness_rating': review.cleanliness_rating,
-            'service_rating': review.service_rating,
-            'location_rating': review.location_rating,
-            'value_for_money_rating': review.value_for_money_rating,
-            'images': review.images,
-            'created_at': review.created_at.isoformat(),
-            'is_verified_stay': review.is_verified_stay,
-            'helpfulness_score': review.helpfulness_score
-        } for review in reviews.items],
-        'pagination': {
+    """
+    Get paginated reviews for a hotel, newest first.
+    Offset mode: ?page=&per_page=. Cursor mode: ?mode=cursor or ?cursor=<next_cursor>,
+    with ?total=exact|estimate|none (default none).
+    """
+    try:
+        per_page = page_size(request.args)
+    except InvalidPageSize as e:
+        return json_response({'error': str(e)}), 400
+    cursor = request.args.get('cursor')
+    only = REVIEW.fields_param()
+    
+    query = with_review_authors(Review.query.filter_by(hotel_id=hotel_id))
+    
+    if cursor or request.args.get('mode') == 'cursor':
+        include_total = request.args.get('total', TOTAL_NONE)
+        if include_total not in TOTAL_MODES:
+            return json_response({'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+        
+        cursor_scope = f'reviews:{hotel_id}'
+        try:
+            after = decode_cursor(cursor, cursor_scope) if cursor else None
+        except InvalidCursor as e:
+            return json_response({'error': str(e)}), 400
+        
+        page_query = query
+        if after:
+            page_query = page_query.filter(tuple_(Review.created_at, Review.id) < tuple_(*after))
+        items = page_query.order_by(Review.created_at.desc(), Review.id.desc())\
+            .limit(per_page + 1)\
+            .all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
+        
+        pagination = {
+            'mode': 'cursor',
+            'per_page': per_page,
+            'next_cursor': encode_cursor(cursor_scope, items[-1].created_at, items[-1].id) if has_more else None,
+            'has_more': has_more
+        }
+        if include_total == TOTAL_EXACT:
+            pagination['total'] = query.order_by(None).count()
+        elif include_total == TOTAL_ESTIMATE:
+            pagination['total'] = estimate_count(query)
+        if include_total != TOTAL_NONE:
+            pagination['total_is_estimate'] = include_total == TOTAL_ESTIMATE
+    else:
+        page = request.args.get('page', 1, type=int)
+        reviews = query.order_by(Review.created_at.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+        items = reviews.items
+        pagination = {
             'page': page,
             'per_page': per_page,
             'total': reviews.total,
             'pages': reviews.pages
         }
+    
+    return json_response({
+        'reviews': REVIEW.dump_many(items, only),
+        'pagination': pagination
     }), 200
@@ -0,0 +1,35 @@
+"""SEARCH ROUTES"""
+from flask import Blueprint, request
+from backend.autocomplete import suggestion_index, KINDS, MAX_SUGGESTIONS, MAX_QUERY_LENGTH
+from backend.serialization import json_response
+
+bp = Blueprint('search', __name__)
+
+@bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Search-as-you-type over destination, hotel, brand and activity names.
+    ?q=<typed prefix>&limit=10&types=destination,hotel
+    """
+    query = request.args.get('q', '')
+    if len(query) > MAX_QUERY_LENGTH:
+        return json_response({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+    
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_SUGGESTIONS)
+    
+    kinds = KINDS
+    if request.args.get('types'):
+        kinds = tuple(kind.strip() for kind in request.args['types'].split(','))
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            return json_response({'error': f"types must be among {', '.join(KINDS)}"}), 400
+    
+    return json_response({
+        'query': query,
+        'suggestions': [{
+            'type': entry.kind,
+            'id': entry.ident,
+            'name': entry.label,
+            'destination_id': entry.destination_id
+        } for entry in suggestion_index.suggest(query, limit, kinds)]
+    }), 200
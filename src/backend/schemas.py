@@ -0,0 +1,102 @@
+"""
+API SCHEMAS
+Output fields per model and per view, shared by the route modules
+"""
+
+from backend.serialization import Schema
+
+# ============================================================
+# HOTELS
+# ============================================================
+
+HOTEL = Schema(
+    'id', 'name', 'brand', 'property_type', 'star_rating', 'address', 'zone',
+    'latitude', 'longitude', 'overall_rating', 'total_reviews', 'safety_rating',
+    'hygiene_rating', 'sustainability_score', 'amenities', 'images', 'videos',
+    'virtual_tour_url', 'check_in_time', 'check_out_time', 'cancellation_policy',
+    'allows_pets', 'is_verified'
+)
+
+# Details page: HOTEL plus the fragments assembled around it
+HOTEL_DETAIL = HOTEL.extend('destination', 'rooms')
+
+HOTEL_SEARCH = Schema(
+    'id', 'name', 'brand', 'property_type', 'star_rating', 'overall_rating',
+    'total_reviews', 'address', 'zone', ('images', lambda hotel: hotel.images or []),
+    'amenities', 'available_rooms', 'min_price_per_night', 'safety_rating',
+    'hygiene_rating'
+)
+
+HOTEL_GEO = Schema(
+    'id', 'name', 'brand', 'property_type', 'star_rating', 'overall_rating',
+    'base_price_per_night', 'zone', 'latitude', 'longitude', 'destination_id',
+    'distance_km'
+)
+
+# ============================================================
+# ROOMS
+# ============================================================
+
+ROOM_TYPE = Schema(
+    'id', 'name', 'description', 'max_occupancy', 'bed_type', 'room_size_sqft',
+    'base_price', 'amenities', 'images', 'total_rooms'
+)
+
+ROOM_OFFER = Schema(
+    'id', 'name', 'max_occupancy', 'price_per_night', 'total_price', 'amenities'
+)
+
+# ============================================================
+# REVIEWS (rows carry the joined author name as user_name)
+# ============================================================
+
+REVIEW = Schema(
+    'id', 'user_name', 'overall_rating', 'review_title', 'review_text',
+    'cleanliness_rating', 'service_rating', 'location_rating',
+    'value_for_money_rating', 'images', 'created_at', 'is_verified_stay',
+    'helpfulness_score'
+)
+
+REVIEW_SUMMARY = REVIEW.subset(
+    'id', 'user_name', 'overall_rating', 'review_title', 'review_text',
+    'cleanliness_rating', 'service_rating', 'location_rating', 'created_at',
+    'is_verified_stay'
+)
+
+# ============================================================
+# USERS
+# ============================================================
+
+USER_PROFILE = Schema(
+    'id', 'email', 'full_name', 'phone', 'role', 'profile_image', 'travel_style',
+    'pace_preference', 'food_preferences', 'interests', 'safety_score',
+    'total_trips', 'total_bookings', 'member_since'
+)
+
+USER_SESSION = USER_PROFILE.subset(
+    'id', 'email', 'full_name', 'role', 'profile_image', 'safety_score', 'travel_style'
+)
+
+USER_BRIEF = USER_PROFILE.subset('id', 'email', 'full_name', 'role')
+
+# ============================================================
+# DESTINATIONS
+# ============================================================
+
+DESTINATION_CATALOG = Schema(
+    'id', 'name', 'state', 'category', 'popularity_score', 'hero_image', 'description'
+)
+
+DESTINATION_REF = DESTINATION_CATALOG.subset('id', 'name')
+
+# ============================================================
+# BOOKINGS
+# ============================================================
+
+BOOKING = Schema(
+    'id', 'booking_reference', 'hotel_id', 'room_type_id', 'check_in_date',
+    'check_out_date', 'number_of_nights', 'number_of_guests', 'guest_details',
+    'room_price_per_night', 'total_room_cost', 'taxes', 'service_charges',
+    'discount', 'final_amount', 'payment_status', 'payment_method',
+    'booking_status', 'created_at'
+)
@@ -0,0 +1,126 @@
+"""
+HOTEL SEARCH DATA ACCESS
+Projection queries that load a search page in two round trips
+"""
+
+from backend.models import Hotel, RoomType
+from backend.amenities import facet_columns, facet_counts
+from sqlalchemy import func, tuple_
+import math
+
+# Only the columns the search response actually uses
+SEARCH_HOTEL_COLUMNS = (
+    Hotel.id, Hotel.name, Hotel.brand, Hotel.property_type, Hotel.star_rating,
+    Hotel.overall_rating, Hotel.total_reviews, Hotel.address, Hotel.zone,
+    Hotel.amenities, Hotel.safety_rating, Hotel.hygiene_rating,
+)
+
+SEARCH_ROOM_COLUMNS = (
+    RoomType.id, RoomType.hotel_id, RoomType.name, RoomType.max_occupancy,
+    RoomType.base_price, RoomType.weekend_multiplier, RoomType.peak_season_multiplier,
+    RoomType.total_rooms, RoomType.amenities,
+)
+
+# Search results show at most three hotel images
+SEARCH_IMAGE_LIMIT = 3
+
+# sort_by -> (sort key, direction); Hotel.id breaks ties so keyset cursors are exact
+SEARCH_SORTS = {
+    'popularity': (func.coalesce(Hotel.total_bookings, 0), 'desc'),
+    'price_low': (Hotel.base_price_per_night, 'asc'),
+    'price_high': (Hotel.base_price_per_night, 'desc'),
+    'rating': (func.coalesce(Hotel.overall_rating, 0.0), 'desc'),
+}
+
+def _sort_spec(sort_by):
+    return SEARCH_SORTS.get(sort_by, SEARCH_SORTS['popularity'])
+
+def apply_search_sort(query, sort_by):
+    """Order by the active sort key, then id in the same direction"""
+    key, direction = _sort_spec(sort_by)
+    if direction == 'asc':
+        return query.order_by(key.asc(), Hotel.id.asc())
+    return query.order_by(key.desc(), Hotel.id.desc())
+
+def _page_columns():
+    return (*SEARCH_HOTEL_COLUMNS, Hotel.images[1:SEARCH_IMAGE_LIMIT].label('images'))
+
+def _summary(query):
+    """Total count and amenity facets for a filtered query, in one aggregate query"""
+    return query.with_entities(
+        func.count().label('total_count'),
+        *facet_columns()
+    ).order_by(None).one()
+
+def fetch_hotel_page(query, page, per_page):
+    """
+    Load one page of hotels plus the total match count and amenity facet
+    counts in a single query. Returns (rows, total, pages, facets); rows
+    expose the SEARCH_HOTEL_COLUMNS names plus `images` (already trimmed
+    to SEARCH_IMAGE_LIMIT).
+    """
+    page = max(page, 1)
+
+    rows = query.with_entities(
+        *_page_columns(),
+        func.count().over().label('total_count'),
+        *facet_columns(window=True)
+    ).limit(per_page).offset((page - 1) * per_page).all()
+
+    # Past the last page the window aggregates have no row to ride on
+    summary = rows[0] if rows else _summary(query)
+
+    total = summary.total_count
+    pages = int(math.ceil(total / per_page)) if total else 0
+    return rows, total, pages, {'amenities': facet_counts(summary)}
+
+def fetch_hotel_keyset_page(query, sort_by, per_page, after=None, with_summary=False):
+    """
+    Keyset page: hotels strictly after `after` = (sort_key, id) in sort order.
+    No OFFSET scan and no COUNT unless with_summary is set, in which case
+    the exact total and facets ride along as window aggregates.
+    Returns (rows, next_after, total, facets); next_after is None on the last page.
+    """
+    key, direction = _sort_spec(sort_by)
+    if after is not None:
+        position = tuple_(key, Hotel.id)
+        bound = tuple_(*after)
+        query = query.filter(position > bound if direction == 'asc' else position < bound)
+
+    columns = [*_page_columns(), key.label('sort_key')]
+    if with_summary:
+        columns += [func.count().over().label('total_count'), *facet_columns(window=True)]
+
+    rows = query.with_entities(*columns).limit(per_page + 1).all()
+    next_after = (rows[per_page - 1].sort_key, rows[per_page - 1].id) if len(rows) > per_page else None
+    rows = rows[:per_page]
+
+    total = facets = None
+    if with_summary:
+        summary = rows[0] if rows else _summary(query)
+        total = summary.total_count
+        facets = {'amenities': facet_counts(summary)}
+
+    return rows, next_after, total, facets
+
+def fetch_search_rooms(hotel_ids, guests):
+    """
+    Load the room types that fit `guests` for every hotel on the page in one query.
+    Returns {hotel_id: [room rows in id order]}.
+    """
+    rooms_by_hotel = {hotel_id: [] for hotel_id in hotel_ids}
+    if not hotel_ids:
+        return rooms_by_hotel
+
+    rooms = RoomType.query.with_entities(*SEARCH_ROOM_COLUMNS)\
+        .filter(
+            RoomType.hotel_id.in_(hotel_ids),
+            RoomType.max_occupancy >= guests
+        )\
+        .order_by(RoomType.hotel_id, RoomType.id)\
+        .all()
+
+    for room in rooms:
+        rooms_by_hotel[room.hotel_id].append(room)
+
+    return rooms_by_hotel
@@ -0,0 +1,227 @@
+"""
+HOTEL SEARCH RESULT CACHE
+Canonical search keys, per-destination generations and hit/miss counters
+"""
+
+from backend.app import cache
+from backend.models import Hotel, RoomType, Booking
+from backend.cache_events import on_commit
+from backend.pagination import MAX_PER_PAGE
+from sqlalchemy import event, select, inspect
+from sqlalchemy.orm import object_session
+from datetime import date, datetime
+import hashlib
+import json
+import math
+import threading
+import uuid
+
+# Upper bound on entry lifetime; writes invalidate long before this
+SEARCH_CACHE_TIMEOUT = 300
+
+# Generations outlive their entries but still expire, since destination ids
+# come from the client and need not exist; a missing one means a rebuild
+GENERATION_TIMEOUT = 3600
+
+class SearchCacheStats:
+    """Process-local hit/miss/invalidation counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+stats = SearchCacheStats()
+
+# ============================================================
+# KEYS
+# ============================================================
+
+class InvalidSearch(ValueError):
+    """A search body field has the wrong type or range (400)"""
+
+def _number(data, name, cast, default, minimum=None, maximum=None):
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidSearch(f'{name} must be a number') from None
+    if not math.isfinite(number) or (minimum is not None and number < minimum):
+        raise InvalidSearch(f'{name} must be a number' + (f' of at least {minimum}' if minimum is not None else ''))
+    if maximum is not None and number > maximum:
+        raise InvalidSearch(f'{name} must be at most {maximum}')
+    return number
+
+def _text(data, name, default=None):
+    value = data.get(name, default)
+    if value is not None and not isinstance(value, str):
+        raise InvalidSearch(f'{name} must be a string')
+    return value
+
+def _day(data, name):
+    value = _text(data, name)
+    if value is not None:
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise InvalidSearch(f'{name} must be a date (YYYY-MM-DD)') from None
+    return value
+
+def _sorted_unique(data, name, kind):
+    values = data.get(name)
+    if not values:
+        return []
+    if not isinstance(values, list):
+        raise InvalidSearch(f'{name} must be a list')
+    if kind is int:
+        try:
+            values = [int(value) for value in values]
+        except (TypeError, ValueError, OverflowError):
+            raise InvalidSearch(f'{name} must be a list of integers') from None
+    elif not all(isinstance(value, str) for value in values):
+        raise InvalidSearch(f'{name} must be a list of strings')
+    return sorted(set(values))
+
+def canonical_search(data):
+    """
+    Normalized form of a search body: defaults filled in, list filters
+    de-duplicated and sorted, so equivalent searches share one cache entry.
+    Today's date is part of it because booking-window pricing depends on it.
+    Raises InvalidSearch for fields of the wrong type or range.
+    """
+    if not isinstance(data, dict):
+        raise InvalidSearch('Search body must be a JSON object')
+    return {
+        'destination_id': _number(data, 'destination_id', int, None),
+        'check_in': _day(data, 'check_in'),
+        'check_out': _day(data, 'check_out'),
+        'guests': _number(data, 'guests', int, 1, minimum=1),
+        'page': _number(data, 'page', int, 1, minimum=1),
+        'per_page': _number(data, 'per_page', int, 20, minimum=1, maximum=MAX_PER_PAGE),
+        'min_price': _number(data, 'min_price', float, 0.0),
+        'max_price': _number(data, 'max_price', float, 1000000.0),
+        'star_rating': _sorted_unique(data, 'star_rating', int),
+        'property_types': _sorted_unique(data, 'property_types', str),
+        'amenities': _sorted_unique(data, 'amenities', str),
+        'min_rating': _number(data, 'min_rating', float, 0.0),
+        'sort_by': _text(data, 'sort_by', 'popularity'),
+        'cursor': _text(data, 'cursor'),
+        'pagination': _text(data, 'pagination'),
+        'include_total': _text(data, 'include_total'),
+        'priced_on': date.today().isoformat()
+    }
+
+def _generation_key(destination_id):
+    return f'search:gen:{destination_id}'
+
+def _generation(destination_id):
+    """Current cache generation for a destination, created on first use"""
+    key = _generation_key(destination_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex[:12], timeout=GENERATION_TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+def _digest(canonical):
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+def search_cache_key(canonical):
+    """Cache key of a canonical_search() result"""
+    destination_id = canonical['destination_id']
+    return f'search:{destination_id}:{_generation(destination_id)}:{_digest(canonical)}'
+
+# Where a request is in the result list, or what it reports about it;
+# not which hotels are listed or in what order
+_POSITION_FIELDS = ('page', 'cursor', 'pagination', 'include_total', 'priced_on')
+
+def search_scope(canonical):
+    """
+    Cursor scope of a canonical_search() result: the search minus its
+    position, so a cursor is only accepted by the search (destination,
+    dates, filters, sort) that issued it
+    """
+    listing = {key: value for key, value in canonical.items() if key not in _POSITION_FIELDS}
+    return f'search:{_digest(listing)[:16]}'
+
+# ============================================================
+# LOOKUP / STORE
+# ============================================================
+
+def get_cached_search(key):
+    payload = cache.get(key)
+    stats.incr('hits' if payload is not None else 'misses')
+    return payload
+
+def cache_search(key, payload):
+    cache.set(key, payload, timeout=SEARCH_CACHE_TIMEOUT)
+
+def invalidate_destination(destination_id):
+    """Start a new generation; every cached search for the destination goes stale"""
+    cache.set(_generation_key(destination_id), uuid.uuid4().hex[:12], timeout=GENERATION_TIMEOUT)
+    stats.incr('invalidations')
+
+# ============================================================
+# WRITE EVENTS
+# ============================================================
+
+def invalidate_destination_on_commit(target, destination_id):
+    """Invalidate a destination's searches once target's transaction commits"""
+    if destination_id is not None:
+        on_commit(target, ('search', destination_id),
+                  lambda: invalidate_destination(destination_id))
+
+def _hotel_destination(connection, hotel_id, target=None):
+    if hotel_id is None:
+        return None
+    # A hotel already loaded in target's session needs no query (booking
+    # creation loads it, keeping this lookup out of its locked section)
+    session = object_session(target) if target is not None else None
+    if session is not None:
+        hotel = session.identity_map.get(session.identity_key(Hotel, hotel_id))
+        if hotel is not None and 'destination_id' in hotel.__dict__:
+            return hotel.destination_id
+    return connection.execute(
+        select(Hotel.destination_id).where(Hotel.id == hotel_id)
+    ).scalar()
+
+def _old_value(target, key):
+    history = inspect(target).attrs[key].history
+    return history.deleted[0] if history.deleted else None
+
+@event.listens_for(Hotel, 'after_insert')
+@event.listens_for(Hotel, 'after_update')
+@event.listens_for(Hotel, 'after_delete')
+def _hotel_changed(mapper, connection, hotel):
+    invalidate_destination_on_commit(hotel, hotel.destination_id)
+    invalidate_destination_on_commit(hotel, _old_value(hotel, 'destination_id'))
+
+@event.listens_for(RoomType, 'after_insert')
+@event.listens_for(RoomType, 'after_update')
+@event.listens_for(RoomType, 'after_delete')
+def _room_type_changed(mapper, connection, room_type):
+    invalidate_destination_on_commit(room_type, _hotel_destination(connection, room_type.hotel_id))
+
+@event.listens_for(Booking, 'after_insert')
+@event.listens_for(Booking, 'after_update')
+@event.listens_for(Booking, 'after_delete')
+def _inventory_changed(mapper, connection, booking):
+    # Bookings move the room-night inventory that search filters on
+    invalidate_destination_on_commit(booking, _hotel_destination(connection, booking.hotel_id, booking))
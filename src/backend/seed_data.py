@@ -1,293 +1,496 @@
 """
 MASSIVE DATABASE SEEDING SCRIPT
-Creates realistic, production-scale datasets
+Creates realistic, production-scale datasets with bulk loads
+
+Usage: python -m backend.seed_data [--scale 10] [--seed 42] [--anchor 2025-01-01]
+
+--scale multiplies today's dataset (500 users, 120 hotels and 50 restaurants per
+city). Rows are generated column by column in fixed-size batches with explicit
+primary keys, so foreign keys are known up front and the same seed and anchor
+always produce the same rows. Batches are streamed through COPY (executemany
+when the driver has no COPY support) and sequences are moved past the loaded ids.
 """
 
-from backend.app import create_app, db
-from backend.models import *
-from datetime import datetime, timedelta
+from backend.app import create_app, db, cache
+from backend.models import User, Destination, Hotel, RoomType, Activity, Restaurant
+from backend.passwords import hash_password
+from backend.amenities import amenity_mask
+from backend.tiered_cache import delete_prefixed
+from datetime import date, datetime, timedelta
+import argparse
+import csv
+import io
+import json
 import random
+import time
+
+BATCH_ROWS = 10000  # fixed so that generated data does not depend on load batching
+
+USERS_PER_SCALE = 500
+HOTELS_PER_DESTINATION = 120
+RESTAURANTS_PER_DESTINATION = 50
+ACTIVITIES_PER_DESTINATION = (50, 150)
+
+SEED_PASSWORD = 'password123'
+
+# Cache namespaces built from the rows a seed replaces; rate limits, replica
+# pins and anything else sharing the Redis database are left alone
+SEEDED_CACHE_PREFIXES = ('catalog:', 'search:', 'hotel:', 'geo:', 'suggest:', 'principal:')
+
+DESTINATIONS = [
+    {
+        'name': 'Jaipur', 'state': 'Rajasthan', 'region': 'North',
+        'latitude': 26.9124, 'longitude': 75.7873,
+        'category': 'heritage', 'popularity_score': 9.2,
+        'description': 'The Pink City - Capital of Rajasthan known for magnificent forts and palaces',
+        'highlights': ['Amber Fort', 'Hawa Mahal', 'City Palace', 'Jantar Mantar'],
+        'best_time_to_visit': 'October to March',
+        'average_budget_per_day': 2500, 'typical_stay_duration': 3,
+        'climate_type': 'Semi-arid', 'safety_rating': 4.6
+    },
+    {
+        'name': 'Goa', 'state': 'Goa', 'region': 'West',
+        'latitude': 15.2993, 'longitude': 74.1240,
+        'category': 'beach', 'popularity_score': 9.5,
+        'description': 'Beach paradise with Portuguese heritage and vibrant nightlife',
+        'highlights': ['Calangute Beach', 'Baga Beach', 'Basilica of Bom Jesus', 'Fort Aguada'],
+        'best_time_to_visit': 'November to February',
+        'average_budget_per_day': 3000, 'typical_stay_duration': 4,
+        'climate_type': 'Tropical', 'safety_rating': 4.5
+    },
+    {
+        'name': 'Varanasi', 'state': 'Uttar Pradesh', 'region': 'North',
+        'latitude': 25.3176, 'longitude': 82.9739,
+        'category': 'pilgrimage', 'popularity_score': 8.8,
+        'description': 'Oldest living city - Spiritual capital on the banks of Ganges',
+        'highlights': ['Dashashwamedh Ghat', 'Kashi Vishwanath Temple', 'Sarnath', 'Ganga Aarti'],
+        'best_time_to_visit': 'October to March',
+        'average_budget_per_day': 1800, 'typical_stay_duration': 2,
+        'climate_type': 'Subtropical', 'safety_rating': 4.3
+    },
+    {
+        'name': 'Manali', 'state': 'Himachal Pradesh', 'region': 'North',
+        'latitude': 32.2432, 'longitude': 77.1892,
+        'category': 'hill-station', 'popularity_score': 9.0,
+        'description': 'Himalayan resort town - Adventure capital with snow-capped peaks',
+        'highlights': ['Rohtang Pass', 'Solang Valley', 'Hadimba Temple', 'Old Manali'],
+        'best_time_to_visit': 'October to June',
+        'average_budget_per_day': 3500, 'typical_stay_duration': 4,
+        'climate_type': 'Alpine', 'safety_rating': 4.7
+    },
+    {
+        'name': 'Kerala Backwaters', 'state': 'Kerala', 'region': 'South',
+        'latitude': 9.4981, 'longitude': 76.3388,
+        'category': 'nature', 'popularity_score': 9.3,
+        'description': 'Network of lagoons and lakes - Gods Own Country',
+        'highlights': ['Houseboat Cruise', 'Alleppey', 'Kumarakom', 'Vembanad Lake'],
+        'best_time_to_visit': 'September to March',
+        'average_budget_per_day': 4000, 'typical_stay_duration': 3,
+        'climate_type': 'Tropical', 'safety_rating': 4.8
+    },
+    {
+        'name': 'Udaipur', 'state': 'Rajasthan', 'region': 'North',
+        'latitude': 24.5854, 'longitude': 73.7125,
+        'category': 'heritage', 'popularity_score': 8.9,
+        'description': 'City of Lakes - Romantic palaces and stunning lakeside views',
+        'highlights': ['Lake Pichola', 'City Palace', 'Jag Mandir', 'Saheliyon Ki Bari'],
+        'best_time_to_visit': 'September to March',
+        'average_budget_per_day': 3000, 'typical_stay_duration': 3,
+        'climate_type': 'Semi-arid', 'safety_rating': 4.6
+    },
+    {
+        'name': 'Rishikesh', 'state': 'Uttarakhand', 'region': 'North',
+        'latitude': 30.0869, 'longitude': 78.2676,
+        'category': 'adventure', 'popularity_score': 8.7,
+        'description': 'Yoga capital of the world - Gateway to the Himalayas',
+        'highlights': ['Lakshman Jhula', 'Ram Jhula', 'River Rafting', 'Beatles Ashram'],
+        'best_time_to_visit': 'September to November, March to May',
+        'average_budget_per_day': 2000, 'typical_stay_duration': 3,
+        'climate_type': 'Subtropical', 'safety_rating': 4.5
+    },
+    {
+        'name': 'Amritsar', 'state': 'Punjab', 'region': 'North',
+        'latitude': 31.6340, 'longitude': 74.8723,
+        'category': 'pilgrimage', 'popularity_score': 8.6,
+        'description': 'Home of Golden Temple - Spiritual heart of Sikhism',
+        'highlights': ['Golden Temple', 'Jallianwala Bagh', 'Wagah Border', 'Partition Museum'],
+        'best_time_to_visit': 'November to March',
+        'average_budget_per_day': 2200, 'typical_stay_duration': 2,
+        'climate_type': 'Subtropical', 'safety_rating': 4.7
+    },
+    {
+        'name': 'Hampi', 'state': 'Karnataka', 'region': 'South',
+        'latitude': 15.3350, 'longitude': 76.4600,
+        'category': 'heritage', 'popularity_score': 8.4,
+        'description': 'Ancient ruins of Vijayanagara Empire - UNESCO World Heritage Site',
+        'highlights': ['Virupaksha Temple', 'Vittala Temple', 'Stone Chariot', 'Matanga Hill'],
+        'best_time_to_visit': 'October to February',
+        'average_budget_per_day': 1500, 'typical_stay_duration': 2,
+        'climate_type': 'Tropical', 'safety_rating': 4.5
+    },
+    {
+        'name': 'Darjeeling', 'state': 'West Bengal', 'region': 'East',
+        'latitude': 27.0410, 'longitude': 88.2663,
+        'category': 'hill-station', 'popularity_score': 8.8,
+        'description': 'Queen of the Hills - Tea gardens and Kanchenjunga views',
+        'highlights': ['Tiger Hill', 'Toy Train', 'Tea Gardens', 'Batasia Loop'],
+        'best_time_to_visit': 'March to May, October to November',
+        'average_budget_per_day': 2800, 'typical_stay_duration': 3,
+        'climate_type': 'Subtropical Highland', 'safety_rating': 4.6
+    }
+]
+
+TRAVEL_STYLES = ['solo', 'social', 'family', 'luxury', 'budget', 'backpacker']
+PACES = ['slow', 'moderate', 'fast']
+FOODS = ['vegetarian', 'non-veg', 'vegan', 'jain']
+INTERESTS = ['adventure', 'culture', 'food', 'photography', 'history']
+
+PROPERTY_TYPES = ['hotel', 'resort', 'homestay', 'hostel', 'villa']
+HOTEL_BRANDS = ['Taj', 'Oberoi', 'ITC', 'Radisson', 'Holiday Inn', 'Lemon Tree', 'FabHotel', 'Treebo', 'OYO', 'Zostel']
+ZONES = ['City Center', 'Airport Area', 'Railway Station', 'Old Town', 'Business District']
+ROOM_NAMES = ['Standard Room', 'Deluxe Room', 'Suite', 'Executive Room', 'Family Room']
+BED_TYPES = ['Single', 'Double', 'Queen', 'King']
+
+ACTIVITY_CATEGORIES = ['sightseeing', 'adventure', 'cultural', 'religious', 'shopping', 'nature']
+CUISINES = ['North Indian', 'South Indian', 'Chinese', 'Continental', 'Italian', 'Street Food']
+
+# ============================================================
+# BULK LOADER
+# ============================================================
+
+def _copy_value(value):
+    """One CSV field in the text form COPY expects (empty unquoted field = NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, list):
+        items = ('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value)
+        return '{' + ','.join(items) + '}'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+class BulkLoader:
+    """
+    Streams row batches into tables on one connection and keeps per-table
+    throughput. Columns with a Python-side default that a batch leaves out
+    get that default (datetime.utcnow becomes the seed anchor), because
+    neither COPY nor Core executemany runs ORM defaults.
+    """
+
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.now = now
+        self.stats = {}
+        self._cursor = None
+        if connection.dialect.name == 'postgresql':
+            cursor = connection.connection.dbapi_connection.cursor()
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                self._cursor = cursor
+
+    def _defaults(self, table, columns):
+        extra = {}
+        for column in table.columns:
+            if column.name in columns or column.default is None:
+                continue
+            extra[column.name] = self.now if column.default.is_callable else column.default.arg
+        return extra
+
+    def load(self, model, columns, rows):
+        """Load an iterable of row tuples ordered like columns; returns the row count"""
+        table = model.__table__
+        defaults = self._defaults(table, columns)
+        names = list(columns) + list(defaults)
+        tail = tuple(defaults.values())
+
+        started = time.perf_counter()
+        if self._cursor is not None:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            count = 0
+            for row in rows:
+                writer.writerow([_copy_value(value) for value in row + tail])
+                count += 1
+            buffer.seek(0)
+            self._cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            batch = [dict(zip(names, row + tail)) for row in rows]
+            count = len(batch)
+            if batch:
+                self.connection.execute(table.insert(), batch)
 
-def seed_database():
-    """Seed database with comprehensive data"""
+        total_rows, seconds = self.stats.get(table.name, (0, 0.0))
+        self.stats[table.name] = (total_rows + count, seconds + time.perf_counter() - started)
+        return count
+
+    def finish(self):
+        """Move id sequences past the explicit keys and refresh planner statistics"""
+        if self.connection.dialect.name != 'postgresql':
+            return
+        for name in self.stats:
+            self.connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {name}")
+            self.connection.exec_driver_sql(f'ANALYZE {name}')
+
+def print_throughput(stats):
+    print("Rows loaded:")
+    for table, (rows, seconds) in stats.items():
+        rate = rows / seconds if seconds else 0.0
+        print(f"  - {table:<18} {rows:>12,} rows  {seconds:8.2f}s  {rate:>12,.0f} rows/s")
+
+# ============================================================
+# GENERATORS (columnar batches with explicit ids)
+# ============================================================
+
+def _batches(first_id, count):
+    for start in range(0, count, BATCH_ROWS):
+        yield range(first_id + start, first_id + min(start + BATCH_ROWS, count))
+
+def _jitter(rng, n, center, spread):
+    return [center + rng.uniform(-spread, spread) for _ in range(n)]
+
+def _ratings(rng, n, low, high):
+    return [round(rng.uniform(low, high), 1) for _ in range(n)]
+
+DESTINATION_FIELDS = tuple(DESTINATIONS[0])
+DESTINATION_COLUMNS = ('id',) + DESTINATION_FIELDS
+
+def destination_rows():
+    for dest_id, data in enumerate(DESTINATIONS, start=1):
+        yield (dest_id,) + tuple(data[name] for name in DESTINATION_FIELDS)
+
+USER_COLUMNS = (
+    'id', 'email', 'password_hash', 'full_name', 'phone', 'role', 'is_verified',
+    'safety_score', 'travel_style', 'pace_preference', 'budget_elasticity',
+    'food_preferences', 'interests', 'total_trips', 'total_bookings', 'member_since'
+)
+
+def user_batches(rng, count, password_hash, now):
+    for ids in _batches(1, count):
+        n = len(ids)
+        yield zip(
+            ids,
+            [f'user{i - 1}@example.com' for i in ids],
+            [password_hash] * n,
+            [f'User {i - 1}' for i in ids],
+            [f'+91{9000000000 + i - 1}' for i in ids],
+            ['traveler'] * n,
+            [rng.random() < 0.5 for _ in ids],
+            _ratings(rng, n, 3.5, 5.0),
+            [rng.choice(TRAVEL_STYLES) for _ in ids],
+            [rng.choice(PACES) for _ in ids],
+            [round(rng.uniform(0.3, 0.9), 2) for _ in ids],
+            [rng.sample(FOODS, k=rng.randint(1, 2)) for _ in ids],
+            [rng.sample(INTERESTS, k=rng.randint(2, 4)) for _ in ids],
+            [rng.randint(0, 50) for _ in ids],
+            [rng.randint(0, 100) for _ in ids],
+            [now - timedelta(days=rng.randint(1, 1095)) for _ in ids]
+        )
+
+HOTEL_COLUMNS = (
+    'id', 'name', 'brand', 'destination_id', 'property_type', 'star_rating', 'zone',
+    'latitude', 'longitude', 'base_price_per_night', 'overall_rating',
+    'total_reviews', 'safety_rating', 'hygiene_rating', 'sustainability_score',
+    'amenities', 'amenity_mask', 'is_verified', 'total_bookings'
+)
+
+ROOM_COLUMNS = (
+    'id', 'hotel_id', 'name', 'max_occupancy', 'bed_type', 'room_size_sqft', 'base_price',
+    'weekend_multiplier', 'peak_season_multiplier', 'total_rooms', 'amenities'
+)
+
+def hotel_batches(rng, per_destination):
+    """(hotel rows, room type rows) per batch; rooms reference ids of the same batch"""
+    first_id = 1
+    room_id = 1
+    for dest_id, data in enumerate(DESTINATIONS, start=1):
+        for ids in _batches(first_id, per_destination):
+            n = len(ids)
+            brands = [rng.choice(HOTEL_BRANDS) for _ in ids]
+            latitudes = _jitter(rng, n, data['latitude'], 0.1)
+            longitudes = _jitter(rng, n, data['longitude'], 0.1)
+            prices = [rng.randint(800, 8000) for _ in ids]
+            amenities = [{
+                'wifi': rng.random() < 0.5,
+                'pool': rng.random() < 0.5,
+                'gym': rng.random() < 0.5,
+                'spa': rng.random() < 0.5,
+                'restaurant': True,
+                'parking': rng.random() < 0.5,
+                'ac': True
+            } for _ in ids]
+            hotels = list(zip(
+                ids,
+                [f"{brand} {data['name']} {i - first_id + 1}" for brand, i in zip(brands, ids)],
+                brands,
+                [dest_id] * n,
+                [rng.choice(PROPERTY_TYPES) for _ in ids],
+                [rng.randint(2, 5) for _ in ids],
+                [rng.choice(ZONES) for _ in ids],
+                latitudes,
+                longitudes,
+                prices,
+                _ratings(rng, n, 3.0, 5.0),
+                [rng.randint(10, 5000) for _ in ids],
+                _ratings(rng, n, 3.5, 5.0),
+                _ratings(rng, n, 3.5, 5.0),
+                _ratings(rng, n, 2.0, 4.5),
+                amenities,
+                [amenity_mask(item) for item in amenities],
+                [rng.random() < 0.5 for _ in ids],
+                [rng.randint(50, 5000) for _ in ids]
+            ))
+
+            rooms = []
+            for hotel_id, price in zip(ids, prices):
+                for name in rng.sample(ROOM_NAMES, k=rng.randint(3, 5)):
+                    rooms.append((
+                        room_id, hotel_id, name,
+                        rng.randint(2, 6),
+                        rng.choice(BED_TYPES),
+                        rng.randint(200, 600),
+                        price + rng.randint(-500, 2000),
+                        1.2, 1.5,
+                        rng.randint(5, 30),
+                        {'tv': True, 'minibar': rng.random() < 0.5}
+                    ))
+                    room_id += 1
+            yield hotels, rooms
+        first_id += per_destination
+
+ACTIVITY_COLUMNS = (
+    'id', 'destination_id', 'name', 'description', 'category', 'latitude', 'longitude',
+    'opening_time', 'closing_time', 'typical_duration_minutes', 'entry_fee',
+    'estimated_additional_cost', 'energy_level_required', 'crowd_density_score',
+    'best_time_of_day', 'popularity_score'
+)
+
+def activity_batches(rng, scale):
+    first_id = 1
+    for dest_id, data in enumerate(DESTINATIONS, start=1):
+        low, high = ACTIVITIES_PER_DESTINATION
+        count = rng.randint(low, high) * scale
+        for ids in _batches(first_id, count):
+            n = len(ids)
+            latitudes = _jitter(rng, n, data['latitude'], 0.1)
+            longitudes = _jitter(rng, n, data['longitude'], 0.1)
+            yield zip(
+                ids,
+                [dest_id] * n,
+                [f"Activity {i - first_id + 1} in {data['name']}" for i in ids],
+                [f'Amazing {rng.choice(ACTIVITY_CATEGORIES)} experience' for _ in ids],
+                [rng.choice(ACTIVITY_CATEGORIES) for _ in ids],
+                latitudes,
+                longitudes,
+                [rng.choice(['06:00', '08:00', '09:00', '10:00']) for _ in ids],
+                [rng.choice(['18:00', '20:00', '22:00']) for _ in ids],
+                [rng.choice([60, 90, 120, 180]) for _ in ids],
+                [rng.choice([0, 50, 100, 200, 500]) for _ in ids],
+                [rng.randint(0, 500) for _ in ids],
+                [rng.randint(1, 5) for _ in ids],
+                _ratings(rng, n, 2.0, 5.0),
+                [rng.choice(['morning', 'afternoon', 'evening', 'night']) for _ in ids],
+                _ratings(rng, n, 3.0, 5.0)
+            )
+        first_id += count
+
+RESTAURANT_COLUMNS = (
+    'id', 'destination_id', 'name', 'cuisine_types', 'latitude', 'longitude',
+    'average_cost_for_two', 'price_category', 'overall_rating', 'total_reviews',
+    'is_vegetarian', 'is_vegan_friendly'
+)
+
+def restaurant_batches(rng, per_destination):
+    first_id = 1
+    for dest_id, data in enumerate(DESTINATIONS, start=1):
+        for ids in _batches(first_id, per_destination):
+            n = len(ids)
+            latitudes = _jitter(rng, n, data['latitude'], 0.1)
+            longitudes = _jitter(rng, n, data['longitude'], 0.1)
+            yield zip(
+                ids,
+                [dest_id] * n,
+                [f"Restaurant {i - first_id + 1} {data['name']}" for i in ids],
+                [rng.sample(CUISINES, k=rng.randint(1, 3)) for _ in ids],
+                latitudes,
+                longitudes,
+                [rng.randint(300, 3000) for _ in ids],
+                [rng.choice(['budget', 'mid-range', 'premium']) for _ in ids],
+                _ratings(rng, n, 3.0, 5.0),
+                [rng.randint(10, 1000) for _ in ids],
+                [rng.random() < 0.5 for _ in ids],
+                [rng.random() < 0.5 for _ in ids]
+            )
+        first_id += per_destination
+
+# ============================================================
+# SEEDING
+# ============================================================
+
+def seed_database(scale=1, seed=42, anchor=None):
+    """
+    Drop, recreate and bulk-load the catalog and user tables. Every table
+    draws from its own RNG derived from seed, so tables stay reproducible
+    independently; anchor (default: today) replaces "now" in generated dates.
+    """
     app = create_app()
-    
+    now = datetime.combine(anchor or date.today(), datetime.min.time())
+
     with app.app_context():
-        print("🌱 Starting database seeding...")
+        print(f"🌱 Starting database seeding (scale {scale}x, seed {seed}, anchor {now.date()})...")
         
         # Clear existing data
         db.drop_all()
         db.create_all()
         
-        # ===== DESTINATIONS =====
-        print("📍 Seeding destinations...")
-        destinations_data = [
-            {
-                'name': 'Jaipur', 'state': 'Rajasthan', 'region': 'North',
-                'latitude': 26.9124, 'longitude': 75.7873,
-                'category': 'heritage', 'popularity_score': 9.2,
-                'description': 'The Pink City - Capital of Rajasthan known for magnificent forts and palaces',
-                'highlights': ['Amber Fort', 'Hawa Mahal', 'City Palace', 'Jantar Mantar'],
-                'best_time_to_visit': 'October to March',
-                'average_budget_per_day': 2500, 'typical_stay_duration': 3,
-                'climate_type': 'Semi-arid', 'safety_rating': 4.6
-            },
-            {
-                'name': 'Goa', 'state': 'Goa', 'region': 'West',
-                'latitude': 15.2993, 'longitude': 74.1240,
-                'category': 'beach', 'popularity_score': 9.5,
-                'description': 'Beach paradise with Portuguese heritage and vibrant nightlife',
-                'highlights': ['Calangute Beach', 'Baga Beach', 'Basilica of Bom Jesus', 'Fort Aguada'],
-                'best_time_to_visit': 'November to February',
-                'average_budget_per_day': 3000, 'typical_stay_duration': 4,
-                'climate_type': 'Tropical', 'safety_rating': 4.5
-            },
-            {
-                'name': 'Varanasi', 'state': 'Uttar Pradesh', 'region': 'North',
-                'latitude': 25.3176, 'longitude': 82.9739,
-                'category': 'pilgrimage', 'popularity_score': 8.8,
-                'description': 'Oldest living city - Spiritual capital on the banks of Ganges',
-                'highlights': ['Dashashwamedh Ghat', 'Kashi Vishwanath Temple', 'Sarnath', 'Ganga Aarti'],
-                'best_time_to_visit': 'October to March',
-                'average_budget_per_day': 1800, 'typical_stay_duration': 2,
-                'climate_type': 'Subtropical', 'safety_rating': 4.3
-            },
-            {
-                'name': 'Manali', 'state': 'Himachal Pradesh', 'region': 'North',
-                'latitude': 32.2432, 'longitude': 77.1892,
-                'category': 'hill-station', 'popularity_score': 9.0,
-                'description': 'Himalayan resort town - Adventure capital with snow-capped peaks',
-                'highlights': ['Rohtang Pass', 'Solang Valley', 'Hadimba Temple', 'Old Manali'],
-                'best_time_to_visit': 'October to June',
-                'average_budget_per_day': 3500, 'typical_stay_duration': 4,
-                'climate_type': 'Alpine', 'safety_rating': 4.7
-            },
-            {
-                'name': 'Kerala Backwaters', 'state': 'Kerala', 'region': 'South',
-                'latitude': 9.4981, 'longitude': 76.3388,
-                'category': 'nature', 'popularity_score': 9.3,
-                'description': 'Network of lagoons and lakes - Gods Own Country',
-                'highlights': ['Houseboat Cruise', 'Alleppey', 'Kumarakom', 'Vembanad Lake'],
-                'best_time_to_visit': 'September to March',
-                'average_budget_per_day': 4000, 'typical_stay_duration': 3,
-                'climate_type': 'Tropical', 'safety_rating': 4.8
-            },
-            {
-                'name': 'Udaipur', 'state': 'Rajasthan', 'region': 'North',
-                'latitude': 24.5854, 'longitude': 73.7125,
-                'category': 'heritage', 'popularity_score': 8.9,
-                'description': 'City of Lakes - Romantic palaces and stunning lakeside views',
-                'highlights': ['Lake Pichola', 'City Palace', 'Jag Mandir', 'Saheliyon Ki Bari'],
-                'best_time_to_visit': 'September to March',
-                'average_budget_per_day': 3000, 'typical_stay_duration': 3,
-                'climate_type': 'Semi-arid', 'safety_rating': 4.6
-            },
-            {
-                'name': 'Rishikesh', 'state': 'Uttarakhand', 'region': 'North',
-                'latitude': 30.0869, 'longitude': 78.2676,
-                'category': 'adventure', 'popularity_score': 8.7,
-                'description': 'Yoga capital of the world - Gateway to the Himalayas',
-                'highlights': ['Lakshman Jhula', 'Ram Jhula', 'River Rafting', 'Beatles Ashram'],
-                'best_time_to_visit': 'September to November, March to May',
-                'average_budget_per_day': 2000, 'typical_stay_duration': 3,
-                'climate_type': 'Subtropical', 'safety_rating': 4.5
-            },
-            {
-                'name': 'Amritsar', 'state': 'Punjab', 'region': 'North',
-                'latitude': 31.6340, 'longitude': 74.8723,
-                'category': 'pilgrimage', 'popularity_score': 8.6,
-                'description': 'Home of Golden Temple - Spiritual heart of Sikhism',
-                'highlights': ['Golden Temple', 'Jallianwala Bagh', 'Wagah Border', 'Partition Museum'],
-                'best_time_to_visit': 'November to March',
-                'average_budget_per_day': 2200, 'typical_stay_duration': 2,
-                'climate_type': 'Subtropical', 'safety_rating': 4.7
-            },
-            {
-                'name': 'Hampi', 'state': 'Karnataka', 'region': 'South',
-                'latitude': 15.3350, 'longitude': 76.4600,
-                'category': 'heritage', 'popularity_score': 8.4,
-                'description': 'Ancient ruins of Vijayanagara Empire - UNESCO World Heritage Site',
-                'highlights': ['Virupaksha Temple', 'Vittala Temple', 'Stone Chariot', 'Matanga Hill'],
-                'best_time_to_visit': 'October to February',
-                'average_budget_per_day': 1500, 'typical_stay_duration': 2,
-                'climate_type': 'Tropical', 'safety_rating': 4.5
-            },
-            {
-                'name': 'Darjeeling', 'state': 'West Bengal', 'region': 'East',
-                'latitude': 27.0410, 'longitude': 88.2663,
-                'category': 'hill-station', 'popularity_score': 8.8,
-                'description': 'Queen of the Hills - Tea gardens and Kanchenjunga views',
-                'highlights': ['Tiger Hill', 'Toy Train', 'Tea Gardens', 'Batasia Loop'],
-                'best_time_to_visit': 'March to May, October to November',
-                'average_budget_per_day': 2800, 'typical_stay_duration': 3,
-                'climate_type': 'Subtropical Highland', 'safety_rating': 4.6
-            }
-        ]
-        
-        destinations = []
-        for dest_data in destinations_data:
-            dest = Destination(**dest_data)
-            destinations.append(dest)
-            db.session.add(dest)
-        
-        db.session.commit()
-        print(f"✅ Created {len(destinations)} destinations")
-        
-        # ===== USERS =====
-        print("👥 Seeding users...")
-        users = []
-        travel_styles = ['solo', 'social', 'family', 'luxury', 'budget', 'backpacker']
-        paces = ['slow', 'moderate', 'fast']
-        
-        for i in range(500):  # Create 500 users
-            user = User(
-                email=f'user{i}@example.com',
-                full_name=f'User {i}',
-                phone=f'+91{9000000000 + i}',
-                role='traveler',
-                is_verified=random.choice([True, False]),
-                safety_score=round(random.uniform(3.5, 5.0), 1),
-                travel_style=random.choice(travel_styles),
-                pace_preference=random.choice(paces),
-                budget_elasticity=round(random.uniform(0.3, 0.9), 2),
-                food_preferences=random.sample(['vegetarian', 'non-veg', 'vegan', 'jain'], k=random.randint(1, 2)),
-                interests=random.sample(['adventure', 'culture', 'food', 'photography', 'history'], k=random.randint(2, 4)),
-                total_trips=random.randint(0, 50),
-                total_bookings=random.randint(0, 100),
-                member_since=datetime.utcnow() - timedelta(days=random.randint(1, 1095))
-            )
-            user.set_password('password123')
-            users.append(user)
-            db.session.add(user)
-        
-        db.session.commit()
-        print(f"✅ Created {len(users)} users")
-        
-        # ===== HOTELS =====
-        print("🏨 Seeding hotels (100+ per city)...")
-        hotel_count = 0
-        
-        property_types = ['hotel', 'resort', 'homestay', 'hostel', 'villa']
-        hotel_names = ['Taj', 'Oberoi', 'ITC', 'Radisson', 'Holiday Inn', 'Lemon Tree', 'FabHotel', 'Treebo', 'OYO', 'Zostel']
-        zones = ['City Center', 'Airport Area', 'Railway Station', 'Old Town', 'Business District']
-        
-        for dest in destinations:
-            for i in range(120):  # 120 hotels per destination
-                hotel = Hotel(
-                    name=f'{random.choice(hotel_names)} {dest.name} {i+1}',
-                    brand=random.choice(hotel_names),
-                    destination_id=dest.id,
-                    property_type=random.choice(property_types),
-                    star_rating=random.randint(2, 5),
-                    zone=random.choice(zones),
-                    latitude=dest.latitude + random.uniform(-0.1, 0.1),
-                    longitude=dest.longitude + random.uniform(-0.1, 0.1),
-                    base_price_per_night=random.randint(800, 8000),
-                    overall_rating=round(random.uniform(3.0, 5.0), 1),
-                    total_reviews=random.randint(10, 5000),
-                    safety_rating=round(random.uniform(3.5, 5.0), 1),
-                    hygiene_rating=round(random.uniform(3.5, 5.0), 1),
-                    sustainability_score=round(random.uniform(2.0, 4.5), 1),
-                    amenities={
-                        'wifi': random.choice([True, False]),
-                        'pool': random.choice([True, False]),
-                        'gym': random.choice([True, False]),
-                        'spa': random.choice([True, False]),
-                        'restaurant': True,
-                        'parking': random.choice([True, False]),
-                        'ac': True
-                    },
-                    is_verified=random.choice([True, False]),
-                    total_bookings=random.randint(50, 5000)
-                )
-                db.session.add(hotel)
-                hotel_count += 1
-                
-                # Add 3-5 room types per hotel
-                for j in range(random.randint(3, 5)):
-                    room_names = ['Standard Room', 'Deluxe Room', 'Suite', 'Executive Room', 'Family Room']
-                    room = RoomType(
-                        hotel_id=hotel.id,
-                        name=random.choice(room_names),
-                        max_occupancy=random.randint(2, 6),
-                        bed_type=random.choice(['Single', 'Double', 'Queen', 'King']),
-                        room_size_sqft=random.randint(200, 600),
-                        base_price=hotel.base_price_per_night + random.randint(-500, 2000),
-                        weekend_multiplier=1.2,
-                        peak_season_multiplier=1.5,
-                        total_rooms=random.randint(5, 30),
-                        amenities={'tv': True, 'minibar': random.choice([True, False])}
-                    )
-                    db.session.add(room)
-        
-        db.session.commit()
-        print(f"✅ Created {hotel_count} hotels")
-        
-        # ===== ACTIVITIES =====
-        print("🎯 Seeding activities (50-150 per city)...")
-        activity_count = 0
-        
-        categories = ['sightseeing', 'adventure', 'cultural', 'religious', 'shopping', 'nature']
-        
-        for dest in destinations:
-            for i in range(random.randint(50, 150)):
-                activity = Activity(
-                    destination_id=dest.id,
-                    name=f'Activity {i+1} in {dest.name}',
-                    description=f'Amazing {random.choice(categories)} experience',
-                    category=random.choice(categories),
-                    latitude=dest.latitude + random.uniform(-0.1, 0.1),
-                    longitude=dest.longitude + random.uniform(-0.1, 0.1),
-                    opening_time=random.choice(['06:00', '08:00', '09:00', '10:00']),
-                    closing_time=random.choice(['18:00', '20:00', '22:00']),
-                    typical_duration_minutes=random.choice([60, 90, 120, 180]),
-                    entry_fee=random.choice([0, 50, 100, 200, 500]),
-                    estimated_additional_cost=random.randint(0, 500),
-                    energy_level_required=random.randint(1, 5),
-                    crowd_density_score=round(random.uniform(2.0, 5.0), 1),
-                    best_time_of_day=random.choice(['morning', 'afternoon', 'evening', 'night']),
-                    popularity_score=round(random.uniform(3.0, 5.0), 1)
-                )
-                db.session.add(activity)
-                activity_count += 1
-        
-        db.session.commit()
-        print(f"✅ Created {activity_count} activities")
-        
-        # ===== RESTAURANTS =====
-        print("🍽️ Seeding restaurants...")
-        restaurant_count = 0
-        
-        cuisines = ['North Indian', 'South Indian', 'Chinese', 'Continental', 'Italian', 'Street Food']
-        
-        for dest in destinations:
-            for i in range(50):
-                restaurant = Restaurant(
-                    destination_id=dest.id,
-                    name=f'Restaurant {i+1} {dest.name}',
-                    cuisine_types=random.sample(cuisines, k=random.randint(1, 3)),
-                    latitude=dest.latitude + random.uniform(-0.1, 0.1),
-                    longitude=dest.longitude + random.uniform(-0.1, 0.1),
-                    average_cost_for_two=random.randint(300, 3000),
-                    price_category=random.choice(['budget', 'mid-range', 'premium']),
-                    overall_rating=round(random.uniform(3.0, 5.0), 1),
-                    total_reviews=random.randint(10, 1000),
-                    is_vegetarian=random.choice([True, False]),
-                    is_vegan_friendly=random.choice([True, False])
-                )
-                db.session.add(restaurant)
-                restaurant_count += 1
-        
-        db.session.commit()
-        print(f"✅ Created {restaurant_count} restaurants")
+        # Every seeded user shares one password, so hash it once
+        password_hash = hash_password(SEED_PASSWORD)
+
+        def rng(table):
+            return random.Random(f'{seed}:{table}')
+
+        with db.engine.begin() as connection:
+            loader = BulkLoader(connection, now)
+
+            print("📍 Seeding destinations...")
+            loader.load(Destination, DESTINATION_COLUMNS, destination_rows())
+
+            print("👥 Seeding users...")
+            for rows in user_batches(rng('users'), USERS_PER_SCALE * scale, password_hash, now):
+                loader.load(User, USER_COLUMNS, rows)
+
+            print(f"🏨 Seeding hotels ({HOTELS_PER_DESTINATION * scale} per city) and room types...")
+            for hotels, rooms in hotel_batches(rng('hotels'), HOTELS_PER_DESTINATION * scale):
+                loader.load(Hotel, HOTEL_COLUMNS, hotels)
+                loader.load(RoomType, ROOM_COLUMNS, rooms)
+
+            print("🎯 Seeding activities...")
+            for rows in activity_batches(rng('activities'), scale):
+                loader.load(Activity, ACTIVITY_COLUMNS, rows)
+
+            print("🍽️ Seeding restaurants...")
+            for rows in restaurant_batches(rng('restaurants'), RESTAURANTS_PER_DESTINATION * scale):
+                loader.load(Restaurant, RESTAURANT_COLUMNS, rows)
+
+            loader.finish()
+
+        # Cached search pages, fragments and catalogs describe the dropped rows
+        delete_prefixed(cache, *SEEDED_CACHE_PREFIXES)
         
         print("\n🎉 Database seeding completed successfully!")
-        print(f"Total records created:")
-        print(f"  - {len(destinations)} destinations")
-        print(f"  - {len(users)} users")
-        print(f"  - {hotel_count} hotels")
-        print(f"  - {activity_count} activities")
-        print(f"  - {restaurant_count} restaurants")
+        print_throughput(loader.stats)
+        return loader.stats
 
 if __name__ == '__main__':
-    seed_database()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='multiple of the base dataset (e.g. 10 to 1000)')
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed; same seed and anchor, same rows')
+    parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                        help='date generated timestamps are relative to (default: today)')
+    args = parser.parse_args()
+    seed_database(scale=args.scale, seed=args.seed, anchor=args.anchor)
@@ -0,0 +1,626 @@
+"""
+TRANSACTIONAL WORKLOAD GENERATOR
+Bookings, reviews, rides, ride requests, travel buddies and SOS alerts on top of the seeded catalog
+
+Usage: python -m backend.seed_workload [--scale 10] [--history-days 730] [--future-days 180] [--seed 42]
+
+Run after backend.seed_data. Days are walked in order from history-days before
+the anchor to future-days after it. Each day draws Poisson volumes that scale
+with --scale, and those volumes are shaped by:
+  - each destination's best_time_to_visit months and popularity
+  - weekday and national peak-season uplift
+  - Zipf-skewed hotel popularity (a few hotels take most of a city's demand)
+  - lead-time curves, so far-future dates are thinly booked
+
+Stays overlap and never overbook: per-night occupancy is kept only for the
+window of nights still ahead of the current day. Completed stays leave long
+review histories behind. Rows stream to the database in fixed-size batches,
+so memory stays bounded at tens of millions of rows.
+
+The workload tables are truncated first. The room-night ledger and rating
+aggregates are rebuilt from the generated rows at the end.
+"""
+
+from backend.app import create_app, db, cache
+from backend.models import Booking, Review, Ride, RideRequest, TravelBuddy, SOSAlert
+from backend.seed_data import BulkLoader, BATCH_ROWS, INTERESTS, print_throughput
+from backend.pricing import (PEAK_SEASON_MONTHS, LAST_MINUTE_DAYS, LAST_MINUTE_MULTIPLIER,
+                             EARLY_BIRD_DAYS, EARLY_BIRD_MULTIPLIER, TAX_RATE)
+from backend.geo import haversine_km
+from datetime import date, datetime, time as day_start, timedelta
+from sqlalchemy import text
+import argparse
+import calendar
+import numpy as np
+
+# Daily volumes per unit of --scale (whole country, before seasonality)
+BOOKINGS_PER_DAY = 40
+RIDES_PER_DAY = 6
+RIDE_REQUESTS_PER_RIDE = 1.8
+BUDDIES_PER_DAY = 4
+SOS_PER_DAY = 0.25
+
+ZIPF_EXPONENT = 1.1  # hotel popularity within a city
+LEAD_MEAN_DAYS = 21
+MAX_NIGHTS = 14
+ROOM_ATTEMPTS = 3  # room types tried before a request counts as sold out
+REVIEW_RATE = 0.35  # share of completed stays that get reviewed
+
+BEST_TIME_WEIGHT = 1.5
+OFF_SEASON_WEIGHT = 0.6
+HOLIDAY_WEIGHT = 1.2  # pricing.PEAK_SEASON_MONTHS
+CHECK_IN_WEEKDAY_WEIGHTS = (0.9, 0.85, 0.9, 1.0, 1.35, 1.25, 0.9)  # Mon..Sun
+
+WORKLOAD_TABLES = ('reviews', 'bookings', 'room_night_inventory', 'hotel_rating_aggregates',
+                   'ride_requests', 'rides', 'travel_buddies', 'sos_alerts')
+
+MONTHS = {name: number for number, name in enumerate(calendar.month_name) if name}
+
+PAYMENT_METHODS = ['upi', 'card', 'netbanking', 'wallet']
+CANCELLATION_REASONS = ['Change of plans', 'Found a better deal', 'Travel restrictions', 'Medical emergency']
+REVIEW_PHRASES = {
+    1: ('Disappointing stay', 'Room was not as described and service was slow.'),
+    2: ('Below expectations', 'Location was fine but cleanliness needs work.'),
+    3: ('Decent for the price', 'Average experience, nothing special either way.'),
+    4: ('Great stay', 'Comfortable rooms and helpful staff, would come back.'),
+    5: ('Outstanding', 'Everything was perfect from check-in to check-out.')
+}
+
+VEHICLES = [('hatchback', 3, 'Maruti Swift'), ('sedan', 4, 'Honda City'),
+            ('suv', 6, 'Mahindra XUV700'), ('tempo', 10, 'Force Traveller')]
+FARE_PER_KM = {'hatchback': 2.5, 'sedan': 3.0, 'suv': 4.0, 'tempo': 1.8}
+ROAD_FACTOR = 1.25  # road distance over great-circle distance
+AVERAGE_SPEED_KMH = 50
+
+EMERGENCY_TYPES = ['medical', 'accident', 'theft', 'harassment', 'lost']
+EMERGENCY_WEIGHTS = [0.35, 0.2, 0.2, 0.1, 0.15]
+
+def peak_months(best_time_to_visit):
+    """Months named by text like 'October to March' or 'March to May, October to November'"""
+    months = set()
+    for part in (best_time_to_visit or '').split(','):
+        named = [MONTHS[word] for word in part.split() if word in MONTHS]
+        if len(named) == 1:
+            months.add(named[0])
+        elif len(named) >= 2:
+            month, end = named[0], named[-1]
+            months.add(month)
+            while month != end:
+                month = month % 12 + 1
+                months.add(month)
+    return months
+
+# ============================================================
+# COLUMNS
+# ============================================================
+
+BOOKING_COLUMNS = (
+    'id', 'booking_reference', 'user_id', 'hotel_id', 'room_type_id', 'check_in_date',
+    'check_out_date', 'number_of_nights', 'number_of_guests', 'room_price_per_night',
+    'total_room_cost', 'taxes', 'service_charges', 'discount', 'final_amount',
+    'payment_status', 'payment_method', 'payment_timestamp', 'booking_status',
+    'cancellation_reason', 'cancelled_at', 'created_at', 'updated_at'
+)
+
+REVIEW_COLUMNS = (
+    'id', 'user_id', 'hotel_id', 'booking_id', 'overall_rating', 'cleanliness_rating',
+    'service_rating', 'location_rating', 'value_for_money_rating', 'amenities_rating',
+    'review_title', 'review_text', 'sentiment_score', 'is_verified_stay',
+    'helpfulness_score', 'is_moderated', 'created_at'
+)
+
+RIDE_COLUMNS = (
+    'id', 'driver_id', 'from_location', 'to_location', 'from_latitude', 'from_longitude',
+    'to_latitude', 'to_longitude', 'departure_datetime', 'estimated_arrival_datetime',
+    'distance_km', 'vehicle_type', 'vehicle_model', 'vehicle_number', 'available_seats',
+    'cost_per_seat', 'ride_status', 'is_verified_driver', 'driver_rating',
+    'created_at', 'updated_at'
+)
+
+RIDE_REQUEST_COLUMNS = (
+    'id', 'ride_id', 'user_id', 'number_of_seats', 'total_cost', 'request_status',
+    'payment_status', 'created_at', 'updated_at'
+)
+
+BUDDY_COLUMNS = (
+    'id', 'user_id', 'destination_id', 'travel_start_date', 'travel_end_date',
+    'trip_duration_days', 'looking_for', 'max_group_size', 'budget_range', 'interests',
+    'status', 'matched_with', 'compatibility_scores', 'description', 'created_at', 'updated_at'
+)
+
+SOS_COLUMNS = (
+    'id', 'alert_code', 'user_id', 'emergency_type', 'description', 'latitude', 'longitude',
+    'location_address', 'alert_status', 'response_notes', 'triggered_at',
+    'acknowledged_at', 'resolved_at'
+)
+
+# Load order doubles as foreign key order
+COLUMNS = {
+    Booking: BOOKING_COLUMNS,
+    Review: REVIEW_COLUMNS,
+    Ride: RIDE_COLUMNS,
+    RideRequest: RIDE_REQUEST_COLUMNS,
+    TravelBuddy: BUDDY_COLUMNS,
+    SOSAlert: SOS_COLUMNS
+}
+
+class RowBatches:
+    """Per-table row buffers flushed together, parents first, once any reaches BATCH_ROWS"""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.rows = {model: [] for model in COLUMNS}
+        self.next_ids = {model: 1 for model in COLUMNS}
+
+    def next_id(self, model):
+        ident = self.next_ids[model]
+        self.next_ids[model] = ident + 1
+        return ident
+
+    def add(self, model, row):
+        rows = self.rows[model]
+        rows.append(row)
+        if len(rows) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for model, columns in COLUMNS.items():
+            if self.rows[model]:
+                self.loader.load(model, columns, self.rows[model])
+                self.rows[model] = []
+
+# ============================================================
+# CATALOG
+# ============================================================
+
+class Catalog:
+    """Seeded ids and attributes the generator samples from, as flat lists"""
+
+    def __init__(self, session, rng):
+        self.user_ids = [row[0] for row in session.execute(text('SELECT id FROM users ORDER BY id'))]
+
+        self.destinations = []
+        for row in session.execute(text(
+                'SELECT id, name, latitude, longitude, best_time_to_visit, typical_stay_duration, '
+                'popularity_score, average_budget_per_day FROM destinations ORDER BY id')):
+            peaks = peak_months(row.best_time_to_visit)
+            self.destinations.append({
+                'id': row.id,
+                'name': row.name,
+                'latitude': row.latitude,
+                'longitude': row.longitude,
+                'stay': max(row.typical_stay_duration or 2, 1),
+                'popularity': row.popularity_score or 1.0,
+                'budget': row.average_budget_per_day or 2500,
+                'season': [0.0] + [
+                    (BEST_TIME_WEIGHT if month in peaks else OFF_SEASON_WEIGHT) *
+                    (HOLIDAY_WEIGHT if month in PEAK_SEASON_MONTHS else 1.0)
+                    for month in range(1, 13)
+                ]
+            })
+        self.total_popularity = sum(dest['popularity'] for dest in self.destinations)
+        self.month_cdf = [None]
+        for month in range(1, 13):
+            weights = np.array([dest['popularity'] * dest['season'][month] for dest in self.destinations])
+            self.month_cdf.append(np.cumsum(weights) / weights.sum())
+
+        hotels = session.execute(text(
+            'SELECT id, destination_id, overall_rating FROM hotels ORDER BY id')).fetchall()
+        self.hotel_ids = [row.id for row in hotels]
+        self.hotel_quality = [row.overall_rating or 3.5 for row in hotels]
+        hotel_destinations = np.array([row.destination_id for row in hotels], dtype=np.int64)
+
+        rooms = session.execute(text(
+            'SELECT id, hotel_id, total_rooms, max_occupancy, base_price, weekend_multiplier, '
+            'peak_season_multiplier FROM room_types ORDER BY hotel_id, id')).fetchall()
+        self.room_ids = [row.id for row in rooms]
+        self.room_capacity = [row.total_rooms for row in rooms]
+        self.room_occupancy = [row.max_occupancy for row in rooms]
+        self.room_prices = [(row.base_price, row.weekend_multiplier or 1.0, row.peak_season_multiplier or 1.0)
+                            for row in rooms]
+        room_hotels = np.array([row.hotel_id for row in rooms], dtype=np.int64)
+        self.room_offsets = np.searchsorted(room_hotels, np.array(self.hotel_ids + [np.iinfo(np.int64).max])).tolist()
+
+        # Zipf popularity: a random permutation of each city's hotels defines its ranking
+        for dest in self.destinations:
+            positions = rng.permutation(np.flatnonzero(hotel_destinations == dest['id']))
+            weights = 1.0 / np.arange(1, len(positions) + 1) ** ZIPF_EXPONENT
+            dest['hotels'] = positions
+            dest['cdf'] = np.cumsum(weights) / weights.sum() if len(positions) else weights
+
+# ============================================================
+# GENERATOR
+# ============================================================
+
+class WorkloadGenerator:
+    """Walks the calendar one day at a time, emitting each table's rows for that day"""
+
+    def __init__(self, catalog, batches, rng, scale, now):
+        self.catalog = catalog
+        self.batches = batches
+        self.rng = rng
+        self.scale = scale
+        self.now = now
+        self.today = now.date()
+        self.occupancy = {}  # night ordinal -> {room index: booked rooms}
+        self.sold_out = 0
+
+    def _moment(self, day):
+        return datetime.combine(day, day_start()) + timedelta(seconds=int(self.rng.integers(86400)))
+
+    def _user(self):
+        return self.catalog.user_ids[int(self.rng.integers(len(self.catalog.user_ids)))]
+
+    def _destination(self, month):
+        position = int(np.searchsorted(self.catalog.month_cdf[month], self.rng.random()))
+        return self.catalog.destinations[min(position, len(self.catalog.destinations) - 1)]
+
+    def run(self, first_day, last_day):
+        day = first_day
+        while day <= last_day:
+            self.occupancy.pop(day.toordinal() - 1, None)
+            self.bookings(day)
+            self.rides(day)
+            self.buddies(day)
+            self.sos_alerts(day)
+            day += timedelta(days=1)
+        self.batches.flush()
+
+    # ===== BOOKINGS AND REVIEWS =====
+
+    def bookings(self, day):
+        rng = self.rng
+        catalog = self.catalog
+        base = BOOKINGS_PER_DAY * self.scale * CHECK_IN_WEEKDAY_WEIGHTS[day.weekday()] / catalog.total_popularity
+        for dest in catalog.destinations:
+            count = rng.poisson(base * dest['popularity'] * dest['season'][day.month])
+            if not count or not len(dest['hotels']):
+                continue
+            hotels = dest['hotels'][np.minimum(np.searchsorted(dest['cdf'], rng.random(count)), len(dest['hotels']) - 1)]
+            nights = np.minimum(1 + rng.poisson(dest['stay'] - 1, count), MAX_NIGHTS)
+            leads = rng.geometric(1 / LEAD_MEAN_DAYS, count) - 1
+            for hotel, stay, lead in zip(hotels.tolist(), nights.tolist(), leads.tolist()):
+                self._book(day, hotel, stay, lead)
+
+    def _has_capacity(self, room, first_night, nights):
+        capacity = self.catalog.room_capacity[room]
+        occupancy = self.occupancy
+        return all(occupancy.get(night, {}).get(room, 0) < capacity
+                   for night in range(first_night, first_night + nights))
+
+    def _occupy(self, room, first_night, nights):
+        for night in range(first_night, first_night + nights):
+            booked = self.occupancy.setdefault(night, {})
+            booked[room] = booked.get(room, 0) + 1
+
+    def _stay_price(self, room, check_in, nights, lead):
+        """Same multipliers as pricing.calculate_dynamic_price, with lead time as of booking"""
+        base, weekend, peak = self.catalog.room_prices[room]
+        total = 0.0
+        for offset in range(nights):
+            night = check_in + timedelta(days=offset)
+            price = base
+            if night.weekday() >= 5:
+                price *= weekend
+            if night.month in PEAK_SEASON_MONTHS:
+                price *= peak
+            if lead < LAST_MINUTE_DAYS:
+                price *= LAST_MINUTE_MULTIPLIER
+            elif lead > EARLY_BIRD_DAYS:
+                price *= EARLY_BIRD_MULTIPLIER
+            total += price
+        return round(total, 2)
+
+    def _booking_status(self, check_in, check_out):
+        roll = self.rng.random()
+        if check_out <= self.today:
+            return 'completed' if roll < 0.88 else 'cancelled' if roll < 0.96 else 'no-show'
+        if check_in <= self.today:
+            return 'confirmed'
+        return 'confirmed' if roll < 0.9 else 'cancelled'
+
+    def _book(self, check_in, hotel, nights, lead):
+        rng = self.rng
+        catalog = self.catalog
+        created_at = self._moment(check_in - timedelta(days=lead))
+        if created_at > self.now:
+            return  # not booked yet
+
+        first, last = catalog.room_offsets[hotel], catalog.room_offsets[hotel + 1]
+        if first == last:
+            return
+        check_out = check_in + timedelta(days=nights)
+        status = self._booking_status(check_in, check_out)
+        holds = status != 'cancelled'
+
+        first_night = check_in.toordinal()
+        room = None
+        for _ in range(ROOM_ATTEMPTS):
+            candidate = int(rng.integers(first, last))
+            if not holds or self._has_capacity(candidate, first_night, nights):
+                room = candidate
+                break
+        if room is None:
+            self.sold_out += 1
+            return
+        if holds:
+            self._occupy(room, first_night, nights)
+
+        total = self._stay_price(room, check_in, nights, lead)
+        taxes = round(total * TAX_RATE, 2)
+        discount = round(total * 0.1, 2) if rng.random() < 0.1 else 0.0
+        paid = status != 'cancelled' and (check_in <= self.today or rng.random() < 0.7)
+        cancelled_at = None
+        if status == 'cancelled':
+            window = max((min(datetime.combine(check_in, day_start()), self.now) - created_at).total_seconds(), 0)
+            cancelled_at = created_at + timedelta(seconds=window * rng.random())
+
+        booking_id = self.batches.next_id(Booking)
+        user_id = self._user()
+        hotel_id = catalog.hotel_ids[hotel]
+        self.batches.add(Booking, (
+            booking_id,
+            f'BK{booking_id:010d}',
+            user_id,
+            hotel_id,
+            catalog.room_ids[room],
+            check_in,
+            check_out,
+            nights,
+            int(rng.integers(1, catalog.room_occupancy[room] + 1)),
+            round(total / nights, 2),
+            total,
+            taxes,
+            0.0,
+            discount,
+            round(total + taxes - discount, 2),
+            'refunded' if status == 'cancelled' else 'paid' if paid else 'pending',
+            PAYMENT_METHODS[int(rng.integers(len(PAYMENT_METHODS)))],
+            created_at if paid or status == 'cancelled' else None,
+            status,
+            CANCELLATION_REASONS[int(rng.integers(len(CANCELLATION_REASONS)))] if cancelled_at else None,
+            cancelled_at,
+            created_at,
+            cancelled_at or created_at
+        ))
+
+        if status == 'completed' and rng.random() < REVIEW_RATE:
+            self._review(booking_id, user_id, hotel, check_out)
+
+    def _review(self, booking_id, user_id, hotel, check_out):
+        rng = self.rng
+        created_at = datetime.combine(check_out, day_start()) + timedelta(hours=float(rng.exponential(72)))
+        if created_at > self.now:
+            return
+
+        def rating(center, spread):
+            return round(float(np.clip(rng.normal(center, spread), 1.0, 5.0)), 1)
+
+        overall = rating(self.catalog.hotel_quality[hotel], 0.8)
+        # Not every reviewer fills in every dimension
+        dimensions = [rating(overall, 0.5) if rng.random() < 0.8 else None for _ in range(5)]
+        title, body = REVIEW_PHRASES[min(5, max(1, int(overall + 0.5)))]
+        self.batches.add(Review, (
+            self.batches.next_id(Review),
+            user_id,
+            self.catalog.hotel_ids[hotel],
+            booking_id,
+            overall,
+            *dimensions,
+            title,
+            body,
+            round(float(np.clip((overall - 3) / 2 + rng.normal(0, 0.1), -1, 1)), 2),
+            True,
+            int(rng.geometric(0.3)) - 1,
+            rng.random() < 0.9,
+            created_at
+        ))
+
+    # ===== RIDES =====
+
+    def rides(self, day):
+        rng = self.rng
+        destinations = self.catalog.destinations
+        for _ in range(rng.poisson(RIDES_PER_DAY * self.scale)):
+            origin = self._destination(day.month)
+            target = destinations[int(rng.integers(len(destinations)))]
+            if target is origin:
+                continue
+            vehicle_type, seats, model = VEHICLES[int(rng.integers(len(VEHICLES)))]
+            distance = round(haversine_km(origin['latitude'], origin['longitude'],
+                                          target['latitude'], target['longitude']) * ROAD_FACTOR, 1)
+            departure = datetime.combine(day, day_start()) + timedelta(minutes=int(rng.integers(5 * 60, 22 * 60)))
+            created_at = departure - timedelta(hours=float(rng.exponential(72)) + 1)
+            if created_at > self.now:
+                continue
+            past = departure < self.now
+            status = ('completed' if rng.random() < 0.9 else 'cancelled') if past else 'available'
+            cost_per_seat = round(distance * FARE_PER_KM[vehicle_type] / 10) * 10 or 50
+
+            ride_id = self.batches.next_id(Ride)
+            driver_id = self._user()
+            remaining = seats
+            requests = []
+            for _ in range(rng.poisson(RIDE_REQUESTS_PER_RIDE)):
+                user_id = self._user()
+                if user_id == driver_id:
+                    continue
+                wanted = 1 if rng.random() < 0.75 else 2
+                accepted = status != 'cancelled' and wanted <= remaining and rng.random() < 0.8
+                if accepted:
+                    remaining -= wanted
+                    request_status = 'completed' if status == 'completed' else 'accepted'
+                else:
+                    request_status = 'rejected' if past or wanted > remaining else 'pending'
+                requested_at = created_at + (departure - created_at) * rng.random()
+                if requested_at > self.now:
+                    continue
+                requests.append((
+                    self.batches.next_id(RideRequest),
+                    ride_id,
+                    user_id,
+                    wanted,
+                    wanted * cost_per_seat,
+                    request_status,
+                    'paid' if request_status == 'completed' else 'pending',
+                    requested_at,
+                    requested_at
+                ))
+
+            plate = f"{'MH DL KA RJ UP GA KL HP'.split()[int(rng.integers(8))]}{int(rng.integers(1, 99)):02d}" \
+                    f"{chr(65 + int(rng.integers(26)))}{chr(65 + int(rng.integers(26)))}{int(rng.integers(1000, 9999))}"
+            # Seats left depend on the requests, but the ride must be buffered before them
+            self.batches.add(Ride, (
+                ride_id,
+                driver_id,
+                origin['name'],
+                target['name'],
+                origin['latitude'],
+                origin['longitude'],
+                target['latitude'],
+                target['longitude'],
+                departure,
+                departure + timedelta(hours=distance / AVERAGE_SPEED_KMH),
+                distance,
+                vehicle_type,
+                model,
+                plate,
+                remaining,
+                cost_per_seat,
+                status,
+                rng.random() < 0.7,
+                round(float(np.clip(rng.normal(4.5, 0.3), 1.0, 5.0)), 1),
+                created_at,
+                created_at
+            ))
+            for row in requests:
+                self.batches.add(RideRequest, row)
+
+    # ===== TRAVEL BUDDIES =====
+
+    def buddies(self, day):
+        rng = self.rng
+        for _ in range(rng.poisson(BUDDIES_PER_DAY * self.scale)):
+            dest = self._destination(day.month)
+            created_at = self._moment(day - timedelta(days=int(rng.geometric(1 / LEAD_MEAN_DAYS))))
+            if created_at > self.now:
+                continue
+            duration = 1 + int(rng.poisson(dest['stay']))
+            max_group = int(rng.integers(2, 7))
+            roll = rng.random()
+            if day < self.today:
+                status = 'matched' if roll < 0.6 else 'cancelled'
+            else:
+                status = 'active' if roll < 0.8 else 'matched' if roll < 0.95 else 'cancelled'
+            user_id = self._user()
+            matched = None
+            scores = None
+            if status == 'matched':
+                matched = [self._user() for _ in range(int(rng.integers(1, max_group)))]
+                scores = {str(other): round(float(rng.uniform(0.5, 1.0)), 2) for other in matched}
+            budget = dest['budget'] * duration
+            self.batches.add(TravelBuddy, (
+                self.batches.next_id(TravelBuddy),
+                user_id,
+                dest['id'],
+                day,
+                day + timedelta(days=duration),
+                duration,
+                ('buddy', 'group', 'companion')[int(rng.integers(3))],
+                max_group,
+                {'min': round(budget * 0.7), 'max': round(budget * 1.5)},
+                [INTERESTS[i] for i in sorted(rng.choice(len(INTERESTS), int(rng.integers(2, 5)), replace=False))],
+                status,
+                matched,
+                scores,
+                f"Looking for travel companions for {duration} days in {dest['name']}",
+                created_at,
+                created_at
+            ))
+
+    # ===== SOS ALERTS =====
+
+    def sos_alerts(self, day):
+        rng = self.rng
+        for _ in range(rng.poisson(SOS_PER_DAY * self.scale)):
+            triggered_at = self._moment(day)
+            if triggered_at > self.now:
+                continue
+            dest = self._destination(day.month)
+            age = self.now - triggered_at
+            acknowledged_at = triggered_at + timedelta(minutes=float(rng.uniform(2, 30)))
+            resolved_at = acknowledged_at + timedelta(hours=float(rng.uniform(1, 12)))
+            if resolved_at <= self.now:
+                status = 'resolved'
+            elif acknowledged_at <= self.now:
+                status, resolved_at = ('in_progress' if age > timedelta(hours=1) else 'acknowledged'), None
+            else:
+                status, acknowledged_at, resolved_at = 'triggered', None, None
+            emergency_type = EMERGENCY_TYPES[int(np.searchsorted(np.cumsum(EMERGENCY_WEIGHTS), rng.random()))]
+            alert_id = self.batches.next_id(SOSAlert)
+            self.batches.add(SOSAlert, (
+                alert_id,
+                f'SOS{alert_id:010d}',
+                self._user(),
+                emergency_type,
+                f'{emergency_type.capitalize()} emergency reported near {dest["name"]}',
+                dest['latitude'] + float(rng.uniform(-0.1, 0.1)),
+                dest['longitude'] + float(rng.uniform(-0.1, 0.1)),
+                f"Near {dest['name']}",
+                status,
+                'Resolved with local authorities' if status == 'resolved' else None,
+                triggered_at,
+                acknowledged_at,
+                resolved_at
+            ))
+
+# ============================================================
+# ENTRY POINT
+# ============================================================
+
+def seed_workload(scale=1, history_days=730, future_days=180, seed=42, anchor=None):
+    """Regenerate the workload tables; returns per-table (rows, seconds)"""
+    app = create_app()
+    now = datetime.combine(anchor or date.today(), day_start())
+    rng = np.random.default_rng(seed)
+
+    with app.app_context():
+        print(f"🌱 Generating workload (scale {scale}x, {history_days} days back, "
+              f"{future_days} ahead, seed {seed}, anchor {now.date()})...")
+        catalog = Catalog(db.session, rng)
+        db.session.rollback()
+        if not catalog.user_ids or not catalog.hotel_ids:
+            raise SystemExit('Seed the catalog first: python -m backend.seed_data')
+
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(f"TRUNCATE {', '.join(WORKLOAD_TABLES)} RESTART IDENTITY")
+            loader = BulkLoader(connection, now)
+            generator = WorkloadGenerator(catalog, RowBatches(loader), rng, scale, now)
+            generator.run(now.date() - timedelta(days=history_days), now.date() + timedelta(days=future_days))
+            loader.finish()
+
+        print("📒 Rebuilding room-night inventory and rating aggregates...")
+        from backend.inventory import rebuild_inventory
+        from backend.ratings import rebuild_rating_aggregates
+        rebuild_inventory()
+        rebuild_rating_aggregates()
+
+        # Cached availability, ratings and review fragments predate the new rows
+        cache.clear()
+
+        print("\n🎉 Workload generated successfully!")
+        print_throughput(loader.stats)
+        print(f"  ({generator.sold_out:,} booking requests turned away as sold out)")
+        return loader.stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='volume multiple; match the catalog scale')
+    parser.add_argument('--history-days', type=int, default=730, help='days of history before the anchor')
+    parser.add_argument('--future-days', type=int, default=180, help='days of forward bookings after the anchor')
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed; same seed and anchor, same rows')
+    parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                        help='the generated "now" (default: today)')
+    args = parser.parse_args()
+    seed_workload(scale=args.scale, history_days=args.history_days, future_days=args.future_days,
+                  seed=args.seed, anchor=args.anchor)
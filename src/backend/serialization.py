@@ -0,0 +1,110 @@
+"""
+API SERIALIZATION
+Declarative field schemas, sparse fieldsets and a fast JSON encoder
+"""
+
+from flask import request, Response
+from operator import attrgetter
+from datetime import date, datetime
+from decimal import Decimal
+from backend.instrumentation import record_serialization
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+# ============================================================
+# ENCODER
+# ============================================================
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(payload):
+        """JSON bytes; datetimes and dates as ISO 8601, keys sorted like jsonify"""
+        return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(payload):
+        """JSON bytes; datetimes and dates as ISO 8601, keys sorted like jsonify"""
+        return json.dumps(payload, default=_default, sort_keys=True,
+                          separators=(',', ':')).encode('utf-8')
+
+def json_response(payload):
+    """Counterpart of jsonify(payload) using the fast encoder"""
+    started = time.perf_counter()
+    body = dumps(payload)
+    record_serialization(time.perf_counter() - started)
+    return Response(body, mimetype='application/json')
+
+# ============================================================
+# SCHEMAS
+# ============================================================
+
+class InvalidFields(ValueError):
+    """?fields= named something the resource does not have"""
+
+class Schema:
+    """
+    Ordered output fields of one resource. A field is an attribute name
+    (read from ORM objects, rows or namedtuples) or a (name, getter) pair;
+    fields absent from the object are passed to dump() as keyword values.
+    """
+
+    def __init__(self, *fields):
+        self.getters = {}
+        for field in fields:
+            name, getter = (field, attrgetter(field)) if isinstance(field, str) else field
+            self.getters[name] = getter
+
+    @property
+    def names(self):
+        return tuple(self.getters)
+
+    def subset(self, *names):
+        """Schema with only the given fields, in the given order"""
+        return Schema(*((name, self.getters[name]) for name in names))
+
+    def extend(self, *fields):
+        """Schema with extra fields appended"""
+        return Schema(*self.getters.items(), *fields)
+
+    def dump(self, obj, only=None, **values):
+        getters = self.getters
+        names = only if only is not None else getters
+        return {
+            name: values[name] if name in values else getters[name](obj)
+            for name in names
+        }
+
+    def dump_many(self, objs, only=None):
+        return [self.dump(obj, only) for obj in objs]
+
+    def fields_param(self, param='fields'):
+        """
+        Field names requested through ?fields=a,b,c (None: all of them), in
+        schema order. Raises InvalidFields for names the schema lacks.
+        """
+        raw = request.args.get(param)
+        if not raw:
+            return None
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        unknown = requested.difference(self.getters)
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return tuple(name for name in self.getters if name in requested)
+
+def project(items, only):
+    """Apply a sparse fieldset to already-serialized dicts"""
+    if only is None:
+        return items
+    return [{name: item[name] for name in only if name in item} for item in items]
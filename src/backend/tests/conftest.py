@@ -0,0 +1,28 @@
+"""
+TEST FIXTURES
+An app on the 'testing' config against the database in DATABASE_URL
+
+Run from src/: python -m pytest backend/tests
+Tests are skipped when the database cannot be reached.
+"""
+
+import pytest
+from backend.app import create_app, db
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+        except OperationalError:
+            pytest.skip('database in DATABASE_URL is not reachable')
+        finally:
+            db.session.remove()
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,74 @@
+"""
+SEARCH QUERY BUDGET
+A search page costs one page query and one rooms query, streamed or not
+"""
+
+import uuid
+import pytest
+from backend.app import db, cache
+from backend.models import Destination, Hotel, RoomType
+from backend.instrumentation import QueryCounter
+
+# Page (with total and facets) + rooms of every hotel on it
+SEARCH_QUERIES = 2
+
+HOTELS = 5
+
+@pytest.fixture
+def destination_id(app):
+    with app.app_context():
+        destination = Destination(name=f'Query Budget {uuid.uuid4().hex[:8]}', state='Test',
+                                  latitude=26.9, longitude=75.8)
+        db.session.add(destination)
+        db.session.flush()
+        for number in range(HOTELS):
+            hotel = Hotel(name=f'Budget Hotel {number}', destination_id=destination.id,
+                          latitude=26.9 + number / 100, longitude=75.8, base_price_per_night=2000.0)
+            hotel.rooms = [
+                RoomType(name='Deluxe Room', max_occupancy=2, base_price=2000.0 + number, total_rooms=5),
+                RoomType(name='Suite', max_occupancy=4, base_price=5000.0 + number, total_rooms=2)
+            ]
+            db.session.add(hotel)
+        db.session.commit()
+        destination_id = destination.id
+        db.session.remove()
+
+    yield destination_id
+
+    with app.app_context():
+        hotel_ids = Hotel.query.with_entities(Hotel.id).filter_by(destination_id=destination_id)
+        RoomType.query.filter(RoomType.hotel_id.in_(hotel_ids)).delete(synchronize_session=False)
+        Hotel.query.filter_by(destination_id=destination_id).delete(synchronize_session=False)
+        Destination.query.filter_by(id=destination_id).delete(synchronize_session=False)
+        db.session.commit()
+        db.session.remove()
+
+def _search(app, client, **body):
+    """(response, counter) for an uncached search; the body is read inside the count"""
+    with app.app_context():
+        cache.clear()
+    with QueryCounter() as counter:
+        response = client.post('/api/hotels/search', **body)
+        response.get_data()
+    return response, counter
+
+def test_search_page_queries(app, client, destination_id):
+    response, counter = _search(app, client, json={'destination_id': destination_id})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['hotels']) == HOTELS
+    assert counter.count <= SEARCH_QUERIES, '\n'.join(counter.statements)
+
+@pytest.mark.parametrize('body, headers', [
+    ({'stream': True}, {}),
+    ({}, {'Accept': 'application/x-ndjson'}),
+])
+def test_streamed_search_queries(app, client, destination_id, body, headers):
+    response, counter = _search(app, client, json={'destination_id': destination_id, **body},
+                                headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    # One record per hotel, then the pagination trailer
+    assert len(response.get_data().splitlines()) == HOTELS + 1
+    assert counter.count <= SEARCH_QUERIES, '\n'.join(counter.statements)
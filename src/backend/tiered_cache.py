@@ -0,0 +1,542 @@
+"""
+TWO-TIER CACHE
+Flask-Caching backend: in-process LRU in front of Redis, single-flight recomputation and stale-while-revalidate
+"""
+
+from flask import current_app
+from flask_caching.backends.base import BaseCache
+from collections import OrderedDict, namedtuple
+from contextvars import ContextVar
+from werkzeug.utils import import_string
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# What the remote tier stores: the value plus when it stops being fresh
+# (None: never expires). Values written by other means (inc/dec counters)
+# are returned as they are.
+Entry = namedtuple('Entry', 'value fresh_until')
+
+FRESH, STALE, MISS = 'fresh', 'stale', 'miss'
+
+_claims = threading.local()
+_async_claims = ContextVar('cache_claims', default=None)
+
+# ============================================================
+# STATS
+# ============================================================
+
+class TieredCacheStats:
+    """Process-local lookup counters per tier"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.flight_waits = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.local_hits + self.remote_hits + self.stale_served + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'remote_hits': self.remote_hits,
+                'misses': self.misses,
+                'stale_served': self.stale_served,
+                'refreshes': self.refreshes,
+                'flight_waits': self.flight_waits,
+                'hit_ratio': round((lookups - self.misses) / lookups, 4) if lookups else 0.0
+            }
+
+# ============================================================
+# LOCAL TIER
+# ============================================================
+
+class LocalTier:
+    """Thread-safe LRU whose entries expire at their own deadline"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def discard_prefixed(self, prefixes):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefixes)]:
+                del self._entries[key]
+
+# ============================================================
+# BACKEND
+# ============================================================
+
+class TieredCache(BaseCache):
+    """
+    Reads check a per-process LRU, then the remote tier (Redis, or any
+    Flask-Caching backend). Entries with a timeout stay in the remote tier
+    for CACHE_STALE_TTL seconds past it. In that window one caller claims
+    the refresh: get() returns None to it, so the usual miss-compute-set
+    path (cache.cached included) rebuilds the entry. Every other caller is
+    served the stale value instead of recomputing too.
+
+    Entries without a timeout (version tokens, counters) are never held
+    locally, so invalidating through them reaches every worker at once.
+    Other locally held entries can outlive a delete issued by another
+    worker by up to CACHE_LOCAL_TTL.
+    """
+
+    def __init__(self, remote, local_size=10000, local_ttl=5, stale_ttl=60,
+                 lock_timeout=10, lock_wait=1.0, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.remote = remote
+        self.local = LocalTier(local_size)
+        self.local_ttl = local_ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.stats = TieredCacheStats()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        remote_type = config.get('CACHE_TIERED_REMOTE', 'RedisCache')
+        if remote_type == 'fakeredis':
+            remote = _fakeredis_cache(app, config, args, dict(kwargs))
+        else:
+            if '.' not in remote_type:
+                remote_type = 'flask_caching.backends.' + remote_type
+            remote = import_string(remote_type).factory(app, config, list(args), dict(kwargs))
+        return cls(
+            remote,
+            local_size=config.get('CACHE_LOCAL_SIZE', 10000),
+            local_ttl=config.get('CACHE_LOCAL_TTL', 5),
+            stale_ttl=config.get('CACHE_STALE_TTL', 60),
+            lock_timeout=config.get('CACHE_LOCK_TIMEOUT', 10),
+            lock_wait=config.get('CACHE_LOCK_WAIT', 1.0),
+            default_timeout=kwargs.get('default_timeout', 300)
+        )
+
+    # ===== ENTRIES =====
+
+    def _entry(self, value, timeout):
+        timeout = self._normalize_timeout(timeout)
+        if timeout == 0:
+            return Entry(value, None), 0
+        return Entry(value, time.time() + timeout), timeout + self.stale_ttl
+
+    def _resolve(self, key, stored):
+        """(state, value) for what the remote tier returned; warms the local tier"""
+        if stored is None:
+            return MISS, None
+        if not isinstance(stored, Entry):
+            return FRESH, stored
+        if stored.fresh_until is None:
+            return FRESH, stored.value
+        remaining = stored.fresh_until - time.time()
+        if remaining > 0:
+            self.local.set(key, stored, min(self.local_ttl, remaining))
+            return FRESH, stored.value
+        return STALE, stored.value
+
+    def _local_lookup(self, key):
+        entry = self.local.get(key)
+        if entry is not None and entry.fresh_until > time.time():
+            self.stats.incr('local_hits')
+            return entry.value
+        return None
+
+    # ===== SINGLE FLIGHT =====
+
+    def _lock_key(self, key):
+        return f'{key}:refresh-lock'
+
+    def claim(self, key):
+        """True for exactly one caller across workers until release() or the lock times out"""
+        if not self.remote.add(self._lock_key(key), 1, timeout=self.lock_timeout):
+            return False
+        held = getattr(_claims, 'keys', None)
+        if held is None:
+            held = _claims.keys = set()
+        held.add(key)
+        return True
+
+    def release(self, key):
+        held = getattr(_claims, 'keys', None)
+        if held and key in held:
+            held.discard(key)
+            self.remote.delete(self._lock_key(key))
+
+    def _serve(self, key, state, value):
+        """get() semantics for a looked-up key: one stale reader refreshes, the rest get stale"""
+        if state == FRESH:
+            self.stats.incr('remote_hits')
+            return value
+        if state == MISS:
+            self.stats.incr('misses')
+            return None
+        if self.claim(key):
+            self.stats.incr('refreshes')
+            return None
+        self.stats.incr('stale_served')
+        return value
+
+    # ===== BASECACHE API =====
+
+    def get(self, key):
+        value = self._local_lookup(key)
+        if value is not None:
+            return value
+        state, value = self._resolve(key, self.remote.get(key))
+        return self._serve(key, state, value)
+
+    def get_many(self, *keys):
+        values = [self._local_lookup(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            stored = self.remote.get_many(*(keys[index] for index in missing))
+            for index, item in zip(missing, stored):
+                state, value = self._resolve(keys[index], item)
+                values[index] = self._serve(keys[index], state, value)
+        return values
+
+    def set(self, key, value, timeout=None):
+        entry, remote_timeout = self._entry(value, timeout)
+        stored = self.remote.set(key, entry, timeout=remote_timeout)
+        self.local.discard(key)
+        if entry.fresh_until is not None:
+            self.local.set(key, entry, min(self.local_ttl, entry.fresh_until - time.time()))
+        self.release(key)
+        return stored
+
+    def add(self, key, value, timeout=None):
+        entry, remote_timeout = self._entry(value, timeout)
+        added = self.remote.add(key, entry, timeout=remote_timeout)
+        self.release(key)
+        return added
+
+    def set_many(self, mapping, timeout=None):
+        return [key for key, value in mapping.items() if self.set(key, value, timeout)]
+
+    def delete(self, key):
+        self.local.discard(key)
+        return self.remote.delete(key)
+
+    def delete_many(self, *keys):
+        for key in keys:
+            self.local.discard(key)
+        return self.remote.delete_many(*keys)
+
+    def has(self, key):
+        return self._local_lookup(key) is not None or self.remote.has(key)
+
+    def clear(self):
+        self.local.clear()
+        return self.remote.clear()
+
+    def inc(self, key, delta=1):
+        # Counters are raw remote values: never enveloped, never held locally
+        return self.remote.inc(key, delta)
+
+    def dec(self, key, delta=1):
+        return self.remote.dec(key, delta)
+
+    # ===== COMPUTE-THROUGH =====
+
+    def get_or_compute(self, key, loader, timeout=None):
+        """
+        Cached value of key, built by loader() when needed. A cold miss is
+        computed by one caller; the others wait up to CACHE_LOCK_WAIT for
+        its result before computing themselves. A stale entry is served
+        while one caller rebuilds it in a background thread.
+        """
+        value = self._local_lookup(key)
+        if value is not None:
+            return value
+        state, value = self._resolve(key, self.remote.get(key))
+
+        if state == FRESH:
+            self.stats.incr('remote_hits')
+            return value
+
+        if state == STALE:
+            self.stats.incr('stale_served')
+            if self.claim(key):
+                self.stats.incr('refreshes')
+                self._refresh_in_background(key, loader, timeout)
+            return value
+
+        self.stats.incr('misses')
+        if not self.claim(key):
+            self.stats.incr('flight_waits')
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                state, value = self._resolve(key, self.remote.get(key))
+                if state != MISS:
+                    return value
+        try:
+            value = loader()
+            self.set(key, value, timeout)
+        finally:
+            self.release(key)
+        return value
+
+    def _refresh_in_background(self, key, loader, timeout):
+        app = current_app._get_current_object()
+        _claims.keys.discard(key)  # the claim moves to the refresh thread
+
+        def refresh():
+            _claims.keys = {key}
+            try:
+                with app.app_context():
+                    self.set(key, loader(), timeout)
+            except Exception:
+                app.logger.exception('Background refresh of %s failed', key)
+            finally:
+                self.release(key)
+
+        threading.Thread(target=refresh, name=f'cache-refresh:{key}', daemon=True).start()
+
+def _fakeredis_cache(app, config, args, kwargs):
+    """RedisCache over an in-process fakeredis server (tests)"""
+    try:
+        import fakeredis
+    except ImportError as e:
+        raise RuntimeError('CACHE_TIERED_REMOTE=fakeredis needs the fakeredis package') from e
+    from flask_caching.backends.rediscache import RedisCache
+    remote = RedisCache(key_prefix=config.get('CACHE_KEY_PREFIX') or '', **kwargs)
+    remote._write_client = remote._read_client = fakeredis.FakeStrictRedis()
+    return remote
+
+# ============================================================
+# ASYNC ACCESS
+# ============================================================
+
+class AsyncTieredCache:
+    """
+    asyncio counterpart of a TieredCache whose remote tier is Redis, for the
+    ASGI entry point. It shares the TieredCache's local tier and stats and
+    reads and writes the same remote entries (same key prefix, serializer
+    and envelope) through redis.asyncio, so sync and async callers see each
+    other's writes, invalidations and refresh claims.
+    """
+
+    def __init__(self, tiered, client):
+        self.tiered = tiered
+        self.client = client
+        self.prefix = tiered.remote._get_prefix()
+        self.serializer = tiered.remote.serializer
+        self._refreshes = set()
+
+    @classmethod
+    def from_cache(cls, backend, redis_url):
+        from flask_caching.backends.rediscache import RedisCache
+        if not isinstance(backend, TieredCache) or not isinstance(backend.remote, RedisCache):
+            raise RuntimeError('Async cache access needs the TieredCache backend over CACHE_TIERED_REMOTE=RedisCache')
+        import redis.asyncio
+        return cls(backend, redis.asyncio.from_url(redis_url))
+
+    async def close(self):
+        await self.client.aclose()
+
+    # ===== SINGLE FLIGHT =====
+
+    async def claim(self, key):
+        lock_key = self.prefix + self.tiered._lock_key(key)
+        if not await self.client.set(lock_key, self.serializer.dumps(1), nx=True, ex=self.tiered.lock_timeout):
+            return False
+        held = _async_claims.get()
+        if held is None:
+            held = set()
+            _async_claims.set(held)
+        held.add(key)
+        return True
+
+    async def release(self, key):
+        held = _async_claims.get()
+        if held and key in held:
+            held.discard(key)
+            await self.client.delete(self.prefix + self.tiered._lock_key(key))
+
+    async def _serve(self, key, state, value):
+        if state == FRESH:
+            self.tiered.stats.incr('remote_hits')
+            return value
+        if state == MISS:
+            self.tiered.stats.incr('misses')
+            return None
+        if await self.claim(key):
+            self.tiered.stats.incr('refreshes')
+            return None
+        self.tiered.stats.incr('stale_served')
+        return value
+
+    # ===== CACHE API =====
+
+    async def get(self, key):
+        return (await self.get_many(key))[0]
+
+    async def get_many(self, *keys):
+        tiered = self.tiered
+        values = [tiered._local_lookup(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            stored = await self.client.mget([self.prefix + keys[index] for index in missing])
+            for index, raw in zip(missing, stored):
+                state, value = tiered._resolve(keys[index], self.serializer.loads(raw))
+                values[index] = await self._serve(keys[index], state, value)
+        return values
+
+    async def set(self, key, value, timeout=None):
+        tiered = self.tiered
+        entry, remote_timeout = tiered._entry(value, timeout)
+        stored = await self.client.set(self.prefix + key, self.serializer.dumps(entry), ex=remote_timeout or None)
+        tiered.local.discard(key)
+        if entry.fresh_until is not None:
+            tiered.local.set(key, entry, min(tiered.local_ttl, entry.fresh_until - time.time()))
+        await self.release(key)
+        return bool(stored)
+
+    async def add(self, key, value, timeout=None):
+        entry, remote_timeout = self.tiered._entry(value, timeout)
+        added = await self.client.set(self.prefix + key, self.serializer.dumps(entry),
+                                      nx=True, ex=remote_timeout or None)
+        await self.release(key)
+        return bool(added)
+
+    # ===== COMPUTE-THROUGH =====
+
+    async def get_or_compute(self, key, loader, timeout=None):
+        """TieredCache.get_or_compute with an async loader; stale entries refresh in a task"""
+        tiered = self.tiered
+        value = tiered._local_lookup(key)
+        if value is not None:
+            return value
+        state, value = tiered._resolve(key, self.serializer.loads(await self.client.get(self.prefix + key)))
+
+        if state == FRESH:
+            tiered.stats.incr('remote_hits')
+            return value
+
+        if state == STALE:
+            tiered.stats.incr('stale_served')
+            if await self.claim(key):
+                tiered.stats.incr('refreshes')
+                task = asyncio.create_task(self._refresh(key, loader, timeout))
+                self._refreshes.add(task)  # the loop only keeps weak references to tasks
+                task.add_done_callback(self._refreshes.discard)
+            return value
+
+        tiered.stats.incr('misses')
+        if not await self.claim(key):
+            tiered.stats.incr('flight_waits')
+            deadline = time.monotonic() + tiered.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                state, value = tiered._resolve(key, self.serializer.loads(await self.client.get(self.prefix + key)))
+                if state != MISS:
+                    return value
+        try:
+            value = await loader()
+            await self.set(key, value, timeout)
+        finally:
+            await self.release(key)
+        return value
+
+    async def _refresh(self, key, loader, timeout):
+        # The task runs in a copy of the claimer's context, claims included
+        try:
+            await self.set(key, await loader(), timeout)
+        except Exception:
+            logger.exception('Background refresh of %s failed', key)
+        finally:
+            await self.release(key)
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def remember(cache, key, loader, timeout=None):
+    """
+    cache.get(key) or loader(), cached. Uses single flight and background
+    refresh when the configured backend is a TieredCache, plain get/set otherwise.
+    """
+    backend = cache.cache
+    if isinstance(backend, TieredCache):
+        return backend.get_or_compute(key, loader, timeout)
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+def delete_prefixed(cache, *prefixes):
+    """
+    Delete every key starting with one of prefixes, leaving the rest of a
+    shared Redis database (rate limits, other apps) alone. SCAN + UNLINK on
+    Redis, a key walk on SimpleCache. Local tiers of other processes keep
+    their copies for up to CACHE_LOCAL_TTL. Returns the number of keys deleted.
+    """
+    from flask_caching.backends.rediscache import RedisCache
+    from flask_caching.backends.simplecache import SimpleCache
+    backend = cache.cache
+    remote = backend
+    if isinstance(backend, TieredCache):
+        backend.local.discard_prefixed(prefixes)
+        remote = backend.remote
+
+    if isinstance(remote, RedisCache):
+        client, stored = remote._write_client, remote._get_prefix()
+        glob = ''.join('\\' + char if char in '*?[]\\' else char for char in stored)
+        deleted = 0
+        for prefix in prefixes:
+            keys = list(client.scan_iter(match=glob + prefix + '*', count=1000))
+            for start in range(0, len(keys), 1000):
+                deleted += client.unlink(*keys[start:start + 1000])
+        return deleted
+    if isinstance(remote, SimpleCache):
+        keys = [key for key in list(remote._cache) if key.startswith(prefixes)]
+        remote.delete_many(*keys)
+        return len(keys)
+    raise NotImplementedError(f'delete_prefixed does not support {type(remote).__name__}')
+
+def cache_stats(cache):
+    backend = cache.cache
+    return backend.stats.snapshot() if isinstance(backend, TieredCache) else None
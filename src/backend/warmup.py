@@ -0,0 +1,201 @@
+"""
+CACHE WARM-UP
+Loads the hottest cache entries before a worker reports ready on /api/health
+
+Warms, in this order, until done or WARMUP_BUDGET seconds have passed:
+  - the destination catalog (identity and gzip bodies)
+  - this worker's autocomplete index (AUTOCOMPLETE_PRELOAD)
+  - detail fragments of the WARMUP_HOTELS most-booked hotels (Hotel.total_bookings)
+  - the first search page of the WARMUP_DESTINATIONS destinations whose hotels
+    are booked most, once per sort order in WARMUP_SEARCH_SORTS
+
+Entries land in the shared cache and in this worker's local tier. Entries
+another worker already built are only read, so a fleet restart queries the
+database about once per entry. Searches go through the search route
+itself, so their keys and payloads are exactly what visitors will ask for.
+
+A serving worker starts the warm-up on a background thread when its first
+request arrives, normally the load balancer's first /api/health probe.
+/api/health answers 503 until it finishes or the budget runs out, so a load
+balancer routes to a worker only once its caches are warm, and a slow or
+failing warm-up delays readiness by at most the budget. Scripts that only
+build an app (seeders, migrations, other CLI commands) never serve a request,
+so they never warm anything against tables they are rewriting.
+`flask warm-cache` runs the shared-cache stages in the foreground (after a
+deploy, or when the cache was flushed).
+"""
+
+from flask import request
+from backend.app import db, limiter
+from backend.models import Hotel
+from sqlalchemy import select, func
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# WSGI environ key marking the warm-up's own search requests
+WARMUP_ENVIRON_KEY = 'backend.warmup'
+
+@limiter.request_filter
+def _is_warmup_request():
+    return request.environ.get(WARMUP_ENVIRON_KEY, False)
+
+# ============================================================
+# STAGES
+# ============================================================
+
+def most_booked_hotels(limit):
+    return db.session.scalars(
+        select(Hotel.id).order_by(Hotel.total_bookings.desc().nulls_last(), Hotel.id).limit(limit)
+    ).all()
+
+def most_booked_destinations(limit):
+    bookings = func.sum(func.coalesce(Hotel.total_bookings, 0))
+    return db.session.scalars(
+        select(Hotel.destination_id).group_by(Hotel.destination_id)
+        .order_by(bookings.desc(), Hotel.destination_id).limit(limit)
+    ).all()
+
+def _warm_catalog(app):
+    from backend.catalog import catalog_version, catalog_bodies
+    with app.app_context():
+        catalog_bodies(catalog_version())
+
+def _warm_autocomplete(app):
+    from backend.autocomplete import suggestion_index
+    with app.app_context():
+        suggestion_index.warm()
+
+def _warm_hotel(app, hotel_id):
+    from backend.hotel_fragments import hotel_fragments
+    with app.app_context():
+        hotel_fragments(hotel_id)
+
+def _warm_search(app, destination_id, sort_by):
+    response = app.test_client().post(
+        '/api/hotels/search', json={'destination_id': destination_id, 'sort_by': sort_by},
+        environ_overrides={WARMUP_ENVIRON_KEY: True}
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f'search for destination {destination_id} answered {response.status_code}')
+
+def warmup_plan(app, hotels, destinations, sorts, autocomplete=False):
+    """(stage, callable) pairs in the order they should run"""
+    with app.app_context():
+        hotel_ids = most_booked_hotels(hotels) if hotels else []
+        destination_ids = most_booked_destinations(destinations) if destinations else []
+        db.session.remove()
+
+    plan = [('catalog', lambda: _warm_catalog(app))]
+    if autocomplete:
+        plan.append(('autocomplete', lambda: _warm_autocomplete(app)))
+    plan += [('hotels', lambda hotel_id=hotel_id: _warm_hotel(app, hotel_id)) for hotel_id in hotel_ids]
+    plan += [('searches', lambda destination_id=destination_id, sort_by=sort_by:
+              _warm_search(app, destination_id, sort_by))
+             for destination_id in destination_ids for sort_by in sorts]
+    return plan
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+class CacheWarmup:
+    """
+    Per-process warm-up state. Runs start on a worker's first request, so
+    each forked worker warms its own in-process tiers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.app = None
+        self.enabled = False
+        self.hotels = 100
+        self.destinations = 10
+        self.sorts = ('popularity',)
+        self.autocomplete = False
+        self.budget = 30.0
+        self.deadline = None
+        self.finished = False
+        self.warmed = {}
+        self.failed = 0
+        self.seconds = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['WARMUP_ENABLED']
+        self.hotels = app.config['WARMUP_HOTELS']
+        self.destinations = app.config['WARMUP_DESTINATIONS']
+        self.sorts = tuple(sort_by for sort_by in app.config['WARMUP_SEARCH_SORTS'] if sort_by)
+        self.autocomplete = app.config['AUTOCOMPLETE_PRELOAD']
+        self.budget = app.config['WARMUP_BUDGET']
+
+        # Only serving processes get requests: building an app never warms
+        @app.before_request
+        def _warm_this_worker():
+            if not _is_warmup_request():
+                self.ensure_started()
+
+    def ensure_started(self):
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            if self.finished:
+                return
+            self.deadline = time.monotonic() + self.budget
+            threading.Thread(target=self._run_logged, name='cache-warmup', daemon=True).start()
+
+    def _run_logged(self):
+        report = self.run(autocomplete=self.autocomplete)
+        logger.info('Cache warm-up: %s', report)
+
+    def run(self, hotels=None, destinations=None, sorts=None, budget=None, autocomplete=False):
+        """Warm the caches from the calling thread; returns the report"""
+        started = time.monotonic()
+        deadline = started + (self.budget if budget is None else budget)
+        self.warmed, self.failed = {'catalog': 0, 'autocomplete': 0, 'hotels': 0, 'searches': 0}, 0
+        try:
+            plan = warmup_plan(self.app, self.hotels if hotels is None else hotels,
+                               self.destinations if destinations is None else destinations,
+                               self.sorts if sorts is None else sorts, autocomplete)
+        except Exception:
+            # Schema not migrated yet / database down: serve cold
+            logger.warning('Cache warm-up skipped', exc_info=True)
+            plan = []
+
+        for stage, warm in plan:
+            if time.monotonic() >= deadline:
+                logger.warning('Cache warm-up budget exhausted')
+                break
+            try:
+                warm()
+                self.warmed[stage] += 1
+            except Exception:
+                self.failed += 1
+                logger.warning('Cache warm-up step failed (%s)', stage, exc_info=True)
+
+        self.seconds = round(time.monotonic() - started, 3)
+        self.finished = True
+        return self.snapshot()
+
+    def ready(self):
+        """True once warm-up finished or its budget ran out (or it is disabled)"""
+        if not self.enabled or self.finished:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def snapshot(self):
+        return {
+            'finished': self.finished,
+            'warmed': dict(self.warmed),
+            'failed': self.failed,
+            'seconds': self.seconds
+        }
+
+cache_warmup = CacheWarmup()